@@ -0,0 +1,138 @@
+"""
+Benchmark: per-profile cost of the activity classifier
+
+Compares the original inline scanner filter (dateutil parsing, datetime.now()
+per profile) with v2_activity_classifier's scalar and vectorised entry points
+on synthetic profiles, and checks that all three agree.
+
+Usage:
+  python scripts/bench_activity_classifier.py --profiles 200000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dateutil.parser import parse as parse_date
+
+sys.path.insert(0, str(Path(__file__).parent))
+import numpy as np
+from v2_activity_classifier import (
+    ActivityCutoffs, classify_activity, classify_profiles, classify_activity_batch,
+    parse_iso_timestamps, LABELS, ACTIVE
+)
+
+
+def legacy_is_inactive(profile_data):
+    """The filter exactly as it ran inline in IDScanner.scan_id"""
+    last_seen = profile_data.get('lastSeen')
+    first_pub = profile_data.get('firstPublishedPostDate')
+    posts_count = profile_data.get('postsCount', 0) or 0
+    photos_count = profile_data.get('photosCount', 0) or 0
+    videos_count = profile_data.get('videosCount', 0) or 0
+    favorited_count = profile_data.get('favoritedCount', 0) or 0
+    is_verified = profile_data.get('isVerified', False)
+    
+    is_abandoned = False
+    if last_seen:
+        try:
+            is_abandoned = parse_date(last_seen) < datetime.now(timezone.utc) - timedelta(days=365)
+        except Exception:
+            pass
+    
+    is_recent_account = False
+    if first_pub:
+        try:
+            is_recent_account = parse_date(first_pub) > datetime.now(timezone.utc) - timedelta(days=730)
+        except Exception:
+            pass
+    
+    if is_abandoned and not (is_verified or favorited_count > 10000):
+        return True
+    if (favorited_count > 100 or posts_count > 50 or (photos_count + videos_count) > 100
+            or is_verified or is_recent_account):
+        return False
+    
+    old_or_no_lastseen = False
+    if not last_seen:
+        old_or_no_lastseen = True
+    else:
+        try:
+            old_or_no_lastseen = parse_date(last_seen) < datetime.now(timezone.utc) - timedelta(days=365)
+        except Exception:
+            pass
+    return (posts_count < 10 and (photos_count + videos_count) <= 5
+            and favorited_count < 100 and old_or_no_lastseen)
+
+
+def synthetic_profiles(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    profiles = []
+    for i in range(n):
+        def ts(max_days):
+            if rng.random() < 0.1:
+                return None
+            return (now - timedelta(days=rng.uniform(0, max_days))).replace(microsecond=0).isoformat()
+        profiles.append({
+            'id': i,
+            'postsCount': rng.choice([0, 1, 5, 20, 60, 400]),
+            'photosCount': rng.choice([0, 2, 30, 200]),
+            'videosCount': rng.choice([0, 1, 10, 80]),
+            'favoritedCount': rng.choice([0, 10, 90, 150, 5000, 20000]),
+            'isVerified': rng.random() < 0.2,
+            'lastSeen': ts(3 * 365),
+            'firstPublishedPostDate': ts(6 * 365),
+        })
+    return profiles
+
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s  {elapsed / n * 1e6:8.2f} µs/profile")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Activity classifier benchmark')
+    parser.add_argument('--profiles', type=int, default=200000, help='Synthetic profiles (default: 200000)')
+    args = parser.parse_args()
+    
+    n = args.profiles
+    profiles = synthetic_profiles(n)
+    print(f"Benchmarking {n:,} synthetic profiles\n")
+    
+    legacy = timed("legacy (dateutil, now() per call)", n,
+                   lambda: [legacy_is_inactive(p) for p in profiles])
+    
+    cutoffs = ActivityCutoffs()
+    scalar = timed("classify_activity (scalar)", n,
+                   lambda: [classify_activity(p, cutoffs) != ACTIVE for p in profiles])
+    
+    codes = timed("classify_profiles (vectorised)", n,
+                  lambda: classify_profiles(profiles, cutoffs))
+    batch = (LABELS[codes] != ACTIVE).tolist()
+    
+    # Rules only, on columns that are already parsed (e.g. from the DB or a ColumnBatch)
+    cols = {k: np.array([p[k] for p in profiles], dtype=np.float64)
+            for k in ('postsCount', 'photosCount', 'videosCount', 'favoritedCount')}
+    verified = np.array([p['isVerified'] for p in profiles], dtype=bool)
+    last_seen = parse_iso_timestamps(p['lastSeen'] for p in profiles)
+    first_pub = parse_iso_timestamps(p['firstPublishedPostDate'] for p in profiles)
+    timed("classify_activity_batch (arrays)", n,
+          lambda: classify_activity_batch(cols['postsCount'], cols['photosCount'], cols['videosCount'],
+                                          cols['favoritedCount'], verified, last_seen, first_pub, cutoffs))
+    
+    mismatches = sum(1 for a, b, c in zip(legacy, scalar, batch) if not (a == b == c))
+    print(f"\nFiltered as inactive: {sum(legacy):,} / {n:,}")
+    print(f"Disagreements with legacy filter: {mismatches}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: CSV type coercion in load_csv_to_supabase
+
+Writes a synthetic profile CSV, then compares the original per-cell pipeline
+(Series.map normalizers, replace/where, to_dict, scrub_row) with the
+vectorised coerce_types + frame_records, and checks that every row matches.
+
+Usage:
+  python scripts/bench_csv_coercion.py --rows 1000000
+"""
+
+import argparse
+import csv
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+from load_csv_to_supabase import (
+    coerce_types, frame_records, scrub_row,
+    NUMERIC_GUESS_COLUMNS, BOOL_GUESS_COLUMNS, TIMESTAMP_GUESS_COLUMNS
+)
+
+
+def legacy_bool_series(s):
+    """normalize_bool_series as it was (Series.map over a Python callable)"""
+    mapping = {"true": True, "false": False, "t": True, "f": False,
+               "1": True, "0": False, "yes": True, "no": False}
+    def _coerce(x):
+        if x is None:
+            return None
+        if isinstance(x, (bool, np.bool_)):
+            return bool(x)
+        if isinstance(x, (int, np.integer)):
+            return bool(int(x))
+        if isinstance(x, (float, np.floating)):
+            if np.isnan(x):
+                return None
+            return bool(int(x))
+        return mapping.get(str(x).strip().lower())
+    return s.map(_coerce)
+
+
+def legacy_timestamp_series(s):
+    """normalize_timestamp_series as it was (re.sub per cell, isoformat per cell)"""
+    def fix_raw(v):
+        if v is None:
+            return None
+        vs = str(v).strip()
+        if vs == "" or vs.lower() in {"none", "nan", "null", "false", "true"}:
+            return None
+        return re.sub(r"(\+|\-)(\d{2})(\d{2})$", r"\1\2:\3", vs)
+    parsed = pd.to_datetime(s.map(fix_raw), errors="coerce", utc=True)
+    return parsed.map(lambda ts: None if pd.isna(ts) else ts.isoformat())
+
+
+def legacy_records(df):
+    for col in df.columns:
+        if col in NUMERIC_GUESS_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        elif col in BOOL_GUESS_COLUMNS:
+            df[col] = legacy_bool_series(df[col])
+        elif col in TIMESTAMP_GUESS_COLUMNS:
+            df[col] = legacy_timestamp_series(df[col])
+    df = df.replace([np.inf, -np.inf], pd.NA)
+    df = df.where(pd.notnull(df), None)
+    # scrub_row ran in main and again in post_batch
+    return [scrub_row(scrub_row(r)) for r in df.to_dict(orient="records")]
+
+
+def write_synthetic_csv(path, n, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    bools = ["true", "false", "t", "f", "1", "0", "", "yes", "null"]
+    columns = ["id", "username", "about", "favoritedcount", "postscount", "subscribeprice",
+               "isverified", "canchat", "hasstories", "lastseen", "joindate"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for i in range(n):
+            def ts(max_days):
+                r = rng.random()
+                if r < 0.1:
+                    return ""
+                t = now - timedelta(days=rng.uniform(0, max_days))
+                return t.strftime("%Y-%m-%dT%H:%M:%S+0000" if r < 0.6 else "%Y-%m-%dT%H:%M:%S.%f+00:00")
+            writer.writerow([
+                i, f"user{i}", "about me " * rng.randint(0, 20),
+                rng.choice(["", "0", "150", "20000.0", "nan"]), rng.randint(0, 900),
+                rng.choice(["", "4.99", "9.99", "0", "15"]),
+                rng.choice(bools), rng.choice(bools), rng.choice(bools),
+                ts(3 * 365), ts(6 * 365)
+            ])
+
+
+def read(path):
+    return pd.read_csv(path, encoding="utf-8", dtype=str, keep_default_na=False,
+                       na_values=["", "NaN", "nan", "NULL", "null"])
+
+
+def timed(label, n, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s  {elapsed / n * 1e6:8.2f} µs/row")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV coercion benchmark')
+    parser.add_argument('--rows', type=int, default=1000000, help='Synthetic CSV rows (default: 1000000)')
+    args = parser.parse_args()
+    
+    n = args.rows
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        write_synthetic_csv(path, n)
+        print(f"Benchmarking {n:,} synthetic profile rows ({os.path.getsize(path) / 1e6:.0f} MB CSV)\n")
+        
+        legacy = timed("legacy (map per cell, 2x scrub_row)", n, lambda: legacy_records(read(path)))
+        vectorised = timed("coerce_types + frame_records", n, lambda: frame_records(coerce_types(read(path))))
+        timed("read_csv only (shared cost)", n, lambda: read(path))
+    finally:
+        os.remove(path)
+    
+    mismatches = sum(1 for a, b in zip(legacy, vectorised) if a != b)
+    print(f"\nRows compared: {len(legacy):,}")
+    print(f"Mismatched rows: {mismatches}")
+    sys.exit(1 if mismatches or len(legacy) != len(vectorised) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,13 @@
 import os
-import json
+import io
+import sys
+import argparse
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine.url import URL
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
 load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-assert DATABASE_URL, "DATABASE_URL missing in .env"
-
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-
-# Adjust if your file is named differently
-CSV_PATH = "temp.csv"   # or "onlyfans_profiles.csv"
 
 # Minimal DDL if table doesn’t exist
 DDL = """
@@ -37,100 +31,144 @@ CREATE TABLE IF NOT EXISTS creators (
 );
 """
 
-UPSERT_SQL = text("""
-INSERT INTO creators (
-  id, username, name, location, is_verified, is_performer, subscribe_price,
-  avatar, about, last_seen, join_date, favorited_count, posts_count, medias_count,
-  raw_json, updated_at
-) VALUES (
-  :id, :username, :name, :location, :is_verified, :is_performer, :subscribe_price,
-  :avatar, :about, :last_seen, :join_date, :favorited_count, :posts_count, :medias_count,
-  CAST(:raw_json AS JSONB), NOW()
-)
+COLUMNS = [
+  "id", "username", "name", "location", "is_verified", "is_performer", "subscribe_price",
+  "avatar", "about", "last_seen", "join_date", "favorited_count", "posts_count", "medias_count",
+  "raw_json"
+]
+
+# Session-local staging table; ON COMMIT DELETE ROWS empties it after every chunk
+STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS creators_stage (LIKE creators INCLUDING DEFAULTS)
+ON COMMIT DELETE ROWS;
+"""
+
+COPY_SQL = f"COPY creators_stage ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+MERGE_SQL = f"""
+INSERT INTO creators ({', '.join(COLUMNS)}, updated_at)
+SELECT {', '.join(COLUMNS)}, NOW() FROM creators_stage
 ON CONFLICT (id) DO UPDATE SET
-  username = EXCLUDED.username,
-  name = EXCLUDED.name,
-  location = EXCLUDED.location,
-  is_verified = EXCLUDED.is_verified,
-  is_performer = EXCLUDED.is_performer,
-  subscribe_price = EXCLUDED.subscribe_price,
-  avatar = EXCLUDED.avatar,
-  about = EXCLUDED.about,
-  last_seen = EXCLUDED.last_seen,
-  join_date = EXCLUDED.join_date,
-  favorited_count = EXCLUDED.favorited_count,
-  posts_count = EXCLUDED.posts_count,
-  medias_count = EXCLUDED.medias_count,
-  raw_json = EXCLUDED.raw_json,
+  {', '.join(f'{c} = EXCLUDED.{c}' for c in COLUMNS if c != 'id')},
   updated_at = NOW();
-""")
+"""
 
-def to_bool(v):
-    if pd.isna(v): return None
-    if isinstance(v, bool): return v
-    s = str(v).strip().lower()
-    return True if s in ("true","1","yes","y","t") else False if s in ("false","0","no","n","f") else None
+BOOL_MAP = {"true": True, "1": True, "yes": True, "y": True, "t": True,
+            "false": False, "0": False, "no": False, "n": False, "f": False}
 
-def to_num(v):
-    try:
-        if pd.isna(v): return None
-        return float(v)
-    except:
-        return None
+# -----------------------------
+# Vectorised column conversion
+# -----------------------------
+def column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Column by CSV header name, all-NA if the CSV doesn't have it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(pd.NA, index=df.index, dtype=object)
 
-def to_int(v):
-    try:
-        if pd.isna(v): return None
-        return int(float(v))
-    except:
-        return None
+def to_bool(s: pd.Series) -> pd.Series:
+    if s.dtype == bool:
+        return s.astype("boolean")
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return (s != 0).astype("boolean").mask(s.isna())
+    return s.astype("string").str.strip().str.lower().map(BOOL_MAP).astype("boolean")
 
-def to_ts(s):
-    if pd.isna(s) or not s: return None
-    try:
-        # Handles ISO dates like "2025-10-26T00:03:09+00:00"
-        return pd.to_datetime(s, utc=True)
-    except:
-        return None
+def to_num(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce")
+
+def to_int(s: pd.Series) -> pd.Series:
+    return np.trunc(pd.to_numeric(s, errors="coerce").astype("float64")).astype("Int64")
+
+def to_ts(s: pd.Series) -> pd.Series:
+    # Handles ISO dates like "2025-10-26T00:03:09+00:00"; one parse per column
+    parsed = pd.to_datetime(s, utc=True, errors="coerce", format="ISO8601")
+    return parsed.dt.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+def to_text(s: pd.Series) -> pd.Series:
+    text = s.astype("string")
+    return text.mask(text == "")
+
+def json_lines(df: pd.DataFrame) -> list:
+    """One JSON document per row (NaN -> null)"""
+    # Records are split on newline only: escaped inside strings, whereas splitlines() would also
+    # break on NEL / LINE SEPARATOR / PARAGRAPH SEPARATOR, which force_ascii=False leaves raw.
+    # Some pandas versions end the output with a newline, so slice to one entry per row.
+    return df.to_json(orient="records", lines=True, force_ascii=False).split("\n")[:len(df)]
+
+def convert_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """CSV chunk -> creators columns (NA -> NULL), last row wins per id"""
+    out = pd.DataFrame({
+        "id": to_int(column(df, "id")),
+        "username": to_text(column(df, "username")),
+        "name": to_text(column(df, "name")),
+        "location": to_text(column(df, "location")),
+        "is_verified": to_bool(column(df, "isVerified")),
+        "is_performer": to_bool(column(df, "isPerformer")),
+        "subscribe_price": to_num(column(df, "subscribePrice")),
+        "avatar": to_text(column(df, "avatar")),
+        "about": to_text(column(df, "about")),
+        "last_seen": to_ts(column(df, "lastSeen")),
+        "join_date": to_ts(column(df, "joinDate")),
+        "favorited_count": to_int(column(df, "favoritedCount")),
+        "posts_count": to_int(column(df, "postsCount")),
+        "medias_count": to_int(column(df, "mediasCount")),
+        # Whole CSV row as JSON in one C-level pass (NaN -> null)
+        "raw_json": json_lines(df)
+    }, columns=COLUMNS)
+    out = out[out["id"].notna()]
+    # ON CONFLICT cannot touch the same id twice in one statement
+    return out.drop_duplicates("id", keep="last")
+
+# -----------------------------
+# COPY + merge
+# -----------------------------
+def copy_chunk(cur, df: pd.DataFrame) -> None:
+    buf = io.StringIO()
+    # Unquoted empty fields are NULL in COPY csv format
+    df.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+    if hasattr(cur, "copy_expert"):  # psycopg2
+        cur.copy_expert(COPY_SQL, buf)
+    else:  # psycopg 3
+        with cur.copy(COPY_SQL) as copy:
+            copy.write(buf.getvalue())
 
 def main():
-    with engine.begin() as conn:
-        conn.exec_driver_sql(DDL)
-
-    df = pd.read_csv(CSV_PATH, encoding="utf-8")
-    # Normalize column names we care about (present or not)
-    # Use .get to avoid KeyErrors
-    rows = []
-    for _, r in df.iterrows():
-        raw = r.to_dict()
-        rows.append({
-            "id": to_int(raw.get("id")),
-            "username": (raw.get("username") or None),
-            "name": (raw.get("name") or None),
-            "location": (raw.get("location") or None),
-            "is_verified": to_bool(raw.get("isVerified")),
-            "is_performer": to_bool(raw.get("isPerformer")),
-            "subscribe_price": to_num(raw.get("subscribePrice")),
-            "avatar": (raw.get("avatar") or None),
-            "about": (raw.get("about") or None),
-            "last_seen": to_ts(raw.get("lastSeen")),
-            "join_date": to_ts(raw.get("joinDate")),
-            "favorited_count": to_int(raw.get("favoritedCount")),
-            "posts_count": to_int(raw.get("postsCount")),
-            "medias_count": to_int(raw.get("mediasCount")),
-            "raw_json": json.dumps(raw, ensure_ascii=False)
-        })
-
-    # Batch insert (safe upserts)
-    batch = 1000
+    ap = argparse.ArgumentParser(description="CSV -> Postgres creators table (COPY into a staging table, then merge)")
+    ap.add_argument("--csv", default="temp.csv", help="Path to CSV file (default: temp.csv)")
+    ap.add_argument("--chunk-size", type=int, default=50000, help="Rows per COPY + merge transaction")
+    args = ap.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        sys.exit("DATABASE_URL missing in .env")
+
+    engine = create_engine(database_url, pool_pre_ping=True)
+    conn = engine.raw_connection()
     total = 0
-    with engine.begin() as conn:
-        for i in range(0, len(rows), batch):
-            conn.execute(UPSERT_SQL, rows[i:i+batch])
-            total += len(rows[i:i+batch])
-            print(f"Upserted {total}/{len(rows)}")
+    skipped = 0
+    try:
+        cur = conn.cursor()
+        cur.execute(DDL)
+        cur.execute(STAGE_DDL)
+        conn.commit()
+
+        for chunk in pd.read_csv(args.csv, encoding="utf-8", chunksize=max(1, args.chunk_size)):
+            rows = convert_chunk(chunk)
+            skipped += len(chunk) - len(rows)
+            copy_chunk(cur, rows)
+            cur.execute(MERGE_SQL)
+            conn.commit()
+            total += len(rows)
+            print(f"Upserted {total:,} rows", end="\r", flush=True)
+    except Exception:
+        conn.rollback()
+        print(f"\nFailed after {total:,} rows (each chunk is committed on its own)")
+        raise
+    finally:
+        conn.close()
 
-    print("Done.")
+    print(f"\nDone. Upserted {total:,} rows from {args.csv}"
+          + (f" ({skipped:,} without id or duplicated within a chunk)" if skipped else ""))
 
 if __name__ == "__main__":
     main()
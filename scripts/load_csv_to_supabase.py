@@ -5,12 +5,15 @@ Robust CSV -> Supabase REST uploader (Windows/PowerShell friendly).
 Features:
 - Cleans NaN / ±inf -> null (JSON-safe)
 - Lowercases column names
-- Batching + retries
+- Batching + retries; --concurrency batches in flight over one pooled HTTP session (default 1: rows land in CSV order)
+- Batches sized by serialised bytes (--batch-bytes), adapted to server latency and 413/5xx (AIMD)
 - Optional upsert with --on-conflict <col>
 - --limit, --offset, --exclude-columns
+- Streams the CSV in --chunk-size row chunks (constant memory); offset rows are skipped by the parser
 - Timestamp normalizer (+0000 -> +00:00), safer bools
 - Float->int fix: numbers like 563461.0 are sent as 563461 (int)
 - Better error dumps (writes failed payload to failed_batch.json)
+- Checkpoint of the contiguous uploaded offset; --resume (with --upsert) continues where a load stopped
 
 Usage examples:
   # smoke test 1 row
@@ -19,6 +22,11 @@ Usage examples:
   # isolate a bad row (5 rows, one-by-one HTTP calls)
   python load_csv_to_supabase.py --csv onlyfans_profiles.csv --table onlyfans_profiles --limit 5 --batch-size 1 --upsert --on-conflict id
 
+  # multi-million-row load, 4 batches in flight, resumable
+  # (batches may land out of order: only use --concurrency > 1 if the CSV has no duplicate keys)
+  python load_csv_to_supabase.py --csv onlyfans_profiles.csv --table onlyfans_profiles --upsert --on-conflict id --concurrency 4
+  python load_csv_to_supabase.py --csv onlyfans_profiles.csv --table onlyfans_profiles --upsert --on-conflict id --concurrency 4 --resume
+
   # skip problematic columns for first big load
   python load_csv_to_supabase.py --csv onlyfans_profiles.csv --table onlyfans_profiles ^
     --exclude-columns raw_json,timestamp,firstpublishedpostdate,joindate,lastseen ^
@@ -34,11 +42,17 @@ import json
 import math
 import time
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
 from typing import List, Dict, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import numpy as np
-import re
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import AdaptiveByteBudget
 
 # ---------------------------------
 # Column type hints (best-effort)
@@ -78,60 +92,57 @@ TIMESTAMP_GUESS_COLUMNS = {
 }
 
 # -----------------------------
-# Normalizers
+# Normalizers (vectorised)
 # -----------------------------
+BOOL_LOOKUP = {
+    "true": True, "false": False,
+    "t": True, "f": False,
+    "1": True, "0": False,
+    "yes": True, "no": False
+}
+TIMESTAMP_NULLS = ["", "none", "nan", "null", "false", "true"]
+
 def normalize_bool_series(s: pd.Series) -> pd.Series:
-    """Normalize truthy/falsey strings and numbers to real booleans (or None)."""
+    """
+    Normalize truthy/falsey strings and numbers to real booleans (or None).
+    Strings are mapped once per distinct value through a categorical, not per cell.
+    """
     if s.dtype == bool:
         return s
-    mapping = {
-        "true": True, "false": False,
-        "t": True, "f": False,
-        "1": True, "0": False,
-        "yes": True, "no": False
-    }
-    def _coerce(x):
-        if x is None:
-            return None
-        if isinstance(x, (bool, np.bool_)):
-            return bool(x)
-        if isinstance(x, (int, np.integer)):
-            return bool(int(x))
-        if isinstance(x, (float, np.floating)):
-            if np.isnan(x):
-                return None
-            return bool(int(x))
-        xs = str(x).strip().lower()
-        if xs in mapping:
-            return mapping[xs]
-        if xs in ("", "none", "nan", "null"):
-            return None
-        return None
-    return s.map(_coerce)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        out = (np.trunc(values) != 0).astype(object)
+        out[np.isnan(values)] = None
+        return pd.Series(out, index=s.index, dtype=object)
+
+    cat = s.astype("category")
+    mapped = np.array([BOOL_LOOKUP.get(str(c).strip().lower()) for c in cat.cat.categories] + [None], dtype=object)
+    # Missing values have code -1, which picks the trailing None
+    return pd.Series(mapped[cat.cat.codes.to_numpy()], index=s.index, dtype=object)
 
 def normalize_timestamp_series(s: pd.Series) -> pd.Series:
     """
     Handles:
       - '...+0000' -> '...+00:00'
       - unparsable -> None
+    One regex pass through the str accessor, one to_datetime, C-level ISO formatting.
     """
-    def fix_raw(v: Any) -> Optional[str]:
-        if v is None:
-            return None
-        vs = str(v).strip()
-        if vs == "" or vs.lower() in {"none","nan","null","false","true"}:
-            return None
-        # +0000 -> +00:00
-        vs = re.sub(r"(\+|\-)(\d{2})(\d{2})$", r"\1\2:\3", vs)
-        return vs
-
-    s_fixed = s.map(fix_raw)
-    parsed = pd.to_datetime(s_fixed, errors="coerce", utc=True)
-    def to_iso(ts):
-        if pd.isna(ts):
-            return None
-        return ts.isoformat().replace("+00:00","+00:00")
-    return parsed.map(to_iso)
+    st = s.astype("string").str.strip()
+    st = st.mask(st.str.lower().isin(TIMESTAMP_NULLS))
+    # +0000 -> +00:00
+    st = st.str.replace(r"([+-])(\d{2})(\d{2})$", r"\1\2:\3", regex=True)
+    parsed = pd.to_datetime(st, errors="coerce", utc=True)
+
+    values = parsed.dt.tz_localize(None).to_numpy().astype("datetime64[us]")
+    missing = np.isnat(values)
+    seconds = values.astype("datetime64[s]")
+    micros = (values - seconds).astype(np.int64)
+    base = np.datetime_as_string(seconds, unit="s").astype(object)
+    # isoformat() only prints microseconds when they are non-zero
+    frac = np.where(micros > 0, np.char.add(".", np.char.zfill(micros.astype(str), 6)), "")
+    out = (base + frac.astype(object) + "+00:00").astype(object)
+    out[missing] = None
+    return pd.Series(out, index=s.index, dtype=object)
 
 def coerce_types(df: pd.DataFrame) -> pd.DataFrame:
     for col in df.columns:
@@ -193,14 +204,56 @@ def scrub_scalar(v: Any) -> Any:
 def scrub_row(row: Dict[str, Any]) -> Dict[str, Any]:
     return {k: scrub_scalar(v) for k, v in row.items()}
 
+def scrub_column(s: pd.Series) -> np.ndarray:
+    """
+    Column-wise scrub_scalar: plain Python scalars in an object array,
+    NaN/±inf/NA -> None, integral floats -> int.
+    """
+    if pd.api.types.is_bool_dtype(s.dtype) and not s.hasnans:
+        return s.to_numpy(dtype=bool).astype(object)
+    if pd.api.types.is_integer_dtype(s.dtype) and not s.hasnans:
+        return s.to_numpy(dtype=np.int64).astype(object)
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        finite = np.isfinite(values)
+        integral = finite & (np.trunc(values) == values)
+        out = values.astype(object)
+        out[integral] = values[integral].astype(np.int64).astype(object)
+        out[~finite] = None
+        return out
+    out = s.to_numpy(dtype=object, na_value=None)
+    # Object columns may still hold float NaN (e.g. from the string reader)
+    missing = pd.isna(out)
+    if missing.any():
+        out[missing] = None
+    return out
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """The single final scrub: JSON-safe row dicts built from scrubbed columns"""
+    columns = list(df.columns)
+    arrays = [scrub_column(df[c]) for c in columns]
+    return [dict(zip(columns, row)) for row in zip(*arrays)]
+
 # -----------------------------
 # HTTP
 # -----------------------------
+def make_session(pool_size: int) -> requests.Session:
+    """One keep-alive session shared by all upload threads (requests.Session is fine across threads for POSTs)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 def post_batch(url: str, key: str, table: str, batch: List[Dict[str, Any]],
                upsert: bool, on_conflict: Optional[str],
-               max_retries: int = 5, schema: Optional[str] = None) -> None:
+               max_retries: int = 5, schema: Optional[str] = None,
+               session: Optional[requests.Session] = None,
+               payload: Optional[str] = None,
+               budget: Optional[AdaptiveByteBudget] = None) -> None:
     base = f"{url}/rest/v1"
     endpoint = f"{base}/{schema}:{table}" if schema else f"{base}/{table}"
+    http = session or requests
 
     headers = {
         "apikey": key,
@@ -214,15 +267,35 @@ def post_batch(url: str, key: str, table: str, batch: List[Dict[str, Any]],
         if on_conflict:
             params["on_conflict"] = on_conflict
 
-    safe_batch = [scrub_row(r) for r in batch]
-    payload = json.dumps(safe_batch, allow_nan=False)
+    # Rows come from frame_records() and are already JSON-safe
+    safe_batch = batch
+    if payload is None:
+        payload = json.dumps(safe_batch, allow_nan=False)
 
-    last_text = ""
     for attempt in range(1, max_retries + 1):
-        resp = requests.post(endpoint, headers=headers, params=params, data=payload, timeout=90)
+        started = time.monotonic()
+        try:
+            resp = http.post(endpoint, headers=headers, params=params, data=payload, timeout=90)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if budget:
+                budget.record(len(payload), time.monotonic() - started, 0)
+            # Network errors are retried like 5xx; the backoff only blocks this batch's thread
+            if attempt == max_retries:
+                raise
+            sys.stderr.write(f"\nWARN {type(e).__name__} uploading batch (attempt {attempt}), retrying\n")
+            time.sleep(min(2 ** attempt, 30))
+            continue
+        if budget:
+            budget.record(len(payload), time.monotonic() - started, resp.status_code)
         if 200 <= resp.status_code < 300:
             return
-        last_text = resp.text
+        if resp.status_code == 413 and len(batch) > 1:
+            # Payload too large: send each half on its own (recursively)
+            half = len(batch) // 2
+            for part in (batch[:half], batch[half:]):
+                post_batch(url, key, table, part, upsert, on_conflict,
+                           max_retries=max_retries, schema=schema, session=session, budget=budget)
+            return
         retriable = resp.status_code in (408, 409, 429, 500, 502, 503, 504)
         if not retriable or attempt == max_retries:
             sys.stderr.write(f"\nERROR [{resp.status_code}] uploading batch: {resp.text}\n")
@@ -235,6 +308,85 @@ def post_batch(url: str, key: str, table: str, batch: List[Dict[str, Any]],
             resp.raise_for_status()
         time.sleep(min(2 ** attempt, 30))
 
+# -----------------------------
+# Checkpoint
+# -----------------------------
+class Checkpoint:
+    """
+    Tracks finished batches by absolute CSV row offset and persists only the
+    contiguous prefix, so batches finishing out of order never cause a resume
+    to skip rows that were still in flight.
+    """
+    def __init__(self, path: str, csv_path: str, table: str, start: int, end: Optional[int]):
+        self.path = path
+        self.csv_path = csv_path
+        self.table = table
+        self.completed = start
+        self.end = end
+        self._done: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(path: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def mark_done(self, start: int, end: int) -> None:
+        with self._lock:
+            self._done[start] = end
+            advanced = False
+            while self.completed in self._done:
+                self.completed = self._done.pop(self.completed)
+                advanced = True
+            if advanced:
+                self._save()
+
+    def _save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"csv": os.path.abspath(self.csv_path), "table": self.table,
+                       "completed": self.completed, "end": self.end}, f)
+        os.replace(tmp, self.path)
+
+# -----------------------------
+# Streaming reader
+# -----------------------------
+def iter_chunks(path: str, chunk_size: int, offset: int = 0, limit: Optional[int] = None,
+                exclude: Optional[List[str]] = None):
+    """
+    Yield coerced DataFrames of up to chunk_size rows (lowercased column names).
+    The header is read once, offset rows are skipped by the C parser with an int
+    skiprows and excluded columns are never parsed, so memory stays at one chunk
+    regardless of file size or offset.
+    """
+    exclude = set(exclude or [])
+    header = pd.read_csv(path, encoding="utf-8", dtype=str, nrows=0).columns
+    dropped = [c for c in header if c.strip().lower() in exclude]
+    if dropped:
+        print(f"⚠️ Excluding columns: {[c.strip().lower() for c in dropped]}")
+
+    reader = pd.read_csv(
+        path,
+        encoding="utf-8",
+        dtype=str,
+        keep_default_na=False,
+        na_values=["", "NaN", "nan", "NULL", "null"],
+        # Header already read: an int skip (header + offset rows) instead of a set of row numbers
+        header=None,
+        names=list(header),
+        usecols=[c for c in header if c not in dropped],
+        skiprows=offset + 1,
+        nrows=limit,
+        chunksize=max(1, chunk_size)
+    )
+    for df in reader:
+        df.columns = [c.strip().lower() for c in df.columns]
+
+        # Type coercions (best-effort); NA/±inf -> None happens once, in frame_records
+        yield coerce_types(df)
+
 # -----------------------------
 # Main
 # -----------------------------
@@ -243,13 +395,26 @@ def main():
     ap.add_argument("--csv", required=True, help="Path to CSV file")
     ap.add_argument("--table", required=True, help="Target table name (without schema)")
     ap.add_argument("--schema", default=None, help="Optional schema (e.g., public). If set, uses /rest/v1/<schema>:<table>")
-    ap.add_argument("--batch-size", type=int, default=500, help="Rows per HTTP batch")
+    ap.add_argument("--batch-size", type=int, default=5000, help="Max rows per HTTP batch")
+    ap.add_argument("--batch-bytes", type=int, default=1_000_000,
+                    help="Starting payload budget per batch in bytes, adapted from latency/413/5xx (0 = fixed --batch-size rows)")
+    ap.add_argument("--target-latency", type=float, default=2.0, help="Seconds per request the byte budget aims for")
+    ap.add_argument("--chunk-size", type=int, default=50000, help="Rows parsed and coerced at a time (memory bound)")
     ap.add_argument("--upsert", action="store_true", help="Use resolution=merge-duplicates upsert")
     ap.add_argument("--on-conflict", default=None, help="Column used for upsert conflict (e.g., id)")
     ap.add_argument("--limit", type=int, default=None, help="Only send the first N rows (after offset)")
     ap.add_argument("--offset", type=int, default=0, help="Skip the first K rows before sending")
     ap.add_argument("--exclude-columns", default="", help="Comma-separated list of columns to drop before upload")
+    ap.add_argument("--concurrency", type=int, default=1,
+                    help="Batches in flight at once (default 1). Above 1, batches can finish out of order, so with "
+                         "duplicate keys in the CSV an earlier row may overwrite a later one")
+    ap.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <csv>.checkpoint.json)")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continue from the checkpoint's contiguous uploaded offset (requires --upsert)")
     args = ap.parse_args()
+    if args.resume and not args.upsert:
+        # Batches past the checkpoint may already be in the table; plain inserts would fail with 409
+        ap.error("--resume re-sends rows after the checkpoint, some of which may already be uploaded; use it with --upsert")
 
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_SERVICE_ROLE")
@@ -258,66 +423,91 @@ def main():
 
     print("✅ Connected to Supabase.")
 
-    # Load CSV as text initially
-    df = pd.read_csv(
-        args.csv,
-        encoding="utf-8",
-        dtype=str,
-        keep_default_na=False,
-        na_values=["", "NaN", "nan", "NULL", "null"]
-    )
-    df.columns = [c.strip().lower() for c in df.columns]
-
-    # Apply offset/limit early
-    if args.offset:
-        df = df.iloc[args.offset:]
-    if args.limit:
-        df = df.iloc[:args.limit]
+    # Absolute row range [start, end) of the CSV; --resume replaces --offset/--limit
+    checkpoint_path = args.checkpoint or f"{args.csv}.checkpoint.json"
+    start = args.offset
+    end = args.offset + args.limit if args.limit else None
+    if args.resume:
+        saved = Checkpoint.load(checkpoint_path)
+        if not saved:
+            raise RuntimeError(f"No checkpoint at {checkpoint_path}")
+        if saved.get("table") != args.table:
+            raise RuntimeError(f"Checkpoint is for table {saved.get('table')}, not {args.table}")
+        start, end = saved["completed"], saved.get("end")
+        print(f"↩️ Resuming at row {start:,}" + (f" (until {end:,})" if end else ""))
+    checkpoint = Checkpoint(checkpoint_path, args.csv, args.table, start, end)
 
-    # Drop excluded columns (exact lowercased names)
     to_drop = [c.strip().lower() for c in args.exclude_columns.split(",") if c.strip()]
-    if to_drop:
-        keep = [c for c in df.columns if c not in to_drop]
-        dropped = [c for c in df.columns if c in to_drop]
-        if dropped:
-            print(f"⚠️ Excluding columns: {dropped}")
-        df = df[keep]
-
-    # Type coercions (best-effort)
-    df = coerce_types(df)
+    chunks = iter_chunks(args.csv, args.chunk_size, offset=start,
+                         limit=(end - start) if end is not None else None, exclude=to_drop)
 
-    # Replace ±inf, then convert all NA to None (JSON null)
-    # (FutureWarning from pandas is safe to ignore)
-    df = df.replace([np.inf, -np.inf], pd.NA)
-    df = df.where(pd.notnull(df), None)
-
-    total_rows = len(df)
-    print(f"✅ Prepared {total_rows:,} rows from {args.csv}")
-    print(f"✅ Columns being sent ({len(df.columns)}): {list(df.columns)}")
-
-    records = df.to_dict(orient="records")
-
-    # Batching
     batch_size = max(1, args.batch_size)
+    concurrency = max(1, args.concurrency)
+    session = make_session(concurrency)
+    budget = AdaptiveByteBudget(initial=args.batch_bytes, target_latency=args.target_latency) if args.batch_bytes else None
+    dumps = lambda r: json.dumps(r, allow_nan=False)
     uploaded = 0
-    for i in range(0, total_rows, batch_size):
-        batch = records[i:i+batch_size]
-        batch = [scrub_row(r) for r in batch]
-        try:
-            post_batch(
-                url, key, args.table, batch,
-                upsert=args.upsert, on_conflict=args.on_conflict,
-                schema=args.schema
-            )
-        except Exception as e:
-            print(f"\n❌ Failed batch {i}-{i+len(batch)-1}: {e}")
-            for idx, r in enumerate(batch[:3]):
-                print(f"Example row {idx}:", r)
-            sys.exit(1)
-        uploaded += len(batch)
-        print(f"✅ Uploaded {uploaded:,}/{total_rows:,} rows", end="\r", flush=True)
+    failed = None
+    position = start
+    inflight = {}
+
+    def upload(batch: List[Dict[str, Any]], batch_start: int, payload: Optional[str]) -> int:
+        post_batch(
+            url, key, args.table, batch,
+            upsert=args.upsert, on_conflict=args.on_conflict,
+            schema=args.schema, session=session,
+            payload=payload, budget=budget
+        )
+        checkpoint.mark_done(batch_start, batch_start + len(batch))
+        return len(batch)
+
+    def collect(return_when) -> None:
+        nonlocal uploaded, failed
+        done, _ = wait(inflight, return_when=return_when)
+        for future in done:
+            batch_start, batch = inflight.pop(future)
+            try:
+                uploaded += future.result()
+            except Exception as e:
+                if failed is None:
+                    failed = (batch_start, batch, e)
+        sizing = f", {budget.budget // 1000:,} KB batches" if budget else ""
+        print(f"✅ Uploaded {uploaded:,} rows ({concurrency} in flight{sizing})", end="\r", flush=True)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for n, df in enumerate(chunks):
+            if n == 0:
+                print(f"✅ Columns being sent ({len(df.columns)}): {list(df.columns)}")
+            records = frame_records(df)
+            if budget:
+                batches = budget.pack(records, max_rows=batch_size, dumps=dumps)
+            else:
+                batches = ((records[i:i+batch_size], None) for i in range(0, len(records), batch_size))
+            for batch, payload in batches:
+                # Keep at most `concurrency` batches in flight; stop feeding after a failure
+                while len(inflight) >= concurrency:
+                    collect(FIRST_COMPLETED)
+                if failed:
+                    break
+                inflight[pool.submit(upload, batch, position, payload)] = (position, batch)
+                position += len(batch)
+            if failed:
+                break
+        if inflight:
+            collect(ALL_COMPLETED)
+
+    if failed:
+        batch_start, batch, e = failed
+        print(f"\n❌ Failed batch {batch_start}-{batch_start+len(batch)-1}: {e}")
+        print(f"   Checkpoint at row {checkpoint.completed:,}; re-run with --resume")
+        for idx, r in enumerate(batch[:3]):
+            print(f"Example row {idx}:", r)
+        sys.exit(1)
 
     print(f"\n🎉 Done. Uploaded {uploaded:,} rows to {args.table}.")
+    if budget:
+        print(f"   Final batch budget {budget.budget // 1000:,} KB "
+              f"({budget.stats['increases']} increases, {budget.stats['decreases']} decreases)")
 
 if __name__ == "__main__":
     main()
@@ -8,6 +8,11 @@ Supported inputs:
   - https://onlyfans.com/api2/v2/users/list?r[]=<id>...
   - https://fansmetrics.com/en/onlyfans/<username>  (auto-normalized)
   - <username>  (plain handle; auto-normalized to https://onlyfans.com/<username>)
+Usernames already in the local username index (v2_username_index.py) are resolved
+to https://onlyfans.com/<id>, so renamed creators still load and duplicates collapse.
+Targets are then checked against known profiles (local mirror, else Supabase) in
+batched lookups: new creators are fetched first, stale ones (not refreshed within
+--fresh-days) after them oldest first, and recently refreshed ones are skipped.
 
 Run (single-IP friendly):
   python mega_onlyfans_from_urls.py --input onlyfans_urls.txt --concurrent 1 --wait 20 --jitter 4 --cookies cookies.json
@@ -18,6 +23,10 @@ from typing import List, Tuple, Any, Dict
 from urllib.parse import urlparse, unquote
 from playwright.async_api import async_playwright
 
+from v2_username_index import UsernameIndex, DEFAULT_INDEX_PATH
+from v2_local_mirror import ProfileMirror, open_synced_mirror, DEFAULT_MIRROR_PATH
+from v2_shared_utils import SupabaseClient
+
 ONLYFANS_DOMAIN = "onlyfans.com"
 
 # --------- helpers ----------
@@ -217,6 +226,134 @@ def canonicalize(u: str) -> Tuple[str, bool]:
     except Exception:
         return ("", False)
 
+def onlyfans_username(u: str) -> str:
+    """Username from https://onlyfans.com/<username> ("" for ids / API URLs)"""
+    try:
+        segs = [x for x in urlparse(u).path.split("/") if x]
+        if len(segs) == 1 and USERNAME_RE.match(segs[0]) and not segs[0].isdigit():
+            return segs[0]
+    except Exception:
+        pass
+    return ""
+
+def resolve_known_ids(urls: List[str], index) -> Tuple[List[str], int, int]:
+    """Rewrite known usernames to id URLs (one batched index lookup) and drop duplicates."""
+    names = [onlyfans_username(u) for u in urls]
+    known = index.lookup_ids(n for n in names if n) if index else {}
+    out, seen, resolved, dupes = [], set(), 0, 0
+    for u, name in zip(urls, names):
+        creator_id = known.get(name.lower()) if name else None
+        if creator_id is not None:
+            u = f"https://{ONLYFANS_DOMAIN}/{creator_id}"
+            resolved += 1
+        key = u.rstrip("/").lower()
+        if key in seen:
+            dupes += 1
+            continue
+        seen.add(key)
+        out.append(u)
+    return out, resolved, dupes
+
+# --------- pre-pass: skip creators refreshed recently ----------
+def onlyfans_id(u: str) -> str:
+    """Creator id from https://onlyfans.com/<id> ("" otherwise)"""
+    try:
+        segs = [x for x in urlparse(u).path.split("/") if x]
+        if len(segs) == 1 and segs[0].isdigit():
+            return segs[0]
+    except Exception:
+        pass
+    return ""
+
+async def lookup_known_db(db, ids: List[str], names: List[str], chunk: int = 200):
+    """Batched id=in.(...) / username=in.(...) reads; None if any batch fails"""
+    rows = []
+    select = "id,username,status,last_refreshed_at"
+    for i in range(0, len(ids), chunk):
+        part = ids[i:i + chunk]
+        page = await db.fetch_page("onlyfans_profiles", select, limit=len(part),
+                                   filters={"id": f"in.({','.join(part)})"})
+        if page is None: return None
+        rows.extend(page)
+    for i in range(0, len(names), chunk):
+        part = names[i:i + chunk]
+        # PostgREST in.() is exact-match; the inputs' own spelling is what usually matches
+        page = await db.fetch_page("onlyfans_profiles", select, limit=len(part),
+                                   filters={"username": "in.(" + ",".join(f'"{n}"' for n in part) + ")"})
+        if page is None: return None
+        rows.extend(page)
+    return rows
+
+def parse_ts(value) -> Any:
+    if not value: return None
+    try:
+        dt = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=datetime.UTC)
+
+def plan_targets(urls: List[str], known_rows: List[Dict[str, Any]], scraped_keys: set,
+                 fresh_days: float) -> Tuple[List[str], Dict[str, int]]:
+    """New creators first (input order), then stale ones oldest-refresh first; fresh and already-scraped dropped."""
+    by_id = {str(r["id"]): r for r in known_rows}
+    by_name = {str(r["username"]).lower(): r for r in known_rows if r.get("username")}
+    cutoff = datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=fresh_days)
+    never = datetime.datetime.min.replace(tzinfo=datetime.UTC)
+    new, stale, stats = [], [], {"new": 0, "stale": 0, "fresh": 0, "scraped": 0}
+    for u in urls:
+        cid, name = onlyfans_id(u), onlyfans_username(u)
+        if (cid and cid in scraped_keys) or (name and name in scraped_keys):
+            stats["scraped"] += 1
+            continue
+        row = by_id.get(cid) if cid else by_name.get(name.lower()) if name else None
+        if row is None:
+            new.append(u); stats["new"] += 1
+            continue
+        if str(row["id"]) in scraped_keys:
+            stats["scraped"] += 1
+            continue
+        refreshed = parse_ts(row.get("last_refreshed_at"))
+        if refreshed and refreshed >= cutoff:
+            stats["fresh"] += 1
+            continue
+        stale.append((refreshed or never, u)); stats["stale"] += 1
+    stale.sort(key=lambda t: t[0])
+    return new + [u for _, u in stale], stats
+
+async def load_known_profiles(args, urls: List[str]):
+    """Known rows for the targets from the local mirror or the DB (None when the pre-pass is off)"""
+    ids = sorted({i for i in map(onlyfans_id, urls) if i})
+    names = sorted({n for n in map(onlyfans_username, urls) if n})
+    supabase_url, supabase_key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")
+    source = args.known_source
+    if source == "auto":
+        source = ("mirror" if os.path.exists(args.mirror) else
+                  "db" if supabase_url and supabase_key else "off")
+    if source == "off":
+        return None, source
+    if source == "db":
+        if not (supabase_url and supabase_key):
+            print("⚠️ SUPABASE_URL / SUPABASE_KEY not set; skipping the known-profile pre-pass")
+            return None, "off"
+        rows = await lookup_known_db(SupabaseClient(supabase_url, supabase_key), ids, names)
+        if rows is None:
+            print("⚠️ Known-profile lookup failed; every target will be fetched")
+            return None, "off"
+        return rows, source
+    mirror = None
+    if supabase_url and supabase_key:
+        try:
+            mirror = await open_synced_mirror(args.mirror, SupabaseClient(supabase_url, supabase_key))
+        except RuntimeError as e:
+            print(f"⚠️ Mirror sync failed ({e}); using it as-is")
+    if mirror is None:
+        mirror = ProfileMirror(args.mirror)
+        print(f"🪞 Mirror {args.mirror} last synced: {mirror.synced_at() or 'never'}")
+    try:
+        return mirror.lookup([int(i) for i in ids], names), source
+    finally:
+        mirror.close()
+
 def is_onlyfans_url(u: str) -> bool:
     try:
         return urlparse(u).netloc.lower().endswith(ONLYFANS_DOMAIN)
@@ -226,7 +363,7 @@ def is_onlyfans_url(u: str) -> bool:
 # --------- core scraping ----------
 async def fetch_url(context, url: str, fieldnames: List[str],
                     scraped_keys:set, total_saved: List[int],
-                    failed_urls: List[str], wait: float, retries: int):
+                    failed_urls: List[str], wait: float, retries: int, index=None):
     if not is_onlyfans_url(url):
         print(f"⛔ Skipping non-OnlyFans URL after normalization: {url}")
         return False
@@ -294,6 +431,9 @@ async def fetch_url(context, url: str, fieldnames: List[str],
                 return False
 
             row = normalize_row_full(candidate)
+            if index and row.get("id") and row.get("username"):
+                if index.observe(int(row["id"]), row["username"]):
+                    print(f"🔀 Renamed creator {row['id']} → {row['username']}")
             key = str(row.get("id") or row.get("username") or "")
             if key and key in scraped_keys:
                 return False
@@ -337,6 +477,12 @@ async def main():
     parser.add_argument("--cookies", default="cookies.json")
     parser.add_argument("--headless", default=True, type=bool)
     parser.add_argument("--reset", action="store_true", help="Ignore saved progress and start from the first URL")
+    parser.add_argument("--username-index", default=DEFAULT_INDEX_PATH, help="SQLite username<->id index (\"\" = off)")
+    parser.add_argument("--known-source", choices=["auto", "mirror", "db", "off"], default="auto",
+                        help="Where to look up known profiles before fetching (auto: mirror if present, else DB)")
+    parser.add_argument("--mirror", default=DEFAULT_MIRROR_PATH, help="Local profile mirror (v2_local_mirror.py)")
+    parser.add_argument("--fresh-days", type=float, default=7.0,
+                        help="Skip known creators refreshed within this many days (default: 7)")
     args = parser.parse_args()
 
     # load & normalize
@@ -351,6 +497,11 @@ async def main():
     print(f"Loaded {len(raw_lines)} lines → usable: {len(urls)} | normalized: {normalized} | skipped: {skipped}")
     if not urls: print("No usable OnlyFans targets after normalization."); return
 
+    # known usernames -> stable id URLs
+    index = UsernameIndex(args.username_index) if args.username_index else None
+    urls, resolved, dupes = resolve_known_ids(urls, index)
+    print(f"Username index → resolved to id: {resolved} | duplicates dropped: {dupes} | targets: {len(urls)}")
+
     # ensure temp header
     if not os.path.exists("temp.csv"):
         with open("temp.csv", "w", newline='', encoding="utf-8") as f:
@@ -367,14 +518,48 @@ async def main():
                     if key: scraped_keys.add(str(key)); total_saved[0] += 1
         except Exception: pass
 
-    start_index = 0
-    prog_file = "progress_urls.json"
+    prog_file, plan_file = "progress_urls.json", "progress_targets.json"
+    prog = {}
     if os.path.exists(prog_file) and not args.reset:
         try:
             with open(prog_file, "r", encoding="utf-8") as pf:
                 prog = json.load(pf)
-                start_index = int(prog.get("next_index", 0))
-                print("▶ Resuming from URL index:", start_index)
+        except Exception:
+            prog = {}
+
+    # the resume index applies to the saved target list (id-resolved + filtered), so an unfinished one is reused as-is
+    plan = None
+    if prog and os.path.exists(plan_file):
+        try:
+            with open(plan_file, "r", encoding="utf-8") as pf:
+                plan = json.load(pf)
+            if plan.get("input") != args.input or int(prog.get("next_index", 0)) >= len(plan["targets"]):
+                plan = None
+        except Exception:
+            plan = None
+    if plan:
+        urls = plan["targets"]
+        print(f"▶ Reusing saved targets from {plan_file}: {len(urls)}")
+    else:
+        known, source = await load_known_profiles(args, urls)
+        if known is not None:
+            urls, stats = plan_targets(urls, known, scraped_keys, args.fresh_days)
+            print(f"Known profiles ({source}) → new: {stats['new']} | stale: {stats['stale']} | "
+                  f"fresh skipped: {stats['fresh']} | already scraped: {stats['scraped']} | targets: {len(urls)}")
+        with open(plan_file, "w", encoding="utf-8") as pf:
+            json.dump({"input": args.input, "source": source, "fresh_days": args.fresh_days,
+                       "timestamp": time.time(), "targets": urls}, pf)
+        prog = {}  # new list, old index no longer lines up
+        if not urls:
+            print("Nothing new or stale to fetch.")
+            if index: index.close()
+            return
+
+    start_index = 0
+    if prog:
+        try:
+            start_index = int(prog.get("next_index", 0))
+            print("▶ Resuming from URL index:", start_index)
         except Exception:
             start_index = 0
     if args.reset or start_index >= len(urls):
@@ -406,7 +591,7 @@ async def main():
         async def worker(u):
             async with sem:
                 await asyncio.sleep(random.uniform(0, jitter))
-                return await fetch_url(context, u, CSV_FIELDS, scraped_keys, total_saved, failed_urls, wait, retries)
+                return await fetch_url(context, u, CSV_FIELDS, scraped_keys, total_saved, failed_urls, wait, retries, index)
 
         for idx in range(start_index, len(urls)):
             if _cancelled:
@@ -419,6 +604,7 @@ async def main():
 
         await context.close()
         await browser.close()
+    if index: index.close()
 
     # finalize CSV
     try:
@@ -438,7 +624,7 @@ async def main():
 
     print(f"✅ Done. Total performers saved: {total_saved[0]}")
     print(f"Output: {args.output}")
-    print("You can stop & resume any time; state is in progress_urls.json")
+    print("You can stop & resume any time; state is in progress_urls.json + progress_targets.json")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -207,6 +207,7 @@ WHERE worker_id IS NOT NULL;
 -- Materialized View: Daily Aggregated Metrics (Optional Performance Boost)
 -- ============================================================================
 -- Uncomment to create a pre-aggregated daily view for faster dashboard queries
+-- (Superseded by the incrementally rolled-up table in 007_daily_creator_metrics.sql)
 
 /*
 CREATE MATERIALIZED VIEW IF NOT EXISTS daily_creator_metrics AS
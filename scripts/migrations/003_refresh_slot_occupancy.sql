@@ -0,0 +1,31 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Refresh Slot Occupancy
+-- ============================================================================
+-- Purpose: Let the refresh scheduler read how many profiles are due per time
+--          slot (default 1 hour) without pulling every next_refresh_at value
+--          through PostgREST. Used by v2_refresh_scheduler.py (SlotScheduler
+--          and --rebalance).
+-- Safety: Read-only function, no table changes
+-- Date: 2026-10-18
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION refresh_slot_occupancy(
+    p_from TIMESTAMPTZ,
+    p_to TIMESTAMPTZ,
+    p_slot_seconds INTEGER DEFAULT 3600
+)
+RETURNS TABLE (slot_start TIMESTAMPTZ, profiles BIGINT) AS $$
+    SELECT
+        to_timestamp(floor(EXTRACT(EPOCH FROM next_refresh_at) / p_slot_seconds) * p_slot_seconds) AS slot_start,
+        COUNT(*) AS profiles
+    FROM onlyfans_profiles
+    WHERE next_refresh_at >= p_from
+      AND next_refresh_at < p_to
+    GROUP BY 1
+    ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- Served by idx_profiles_next_refresh (migration 001)
+
+-- Example: load curve for the next 7 days
+-- SELECT * FROM refresh_slot_occupancy(NOW(), NOW() + INTERVAL '7 days');
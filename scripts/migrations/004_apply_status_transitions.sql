@@ -0,0 +1,44 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Set-based Status Transitions
+-- ============================================================================
+-- Purpose: Apply a batch of status-only refresh results (deleted, restricted,
+--          non-performer profiles) in one statement instead of one upsert per
+--          profile, and report how many profiles moved between statuses.
+--          Used by v2_refresh_orchestrator.py (writer stage).
+-- Safety: Only touches status, last_refreshed_at and next_refresh_at of the
+--         ids passed in; ids that do not exist are ignored
+-- Date: 2026-10-18
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION apply_status_transitions(p_transitions JSONB)
+RETURNS TABLE (old_status TEXT, new_status TEXT, profiles BIGINT) AS $$
+    WITH input AS (
+        SELECT DISTINCT ON (t.id) t.id, t.status, t.next_refresh_at
+        FROM jsonb_to_recordset(p_transitions) AS t(id BIGINT, status TEXT, next_refresh_at TIMESTAMPTZ)
+        ORDER BY t.id
+    ),
+    updated AS (
+        -- The FROM subquery sees the pre-update row, so the old status is returned alongside the new one
+        UPDATE onlyfans_profiles p
+        SET status = tr.status,
+            last_refreshed_at = NOW(),
+            next_refresh_at = tr.next_refresh_at
+        FROM (
+            SELECT i.id, i.status, i.next_refresh_at, cur.status AS old_status
+            FROM input i
+            JOIN onlyfans_profiles cur ON cur.id = i.id
+        ) tr
+        WHERE p.id = tr.id
+        RETURNING tr.old_status, tr.status AS new_status
+    )
+    SELECT COALESCE(u.old_status, 'unknown'), u.new_status, COUNT(*)
+    FROM updated u
+    GROUP BY 1, 2
+    ORDER BY 3 DESC;
+$$ LANGUAGE sql VOLATILE;
+
+-- Example:
+-- SELECT * FROM apply_status_transitions('[
+--   {"id": 123456, "status": "deleted", "next_refresh_at": "2026-11-17T00:00:00Z"},
+--   {"id": 789012, "status": "non_performer", "next_refresh_at": "2026-11-17T00:00:00Z"}
+-- ]'::jsonb);
@@ -0,0 +1,16 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Mirror Sync Indexes
+-- ============================================================================
+-- Purpose: Serve the incremental keyset reads of v2_local_mirror.py, which
+--          page through onlyfans_profiles by (first_seen_at, id) and
+--          (last_refreshed_at, id) from a stored watermark. Without these the
+--          watermark filter is a sequential scan on every sync.
+-- Safety: Index-only, no data changes
+-- Date: 2026-10-18
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_profiles_first_seen_id
+ON onlyfans_profiles(first_seen_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_profiles_last_refreshed_id
+ON onlyfans_profiles(last_refreshed_at, id);
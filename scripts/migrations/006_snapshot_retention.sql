@@ -0,0 +1,86 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Snapshot Retention
+-- ============================================================================
+-- Purpose: Keep onlyfans_profile_snapshots bounded. Snapshots stay at full
+--          resolution for a recent window, are then thinned to the last
+--          snapshot per creator per day, and later per week. Driven by
+--          v2_snapshot_retention.py, which walks time windows from a stored
+--          watermark and deletes in limited batches.
+-- Safety: Only deletes snapshots that share a (creator, day/week) bucket with
+--         a newer snapshot; the latest snapshot of every bucket is kept
+-- Date: 2026-10-18
+-- ============================================================================
+
+-- 1. Watermarks for incremental maintenance jobs
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS maintenance_watermarks (
+    job TEXT PRIMARY KEY,
+    watermark TEXT,                 -- job-defined: timestamp, snapshot_id, ...
+    details JSONB DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 2. Downsample one time window
+-- ============================================================================
+-- p_bucket: 'day' or 'week'. The window should be aligned to bucket starts so
+-- no bucket is split across calls. Returns the number of snapshots deleted
+-- (or that would be deleted, with p_dry_run); call again while it equals p_limit.
+CREATE OR REPLACE FUNCTION downsample_snapshots(
+    p_from TIMESTAMPTZ,
+    p_to TIMESTAMPTZ,
+    p_bucket TEXT DEFAULT 'day',
+    p_limit INTEGER DEFAULT 5000,
+    p_dry_run BOOLEAN DEFAULT FALSE
+)
+RETURNS BIGINT AS $$
+DECLARE
+    v_count BIGINT;
+BEGIN
+    IF p_bucket NOT IN ('day', 'week') THEN
+        RAISE EXCEPTION 'p_bucket must be day or week, got %', p_bucket;
+    END IF;
+
+    IF p_dry_run THEN
+        SELECT COUNT(*) INTO v_count
+        FROM (
+            SELECT ROW_NUMBER() OVER (
+                       PARTITION BY creator_id, date_trunc(p_bucket, captured_at)
+                       ORDER BY captured_at DESC, snapshot_id DESC
+                   ) AS rn
+            FROM onlyfans_profile_snapshots
+            WHERE captured_at >= p_from AND captured_at < p_to
+        ) ranked
+        WHERE rn > 1;
+        RETURN v_count;
+    END IF;
+
+    WITH victims AS (
+        SELECT snapshot_id
+        FROM (
+            SELECT snapshot_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY creator_id, date_trunc(p_bucket, captured_at)
+                       ORDER BY captured_at DESC, snapshot_id DESC
+                   ) AS rn
+            FROM onlyfans_profile_snapshots
+            WHERE captured_at >= p_from AND captured_at < p_to
+        ) ranked
+        WHERE rn > 1
+        LIMIT p_limit
+    ),
+    deleted AS (
+        DELETE FROM onlyfans_profile_snapshots s
+        USING victims v
+        WHERE s.snapshot_id = v.snapshot_id
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO v_count FROM deleted;
+
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+-- Windows are selected via idx_snapshots_captured_at (migration 001)
+
+-- Example: thin one week of 2026 to daily resolution
+-- SELECT downsample_snapshots('2026-01-05', '2026-01-12', 'day', 5000);
@@ -0,0 +1,134 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Incremental Daily Creator Metrics
+-- ============================================================================
+-- Purpose: Replace the daily_creator_metrics materialized view sketched in
+--          migration 001 (full REFRESH over every snapshot) with a real table
+--          that is rolled up incrementally. Each call aggregates only the
+--          snapshots after the snapshot_id watermark and merges them into the
+--          per-creator, per-day rows. Driven by v2_daily_metrics_rollup.py.
+-- Safety: Additive. Requires maintenance_watermarks (migration 006). The
+--         watermark is advanced in the same transaction as the upsert, so a
+--         failed or repeated call never double-counts snapshots.
+-- Date: 2026-10-18
+-- ============================================================================
+
+-- 1. Rollup table (same columns as the 001 sketch)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS daily_creator_metrics (
+    creator_id BIGINT NOT NULL,
+    metric_date DATE NOT NULL,
+    max_favoritedcount BIGINT,
+    max_subscriberscount BIGINT,
+    max_postscount BIGINT,
+    max_subscribeprice NUMERIC(10,2),
+    snapshot_count INTEGER NOT NULL DEFAULT 0,
+    last_snapshot_id BIGINT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (creator_id, metric_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_daily_metrics_date
+ON daily_creator_metrics(metric_date DESC);
+
+INSERT INTO maintenance_watermarks (job, watermark)
+VALUES ('daily_creator_metrics', '0')
+ON CONFLICT (job) DO NOTHING;
+
+-- 2. Incremental rollup
+-- ============================================================================
+-- Processes up to p_limit snapshots after the watermark. The batch stops at
+-- the first snapshot captured within the last p_lag_seconds: the watermark is
+-- a snapshot_id, so skipping a recent row and taking later ones would move the
+-- watermark past it (and past rows from transactions still in flight) for good.
+-- Call repeatedly until snapshots < p_limit.
+CREATE OR REPLACE FUNCTION rollup_daily_creator_metrics(
+    p_limit INTEGER DEFAULT 50000,
+    p_lag_seconds INTEGER DEFAULT 300
+)
+RETURNS TABLE (snapshots BIGINT, creator_days BIGINT, watermark BIGINT) AS $$
+DECLARE
+    v_after BIGINT;
+    v_stop BIGINT;
+    v_last BIGINT;
+    v_snapshots BIGINT;
+    v_days BIGINT;
+BEGIN
+    -- Row lock serialises concurrent runs
+    SELECT w.watermark::BIGINT INTO v_after
+    FROM maintenance_watermarks w
+    WHERE w.job = 'daily_creator_metrics'
+    FOR UPDATE;
+    v_after := COALESCE(v_after, 0);
+
+    -- First snapshot_id inside the lag window (within the next p_limit ids); the batch ends before it
+    SELECT MIN(c.snapshot_id) INTO v_stop
+    FROM (
+        SELECT s.snapshot_id, s.captured_at
+        FROM onlyfans_profile_snapshots s
+        WHERE s.snapshot_id > v_after
+        ORDER BY s.snapshot_id
+        LIMIT p_limit
+    ) c
+    WHERE c.captured_at >= NOW() - make_interval(secs => p_lag_seconds);
+
+    WITH batch AS (
+        SELECT s.snapshot_id,
+               s.creator_id,
+               (s.captured_at AT TIME ZONE 'UTC')::DATE AS metric_date,
+               s.favoritedcount,
+               s.subscriberscount,
+               s.postscount,
+               s.subscribeprice
+        FROM onlyfans_profile_snapshots s
+        WHERE s.snapshot_id > v_after
+          AND (v_stop IS NULL OR s.snapshot_id < v_stop)
+        ORDER BY s.snapshot_id
+        LIMIT p_limit
+    ),
+    upserted AS (
+        INSERT INTO daily_creator_metrics AS d (
+            creator_id, metric_date, max_favoritedcount, max_subscriberscount,
+            max_postscount, max_subscribeprice, snapshot_count, last_snapshot_id, updated_at
+        )
+        SELECT creator_id,
+               metric_date,
+               MAX(favoritedcount),
+               MAX(subscriberscount),
+               MAX(postscount),
+               MAX(subscribeprice),
+               COUNT(*),
+               MAX(snapshot_id),
+               NOW()
+        FROM batch
+        GROUP BY creator_id, metric_date
+        ON CONFLICT (creator_id, metric_date) DO UPDATE SET
+            max_favoritedcount = GREATEST(d.max_favoritedcount, EXCLUDED.max_favoritedcount),
+            max_subscriberscount = GREATEST(d.max_subscriberscount, EXCLUDED.max_subscriberscount),
+            max_postscount = GREATEST(d.max_postscount, EXCLUDED.max_postscount),
+            max_subscribeprice = GREATEST(d.max_subscribeprice, EXCLUDED.max_subscribeprice),
+            snapshot_count = d.snapshot_count + EXCLUDED.snapshot_count,
+            last_snapshot_id = GREATEST(d.last_snapshot_id, EXCLUDED.last_snapshot_id),
+            updated_at = NOW()
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM batch),
+           (SELECT COUNT(*) FROM upserted),
+           (SELECT MAX(snapshot_id) FROM batch)
+    INTO v_snapshots, v_days, v_last;
+
+    IF v_last IS NOT NULL THEN
+        UPDATE maintenance_watermarks
+        SET watermark = v_last::TEXT,
+            details = jsonb_build_object('snapshots', v_snapshots, 'creator_days', v_days),
+            updated_at = NOW()
+        WHERE job = 'daily_creator_metrics';
+    END IF;
+
+    RETURN QUERY SELECT v_snapshots, v_days, COALESCE(v_last, v_after);
+END;
+$$ LANGUAGE plpgsql VOLATILE;
+
+-- Batches are read through the snapshot_id primary key
+
+-- Example: roll up everything new (repeat while snapshots = p_limit)
+-- SELECT * FROM rollup_daily_creator_metrics(50000);
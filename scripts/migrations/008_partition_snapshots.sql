@@ -0,0 +1,163 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Monthly Snapshot Partitions
+-- ============================================================================
+-- Purpose: Turn onlyfans_profile_snapshots into a table range-partitioned by
+--          month on captured_at. Inserts and time-window queries only touch
+--          small recent partitions. Old months can be detached or dropped
+--          instead of being deleted row by row. Partitions are created ahead
+--          of time and retired by v2_partition_manager.py.
+-- Safety: The existing table is kept and renamed to
+--         onlyfans_profile_snapshots_legacy. It is attached as the partition
+--         for everything before the cut-over month, so no rows are copied.
+--         snapshot_id keeps its sequence.
+--         The primary key becomes (snapshot_id, captured_at), because Postgres
+--         requires the partition key in every unique index.
+--         Run in a maintenance window: ATTACH scans the legacy table once.
+--         The DDL functions run as their owner (SECURITY DEFINER, fixed
+--         search_path), so apply this as the table owner. Only service_role
+--         may execute them; anon and authenticated API keys cannot.
+-- Date: 2026-10-18
+-- ============================================================================
+
+BEGIN;
+
+-- 1. Partitioned parent with the same columns
+-- ============================================================================
+ALTER TABLE onlyfans_profile_snapshots RENAME TO onlyfans_profile_snapshots_legacy;
+ALTER TABLE onlyfans_profile_snapshots_legacy DROP CONSTRAINT IF EXISTS onlyfans_profile_snapshots_pkey;
+ALTER INDEX IF EXISTS idx_snapshots_creator_time RENAME TO idx_snapshots_legacy_creator_time;
+ALTER INDEX IF EXISTS idx_snapshots_captured_at RENAME TO idx_snapshots_legacy_captured_at;
+ALTER INDEX IF EXISTS idx_snapshots_raw_json RENAME TO idx_snapshots_legacy_raw_json;
+
+CREATE TABLE onlyfans_profile_snapshots (
+    LIKE onlyfans_profile_snapshots_legacy INCLUDING DEFAULTS
+) PARTITION BY RANGE (captured_at);
+
+ALTER TABLE onlyfans_profile_snapshots ADD PRIMARY KEY (snapshot_id, captured_at);
+
+-- The sequence must outlive the legacy partition once it is retired
+ALTER SEQUENCE onlyfans_profile_snapshots_snapshot_id_seq OWNED BY onlyfans_profile_snapshots.snapshot_id;
+
+-- Parent indexes are created on every partition automatically
+CREATE INDEX idx_snapshots_creator_time ON onlyfans_profile_snapshots(creator_id, captured_at DESC);
+CREATE INDEX idx_snapshots_captured_at ON onlyfans_profile_snapshots(captured_at DESC);
+CREATE INDEX idx_snapshots_raw_json ON onlyfans_profile_snapshots USING GIN(raw_json);
+
+-- 2. Existing rows become the partition for everything before the cut-over month
+-- ============================================================================
+ALTER TABLE onlyfans_profile_snapshots_legacy ADD PRIMARY KEY (snapshot_id, captured_at);
+
+DO $$
+DECLARE
+    v_cutover TIMESTAMPTZ := date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + INTERVAL '1 month';
+BEGIN
+    EXECUTE format(
+        'ALTER TABLE onlyfans_profile_snapshots ATTACH PARTITION onlyfans_profile_snapshots_legacy '
+        'FOR VALUES FROM (MINVALUE) TO (%L)', v_cutover);
+END $$;
+
+-- Rows outside every monthly range (clock skew, back-dated imports) land here
+CREATE TABLE IF NOT EXISTS onlyfans_profile_snapshots_default
+PARTITION OF onlyfans_profile_snapshots DEFAULT;
+
+COMMIT;
+
+-- 3. Partition management
+-- ============================================================================
+
+-- Partitions with their bounds and size (used by --list and for retirement)
+CREATE OR REPLACE FUNCTION snapshot_partitions()
+RETURNS TABLE (
+    partition_name TEXT,
+    range_from TIMESTAMPTZ,
+    range_to TIMESTAMPTZ,
+    is_default BOOLEAN,
+    est_rows BIGINT,
+    total_bytes BIGINT
+) AS $$
+    SELECT
+        c.relname::TEXT,
+        (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'FROM \(''([^'']+)''\)'))[1]::TIMESTAMPTZ,
+        (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \(''([^'']+)''\)'))[1]::TIMESTAMPTZ,
+        pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT',
+        GREATEST(c.reltuples, 0)::BIGINT,
+        pg_total_relation_size(c.oid)
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'onlyfans_profile_snapshots'::regclass
+    ORDER BY 3 NULLS LAST;
+$$ LANGUAGE sql STABLE;
+
+-- Create monthly partitions from the end of the last range up to p_months_ahead
+-- months past the current one. Returns the names created.
+CREATE OR REPLACE FUNCTION ensure_snapshot_partitions(p_months_ahead INTEGER DEFAULT 3)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_start TIMESTAMPTZ;
+    v_until TIMESTAMPTZ := date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                           + make_interval(months => p_months_ahead + 1);
+    v_name TEXT;
+BEGIN
+    SELECT MAX(range_to) INTO v_start FROM snapshot_partitions() WHERE NOT is_default;
+    v_start := COALESCE(v_start, date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC');
+
+    WHILE v_start < v_until LOOP
+        v_name := 'onlyfans_profile_snapshots_' || to_char(v_start AT TIME ZONE 'UTC', '"y"YYYY"m"MM');
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF onlyfans_profile_snapshots FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_start, v_start + INTERVAL '1 month');
+        RETURN NEXT v_name;
+        v_start := v_start + INTERVAL '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql VOLATILE SECURITY DEFINER SET search_path = public;
+
+-- Detach (and optionally drop) every partition whose range ends on or before
+-- p_before. Never touches the default partition. Returns the names retired.
+CREATE OR REPLACE FUNCTION retire_snapshot_partitions(p_before TIMESTAMPTZ, p_drop BOOLEAN DEFAULT FALSE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    v_part RECORD;
+BEGIN
+    FOR v_part IN
+        SELECT partition_name FROM snapshot_partitions()
+        WHERE NOT is_default AND range_to IS NOT NULL AND range_to <= p_before
+    LOOP
+        EXECUTE format('ALTER TABLE onlyfans_profile_snapshots DETACH PARTITION %I', v_part.partition_name);
+        IF p_drop THEN
+            EXECUTE format('DROP TABLE %I', v_part.partition_name);
+        END IF;
+        RETURN NEXT v_part.partition_name;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql VOLATILE SECURITY DEFINER SET search_path = public;
+
+-- Re-attach a previously detached month (e.g. restored from an archive)
+CREATE OR REPLACE FUNCTION attach_snapshot_partition(p_name TEXT, p_from TIMESTAMPTZ, p_to TIMESTAMPTZ)
+RETURNS TEXT AS $$
+BEGIN
+    EXECUTE format(
+        'ALTER TABLE onlyfans_profile_snapshots ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        p_name, p_from, p_to);
+    RETURN p_name;
+END;
+$$ LANGUAGE plpgsql VOLATILE SECURITY DEFINER SET search_path = public;
+
+-- 4. Privileges
+-- ============================================================================
+-- Functions are executable by PUBLIC by default and Supabase also grants
+-- anon/authenticated; DDL must only be reachable with the service key.
+REVOKE EXECUTE ON FUNCTION ensure_snapshot_partitions(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION retire_snapshot_partitions(TIMESTAMPTZ, BOOLEAN) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION attach_snapshot_partition(TEXT, TIMESTAMPTZ, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ensure_snapshot_partitions(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION retire_snapshot_partitions(TIMESTAMPTZ, BOOLEAN) TO service_role;
+GRANT EXECUTE ON FUNCTION attach_snapshot_partition(TEXT, TIMESTAMPTZ, TIMESTAMPTZ) TO service_role;
+
+SELECT * FROM ensure_snapshot_partitions(3);
+
+-- Example:
+-- SELECT * FROM snapshot_partitions();
+-- SELECT attach_snapshot_partition('onlyfans_profile_snapshots_y2024m01', '2024-01-01', '2024-02-01');
+-- SELECT * FROM retire_snapshot_partitions(NOW() - INTERVAL '2 years');        -- detach only
+-- SELECT * FROM retire_snapshot_partitions(NOW() - INTERVAL '2 years', TRUE);  -- detach and drop
@@ -0,0 +1,46 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Creator Growth Metrics
+-- ============================================================================
+-- Purpose: Precomputed 7/30-day growth per creator for "trending" and
+--          "fastest growing" lists. The table is filled by
+--          v2_growth_analytics.py from onlyfans_profile_snapshots, so the api/
+--          endpoints can read a ranked list with one indexed query instead of
+--          aggregating snapshots per request.
+-- Safety: Additive, new table only
+-- Date: 2026-10-18
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS creator_growth_metrics (
+    creator_id BIGINT PRIMARY KEY,
+    computed_at TIMESTAMPTZ NOT NULL,
+    latest_snapshot_at TIMESTAMPTZ NOT NULL,
+
+    -- Latest values
+    favoritedcount BIGINT,
+    postscount BIGINT,
+    subscribeprice NUMERIC(10,2),
+
+    -- Deltas scaled to exactly 7 / 30 days (NULL without a baseline that old)
+    fav_delta_7d DOUBLE PRECISION,
+    fav_delta_30d DOUBLE PRECISION,
+    posts_delta_7d DOUBLE PRECISION,
+    posts_delta_30d DOUBLE PRECISION,
+
+    -- Relative growth (delta / baseline), only for baselines above a minimum size
+    fav_growth_7d DOUBLE PRECISION,
+    fav_growth_30d DOUBLE PRECISION,
+
+    -- Price now minus price ~30 days ago
+    price_change_30d NUMERIC(10,2)
+);
+
+-- "Trending": most favorites gained this week
+CREATE INDEX IF NOT EXISTS idx_growth_fav_delta_7d
+ON creator_growth_metrics(fav_delta_7d DESC NULLS LAST);
+
+-- "Fastest growing": highest relative growth this month
+CREATE INDEX IF NOT EXISTS idx_growth_fav_growth_30d
+ON creator_growth_metrics(fav_growth_30d DESC NULLS LAST);
+
+-- Example (PostgREST):
+-- /rest/v1/creator_growth_metrics?select=creator_id,fav_delta_7d&order=fav_delta_7d.desc.nullslast&limit=50
@@ -0,0 +1,102 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Profile Change Feed
+-- ============================================================================
+-- Purpose: Append-only feed of onlyfans_profiles rows that changed in a way the
+--          site renders (id, username, changed columns, old and new status).
+--          Cache warmers, sitemap builders and search indexers read it from a
+--          per-consumer cursor (maintenance_watermarks, migration 006), so
+--          they only process profiles that actually changed.
+-- Safety: Additive. A row trigger writes the feed, so every writer is covered
+--         (scanner, refresh writer, apply_status_transitions, CSV loaders)
+--         without client changes. Refreshes that only move timestamps
+--         (last_seen_at, last_refreshed_at, next_refresh_at) are not recorded.
+-- Date: 2026-10-18
+-- ============================================================================
+
+-- 1. Feed table
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS profile_change_feed (
+    change_id BIGSERIAL PRIMARY KEY,
+    creator_id BIGINT NOT NULL,
+    username TEXT,
+    op CHAR(1) NOT NULL,            -- 'I' new profile, 'U' update
+    changed_columns TEXT[],         -- NULL for inserts
+    old_status TEXT,
+    new_status TEXT,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Pruning by age
+CREATE INDEX IF NOT EXISTS idx_change_feed_changed_at
+ON profile_change_feed(changed_at);
+
+-- 2. Trigger
+-- ============================================================================
+-- Tracked columns are the ones the creator pages and cards render.
+CREATE OR REPLACE FUNCTION record_profile_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO profile_change_feed (creator_id, username, op, new_status)
+        VALUES (NEW.id, NEW.username, 'I', NEW.status);
+    ELSE
+        INSERT INTO profile_change_feed (creator_id, username, op, changed_columns, old_status, new_status)
+        VALUES (NEW.id, NEW.username, 'U', array_remove(ARRAY[
+            CASE WHEN OLD.username IS DISTINCT FROM NEW.username THEN 'username' END,
+            CASE WHEN OLD.status IS DISTINCT FROM NEW.status THEN 'status' END,
+            CASE WHEN OLD.name IS DISTINCT FROM NEW.name THEN 'name' END,
+            CASE WHEN OLD.about IS DISTINCT FROM NEW.about THEN 'about' END,
+            CASE WHEN OLD.location IS DISTINCT FROM NEW.location THEN 'location' END,
+            CASE WHEN OLD.avatar IS DISTINCT FROM NEW.avatar THEN 'avatar' END,
+            CASE WHEN OLD.header IS DISTINCT FROM NEW.header THEN 'header' END,
+            CASE WHEN OLD.isverified IS DISTINCT FROM NEW.isverified THEN 'isverified' END,
+            CASE WHEN OLD.subscribeprice IS DISTINCT FROM NEW.subscribeprice THEN 'subscribeprice' END,
+            CASE WHEN OLD.favoritedcount IS DISTINCT FROM NEW.favoritedcount THEN 'favoritedcount' END,
+            CASE WHEN OLD.postscount IS DISTINCT FROM NEW.postscount THEN 'postscount' END,
+            CASE WHEN OLD.photoscount IS DISTINCT FROM NEW.photoscount THEN 'photoscount' END,
+            CASE WHEN OLD.videoscount IS DISTINCT FROM NEW.videoscount THEN 'videoscount' END
+        ], NULL), OLD.status, NEW.status);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_profile_change_insert ON onlyfans_profiles;
+CREATE TRIGGER trg_profile_change_insert
+AFTER INSERT ON onlyfans_profiles
+FOR EACH ROW EXECUTE FUNCTION record_profile_change();
+
+-- The WHEN clause keeps timestamp-only refreshes from calling the function at all
+DROP TRIGGER IF EXISTS trg_profile_change_update ON onlyfans_profiles;
+CREATE TRIGGER trg_profile_change_update
+AFTER UPDATE ON onlyfans_profiles
+FOR EACH ROW
+WHEN ((OLD.username, OLD.status, OLD.name, OLD.about, OLD.location, OLD.avatar, OLD.header,
+       OLD.isverified, OLD.subscribeprice, OLD.favoritedcount, OLD.postscount,
+       OLD.photoscount, OLD.videoscount)
+      IS DISTINCT FROM
+      (NEW.username, NEW.status, NEW.name, NEW.about, NEW.location, NEW.avatar, NEW.header,
+       NEW.isverified, NEW.subscribeprice, NEW.favoritedcount, NEW.postscount,
+       NEW.photoscount, NEW.videoscount))
+EXECUTE FUNCTION record_profile_change();
+
+-- 3. Retention
+-- ============================================================================
+-- Delete feed rows older than p_keep. Consumers that fall further behind
+-- should do a full pass instead. Returns the number of rows deleted.
+CREATE OR REPLACE FUNCTION prune_profile_change_feed(p_keep INTERVAL DEFAULT INTERVAL '14 days')
+RETURNS BIGINT AS $$
+    WITH deleted AS (
+        DELETE FROM profile_change_feed
+        WHERE changed_at < NOW() - p_keep
+        RETURNING 1
+    )
+    SELECT COUNT(*) FROM deleted;
+$$ LANGUAGE sql VOLATILE;
+
+-- Example: everything changed since a consumer's cursor (read through the change_id primary key)
+-- SELECT * FROM profile_change_feed
+-- WHERE change_id > (SELECT watermark::BIGINT FROM maintenance_watermarks WHERE job = 'change_feed:warm-cache')
+--   AND changed_at < NOW() - INTERVAL '1 minute'
+-- ORDER BY change_id LIMIT 1000;
+-- SELECT prune_profile_change_feed(INTERVAL '14 days');
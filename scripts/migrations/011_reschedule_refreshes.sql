@@ -0,0 +1,34 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Set-based Refresh Rescheduling
+-- ============================================================================
+-- Purpose: Move a batch of profiles to individual next_refresh_at times in one
+--          statement, so rebalanced profiles can be spaced across their target
+--          slot instead of all landing on the start of it.
+--          Used by v2_refresh_scheduler.py --rebalance.
+-- Safety: Only touches next_refresh_at of the ids passed in; ids that do not
+--         exist are ignored
+-- Date: 2026-10-18
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION reschedule_refreshes(p_moves JSONB)
+RETURNS BIGINT AS $$
+    WITH input AS (
+        SELECT DISTINCT ON (m.id) m.id, m.next_refresh_at
+        FROM jsonb_to_recordset(p_moves) AS m(id BIGINT, next_refresh_at TIMESTAMPTZ)
+        ORDER BY m.id
+    ),
+    updated AS (
+        UPDATE onlyfans_profiles p
+        SET next_refresh_at = i.next_refresh_at
+        FROM input i
+        WHERE p.id = i.id
+        RETURNING p.id
+    )
+    SELECT COUNT(*) FROM updated;
+$$ LANGUAGE sql VOLATILE;
+
+-- Example:
+-- SELECT reschedule_refreshes('[
+--   {"id": 123456, "next_refresh_at": "2026-11-17T14:00:00Z"},
+--   {"id": 789012, "next_refresh_at": "2026-11-17T14:00:09Z"}
+-- ]'::jsonb);
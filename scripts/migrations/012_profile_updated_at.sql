@@ -0,0 +1,41 @@
+-- ============================================================================
+-- OnlyFans Scraper V2 Migration: Profile updated_at Watermark
+-- ============================================================================
+-- Purpose: Stamp every insert and update of onlyfans_profiles with updated_at,
+--          so v2_local_mirror.py can sync by one watermark that every writer
+--          moves. Writes that leave first_seen_at and last_refreshed_at alone
+--          (v2_refresh_scheduler.py --rebalance, v2_reclassify_profiles.py,
+--          manual fixes) were invisible to the incremental sync before.
+-- Safety: Additive. Existing rows keep updated_at NULL until their next write;
+--         a BEFORE row trigger sets it, so no client changes are needed
+-- Date: 2026-10-18
+-- ============================================================================
+
+-- 1. Column + keyset index for the mirror's (updated_at, id) pages
+-- ============================================================================
+ALTER TABLE onlyfans_profiles
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_profiles_updated_id
+ON onlyfans_profiles(updated_at, id);
+
+-- 2. Trigger
+-- ============================================================================
+CREATE OR REPLACE FUNCTION touch_profile_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_profile_updated_at ON onlyfans_profiles;
+CREATE TRIGGER trg_profile_updated_at
+BEFORE INSERT OR UPDATE ON onlyfans_profiles
+FOR EACH ROW EXECUTE FUNCTION touch_profile_updated_at();
+
+-- Example (rows changed since the mirror's last watermark):
+-- SELECT id, status, next_refresh_at FROM onlyfans_profiles
+-- WHERE updated_at >= '2026-10-18T12:00:00Z'
+-- ORDER BY updated_at, id
+-- LIMIT 1000;
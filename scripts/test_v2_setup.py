@@ -5,6 +5,7 @@ Tests:
 2. Supabase connection works
 3. Cookies file is valid
 4. Import dependencies work
+5. Adaptive scheduler accepts a real refresh snapshot (offline)
 """
 
 import sys
@@ -167,6 +168,31 @@ def main():
         all_passed &= exists
     print()
     
+    # Test 8: Adaptive scheduler on a refresh snapshot (no network)
+    print("8. Checking adaptive scheduler on a refresh snapshot...")
+    try:
+        import asyncio
+        sys.path.insert(0, str(Path(__file__).parent))
+        from v2_id_scanner import extract_fields
+        from v2_refresh_orchestrator import refresh_snapshot
+        from v2_refresh_scheduler import AdaptiveScheduler
+        
+        class NoHistory:
+            async def fetch_page(self, *args, **kwargs):
+                return []
+        
+        # Missing API fields come through extract_fields as "" (bundles, promotions, counts)
+        row = extract_fields({'id': 1, 'username': 'setup_check', 'isPerformer': True, 'postsCount': 12})
+        row['status'] = 'active'
+        asyncio.run(AdaptiveScheduler(NoHistory()).schedule([(row, refresh_snapshot(1, row), False)]))
+        passed = bool(row.get('next_refresh_at'))
+        print_test("AdaptiveScheduler.schedule", passed, f"next_refresh_at {row.get('next_refresh_at')}")
+        all_passed &= passed
+    except Exception as e:
+        print_test("AdaptiveScheduler.schedule", False, str(e))
+        all_passed = False
+    print()
+    
     # Final summary
     print("="*60)
     if all_passed:
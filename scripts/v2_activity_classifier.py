@@ -0,0 +1,283 @@
+"""
+Activity classifier for OnlyFans V2 creators
+- Same rules as the scanner's inactive-creator filter (active / inactive / abandoned)
+- Fast ISO-8601 timestamp parsing (datetime.fromisoformat, dateutil only as fallback)
+- Cutoffs (now, 1 year, 2 years) computed once per batch, not per profile
+- Scalar entry point for the scanner, vectorised NumPy entry point for bulk jobs
+- One status rule for every writer of onlyfans_profiles.status (refresh, re-classification)
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Iterable
+
+import numpy as np
+
+
+# ============================================================================
+# Labels
+# ============================================================================
+
+ACTIVE = 'active'
+INACTIVE = 'inactive'
+ABANDONED = 'abandoned'
+
+# Integer codes returned by the batch classifier (index into LABELS)
+ACTIVE_CODE = 0
+INACTIVE_CODE = 1
+ABANDONED_CODE = 2
+LABELS = np.array([ACTIVE, INACTIVE, ABANDONED], dtype=object)
+
+
+# ============================================================================
+# Rules & Cutoffs
+# ============================================================================
+
+class ActivityRules:
+    """Thresholds for the activity rules (defaults match the original scanner filter)"""
+    
+    def __init__(self,
+                 abandoned_days: int = 365,
+                 recent_account_days: int = 730,
+                 high_engagement: int = 100,
+                 lots_of_posts: int = 50,
+                 lots_of_media: int = 100,
+                 exceptional_favorites: int = 10000,
+                 low_posts: int = 10,
+                 low_media: int = 5,
+                 low_engagement: int = 100):
+        """
+        Args:
+            abandoned_days: lastSeen older than this = abandoned
+            recent_account_days: firstPublishedPostDate newer than this = recent account
+            high_engagement: favoritedCount above this = clearly active
+            lots_of_posts: postsCount above this = clearly active
+            lots_of_media: photos + videos above this = clearly active
+            exceptional_favorites: favoritedCount above this keeps abandoned accounts
+            low_posts: postsCount below this counts towards inactive
+            low_media: photos + videos at or below this counts towards inactive
+            low_engagement: favoritedCount below this counts towards inactive
+        """
+        self.abandoned_days = abandoned_days
+        self.recent_account_days = recent_account_days
+        self.high_engagement = high_engagement
+        self.lots_of_posts = lots_of_posts
+        self.lots_of_media = lots_of_media
+        self.exceptional_favorites = exceptional_favorites
+        self.low_posts = low_posts
+        self.low_media = low_media
+        self.low_engagement = low_engagement
+    
+    def to_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+DEFAULT_RULES = ActivityRules()
+
+
+class ActivityCutoffs:
+    """Epoch-second cutoffs computed once per batch"""
+    
+    def __init__(self, rules: Optional[ActivityRules] = None, now: Optional[datetime] = None):
+        self.rules = rules or DEFAULT_RULES
+        now = now or datetime.now(timezone.utc)
+        self.created_at = time.time()
+        self.now = now.timestamp()
+        self.abandoned_before = self.now - self.rules.abandoned_days * 86400
+        self.recent_after = self.now - self.rules.recent_account_days * 86400
+    
+    def age(self) -> float:
+        """Seconds since these cutoffs were computed"""
+        return time.time() - self.created_at
+
+
+# ============================================================================
+# Timestamp Parsing
+# ============================================================================
+
+try:
+    from dateutil.parser import parse as _dateutil_parse
+except ImportError:  # dateutil is only a fallback for non-ISO strings
+    _dateutil_parse = None
+
+_NAN = float('nan')
+
+
+def parse_iso_timestamp(value: Any) -> float:
+    """
+    Parse an OnlyFans timestamp ('2024-05-01T12:34:56+00:00') to epoch seconds.
+    Missing or unparsable values return NaN.
+    """
+    if not value:
+        return _NAN
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        s = str(value)
+        try:
+            dt = datetime.fromisoformat(s[:-1] + '+00:00' if s.endswith('Z') else s)
+        except ValueError:
+            if _dateutil_parse is None:
+                return _NAN
+            try:
+                dt = _dateutil_parse(s)
+            except (ValueError, OverflowError):
+                return _NAN
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def parse_iso_timestamps(values: Iterable[Any]) -> np.ndarray:
+    """Parse a sequence of timestamps into a float64 array of epoch seconds (NaN = missing)"""
+    values = list(values)
+    return np.fromiter((parse_iso_timestamp(v) for v in values), dtype=np.float64, count=len(values))
+
+
+# ============================================================================
+# Scalar Classifier
+# ============================================================================
+
+def _get(profile: Dict[str, Any], key: str) -> Any:
+    """Look up a camelCase field, falling back to the lowercase DB column name"""
+    v = profile.get(key)
+    if v is None:
+        v = profile.get(key.lower())
+    return v
+
+
+def _num(v: Any) -> float:
+    try:
+        return float(v) if v not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def classify_activity(profile: Dict[str, Any], cutoffs: ActivityCutoffs) -> str:
+    """Classify one profile dict (API camelCase or DB lowercase keys) as active/inactive/abandoned"""
+    rules = cutoffs.rules
+    last_seen = parse_iso_timestamp(_get(profile, 'lastSeen'))
+    first_pub = parse_iso_timestamp(_get(profile, 'firstPublishedPostDate'))
+    posts = _num(_get(profile, 'postsCount'))
+    media = _num(_get(profile, 'photosCount')) + _num(_get(profile, 'videosCount'))
+    favorited = _num(_get(profile, 'favoritedCount'))
+    verified = bool(_get(profile, 'isVerified'))
+    
+    # Abandoned (lastSeen > 1 year) unless verified or extremely popular
+    old_last_seen = last_seen < cutoffs.abandoned_before
+    if old_last_seen and not (verified or favorited > rules.exceptional_favorites):
+        return ABANDONED
+    
+    # Any strong activity indicator keeps the creator
+    if (favorited > rules.high_engagement or posts > rules.lots_of_posts
+            or media > rules.lots_of_media or verified or first_pub > cutoffs.recent_after):
+        return ACTIVE
+    
+    # Inactive only if ALL weak indicators agree (missing lastSeen counts as old)
+    if (posts < rules.low_posts and media <= rules.low_media
+            and favorited < rules.low_engagement and (last_seen != last_seen or old_last_seen)):
+        return INACTIVE
+    return ACTIVE
+
+
+# ============================================================================
+# Vectorised Classifier
+# ============================================================================
+
+def classify_activity_batch(posts: np.ndarray,
+                            photos: np.ndarray,
+                            videos: np.ndarray,
+                            favorited: np.ndarray,
+                            verified: np.ndarray,
+                            last_seen: np.ndarray,
+                            first_published: np.ndarray,
+                            cutoffs: ActivityCutoffs) -> np.ndarray:
+    """
+    Classify a batch given column arrays.
+    
+    Counts are numeric arrays (NaN/0 for missing), verified is bool, and
+    last_seen / first_published are float64 epoch seconds with NaN for
+    missing. Returns an int8 array of ACTIVE_CODE / INACTIVE_CODE /
+    ABANDONED_CODE (use LABELS[codes] for strings).
+    """
+    rules = cutoffs.rules
+    posts = np.nan_to_num(np.asarray(posts, dtype=np.float64))
+    media = np.nan_to_num(np.asarray(photos, dtype=np.float64)) + np.nan_to_num(np.asarray(videos, dtype=np.float64))
+    favorited = np.nan_to_num(np.asarray(favorited, dtype=np.float64))
+    verified = np.asarray(verified, dtype=bool)
+    last_seen = np.asarray(last_seen, dtype=np.float64)
+    first_published = np.asarray(first_published, dtype=np.float64)
+    
+    with np.errstate(invalid='ignore'):
+        old_last_seen = last_seen < cutoffs.abandoned_before
+        recent_account = first_published > cutoffs.recent_after
+    
+    exceptional = verified | (favorited > rules.exceptional_favorites)
+    abandoned = old_last_seen & ~exceptional
+    
+    strong = ((favorited > rules.high_engagement) | (posts > rules.lots_of_posts)
+              | (media > rules.lots_of_media) | verified | recent_account)
+    all_low = ((posts < rules.low_posts) & (media <= rules.low_media)
+               & (favorited < rules.low_engagement) & (np.isnan(last_seen) | old_last_seen))
+    
+    codes = np.full(len(posts), ACTIVE_CODE, dtype=np.int8)
+    codes[~strong & all_low] = INACTIVE_CODE
+    codes[abandoned] = ABANDONED_CODE
+    return codes
+
+
+# ============================================================================
+# Profile Status
+# ============================================================================
+
+def activity_status(profile: Dict[str, Any], cutoffs: ActivityCutoffs,
+                    inactive_status: str = INACTIVE) -> str:
+    """onlyfans_profiles.status for a profile that loaded (inactive and abandoned share one status)"""
+    return ACTIVE if classify_activity(profile, cutoffs) == ACTIVE else inactive_status
+
+
+def activity_statuses(codes: np.ndarray, inactive_status: str = INACTIVE) -> np.ndarray:
+    """Vectorised activity_status over classify_activity_batch codes"""
+    return np.where(codes == ACTIVE_CODE, ACTIVE, inactive_status).astype(object)
+
+
+def classify_profiles(profiles: List[Dict[str, Any]], cutoffs: ActivityCutoffs) -> np.ndarray:
+    """Vectorised classification of a list of profile dicts (camelCase or lowercase keys)"""
+    def column(key: str) -> np.ndarray:
+        return np.fromiter((_num(_get(p, key)) for p in profiles), dtype=np.float64, count=len(profiles))
+    
+    return classify_activity_batch(
+        posts=column('postsCount'),
+        photos=column('photosCount'),
+        videos=column('videosCount'),
+        favorited=column('favoritedCount'),
+        verified=np.fromiter((bool(_get(p, 'isVerified')) for p in profiles), dtype=bool, count=len(profiles)),
+        last_seen=parse_iso_timestamps(_get(p, 'lastSeen') for p in profiles),
+        first_published=parse_iso_timestamps(_get(p, 'firstPublishedPostDate') for p in profiles),
+        cutoffs=cutoffs,
+    )
+
+
+def _datetime64_to_epoch(arr: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    seconds = arr.astype('datetime64[us]').astype(np.int64) / 1e6
+    return np.where(mask, np.nan, seconds)
+
+
+def classify_column_batch(batch, cutoffs: ActivityCutoffs) -> np.ndarray:
+    """Classify a v2_columnar.ColumnBatch without materialising rows"""
+    def counts(name: str) -> np.ndarray:
+        return np.where(batch.masks[name], 0, batch[name]).astype(np.float64)
+    
+    return classify_activity_batch(
+        posts=counts('postsCount'),
+        photos=counts('photosCount'),
+        videos=counts('videosCount'),
+        favorited=counts('favoritedCount'),
+        verified=batch['isVerified'] & ~batch.masks['isVerified'],
+        last_seen=_datetime64_to_epoch(batch['lastSeen'], batch.masks['lastSeen']),
+        first_published=_datetime64_to_epoch(batch['firstPublishedPostDate'],
+                                             batch.masks['firstPublishedPostDate']),
+        cutoffs=cutoffs,
+    )
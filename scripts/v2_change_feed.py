@@ -0,0 +1,153 @@
+"""
+Profile change feed reader for OnlyFans V2
+- profile_change_feed is written by a trigger on onlyfans_profiles (migration 010)
+- Each consumer keeps its own change_id cursor in maintenance_watermarks (job change_feed:<name>)
+- Rows newer than --lag-seconds are left for the next read so in-flight transactions are not skipped
+- Changes are collapsed per creator (latest username / status, union of changed columns)
+- CLI: peek at pending changes, advance a cursor, prune old feed rows
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List
+from pathlib import Path
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+
+
+FEED_TABLE = 'profile_change_feed'
+
+
+def collapse_changes(rows: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """One entry per creator: latest username and status, all columns that changed"""
+    collapsed: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        entry = collapsed.setdefault(row['creator_id'], {
+            'creator_id': row['creator_id'],
+            'old_status': row.get('old_status'),
+            'inserted': False,
+            'changed_columns': set()
+        })
+        entry['username'] = row.get('username')
+        entry['new_status'] = row.get('new_status')
+        entry['inserted'] = entry['inserted'] or row.get('op') == 'I'
+        entry['changed_columns'].update(row.get('changed_columns') or [])
+    return collapsed
+
+
+# ============================================================================
+# Change Feed
+# ============================================================================
+
+class ChangeFeed:
+    """Per-consumer cursor over profile_change_feed"""
+    
+    def __init__(self, db: SupabaseClient, consumer: str, lag_seconds: int = 60, page_size: int = 1000):
+        self.db = db
+        self.job = f'change_feed:{consumer}'
+        self.lag_seconds = lag_seconds
+        self.page_size = page_size
+        self.position: Optional[int] = None
+    
+    async def load_cursor(self) -> int:
+        mark = await self.db.get_watermark(self.job)
+        self.position = int(mark['watermark']) if mark and mark.get('watermark') else 0
+        return self.position
+    
+    async def read(self) -> Optional[List[Dict[str, Any]]]:
+        """Next page after the in-memory position (None on failure, [] when caught up)"""
+        if self.position is None:
+            await self.load_cursor()
+        settled = (datetime.now(timezone.utc) - timedelta(seconds=self.lag_seconds)).isoformat()
+        page = await self.db.fetch_page(FEED_TABLE, '*', after=self.position, key='change_id',
+                                        limit=self.page_size, filters={'changed_at': f'lt.{settled}'})
+        if page:
+            self.position = page[-1]['change_id']
+        return page
+    
+    async def read_all(self, max_rows: int = 0) -> Optional[List[Dict[str, Any]]]:
+        """Read pages until caught up (or max_rows); the cursor is not saved until commit()"""
+        rows: List[Dict[str, Any]] = []
+        while not max_rows or len(rows) < max_rows:
+            page = await self.read()
+            if page is None:
+                return None
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+        return rows
+    
+    async def commit(self, processed: int = 0) -> bool:
+        """Persist the position once the changes read so far have been handled"""
+        return await self.db.set_watermark(self.job, str(self.position or 0), {'processed': processed})
+    
+    async def prune(self, keep_days: int) -> Optional[int]:
+        return await self.db.call_rpc('prune_profile_change_feed', {'p_keep': f'{keep_days} days'})
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Profile Change Feed')
+    
+    parser.add_argument('--consumer', default='cli', help='Cursor name (default: cli)')
+    parser.add_argument('--peek', action='store_true', help='Print pending changes without moving the cursor')
+    parser.add_argument('--advance', action='store_true', help='Move the cursor past all settled changes')
+    parser.add_argument('--lag-seconds', type=int, default=60,
+                       help='Leave changes younger than this for the next read (default: 60)')
+    parser.add_argument('--max-rows', type=int, default=0, help='Stop after this many feed rows (default: 0 = all)')
+    parser.add_argument('--prune-days', type=int, help='Delete feed rows older than this many days')
+    
+    args = parser.parse_args()
+    
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    feed = ChangeFeed(SupabaseClient(supabase_url, supabase_key), args.consumer, lag_seconds=args.lag_seconds)
+    
+    async def run():
+        if args.peek or args.advance:
+            start = await feed.load_cursor()
+            rows = await feed.read_all(args.max_rows)
+            if rows is None:
+                print("⚠️ Failed to read profile_change_feed (migration 010 applied?)")
+                sys.exit(1)
+            changes = collapse_changes(rows)
+            print(f"📰 {len(rows)} feed rows / {len(changes)} creators after change_id {start} ({feed.job})")
+            if args.peek:
+                for change in list(changes.values())[:50]:
+                    status = (f" {change['old_status']} → {change['new_status']}"
+                              if change['old_status'] != change['new_status'] else '')
+                    kind = 'new' if change['inserted'] else ','.join(sorted(change['changed_columns']))
+                    print(f"  {change['username']} ({change['creator_id']}): {kind}{status}")
+            if args.advance:
+                if await feed.commit(len(rows)):
+                    print(f"✅ Cursor moved to change_id {feed.position}")
+        
+        if args.prune_days is not None:
+            deleted = await feed.prune(args.prune_days)
+            if deleted is None:
+                print("⚠️ prune_profile_change_feed failed")
+                sys.exit(1)
+            print(f"🗑️ Pruned {deleted} feed rows older than {args.prune_days} days")
+    
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
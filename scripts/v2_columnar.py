@@ -0,0 +1,444 @@
+"""
+Columnar batch extraction for OnlyFans V2 bulk jobs
+- Turns a list of raw /api2/v2/users/ payloads into typed column arrays
+- Follows the onlyfans_profiles schema (same columns as extract_fields)
+- Null masks per column instead of "" / NaN sentinels
+- JSON serialisation built column-wise (no per-row dicts)
+- Optional Arrow / pandas views for analytics
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Tuple
+
+import numpy as np
+
+
+# ============================================================================
+# Profile Schema
+# ============================================================================
+
+# Column kinds:
+#   int       -> int64 values + null mask
+#   float     -> float64 values (NaN where null) + null mask
+#   bool      -> bool values + null mask
+#   timestamp -> datetime64[us] (UTC, NaT where null) + null mask; the source
+#                strings are kept for serialisation (the DB columns are text)
+#   str       -> object values (None where null) + null mask
+
+_COUNT_COLUMNS = [
+    'archivedPostsCount', 'audiosCount', 'favoritedCount', 'favoritesCount',
+    'finishedStreamsCount', 'mediasCount', 'photosCount', 'postsCount',
+    'privateArchivedPostsCount', 'subscribersCount', 'videosCount',
+]
+
+_BOOL_COLUMNS = [
+    'canAddSubscriber', 'canChat', 'canCommentStory', 'canCreatePromotion',
+    'canCreateTrial', 'canEarn', 'canLookStory', 'canPayInternal',
+    'canReceiveChatMessage', 'canReport', 'canRestrict', 'canTrialSend',
+    'hasLabels', 'hasLinks', 'hasNotViewedStory', 'hasPinnedPosts',
+    'hasSavedStreams', 'hasScheduledStream', 'hasStories', 'hasStream',
+    'isAdultContent', 'isBlocked', 'isFriend', 'isMarkdownDisabledForAbout',
+    'isPerformer', 'isPrivateRestriction', 'isRealPerformer', 'isReferrerAllowed',
+    'isRestricted', 'isSpotifyConnected', 'isSpringConnected', 'isVerified',
+    'showMediaCount', 'showPostsInFeed', 'showSubscribersCount', 'shouldShowFinishedStreams',
+    'subscribedBy', 'subscribedOn', 'avatarHeaderConverterUpload',
+    'tipsEnabled', 'tipsTextEnabled',
+]
+
+# Numeric in onlyfans_profiles even though the API sends some of them as booleans
+_NUMERIC_FLAG_COLUMNS = ['subscribedByAutoprolong', 'subscribedIsExpiredNow', 'subscribedOnExpiredNow']
+
+_STR_COLUMNS = [
+    'username', 'name', 'about', 'location', 'website', 'wishlist', 'view',
+    'avatar', 'header',
+    'subscribedByData', 'subscribedByExpire', 'subscribedByExpireDate',
+    'subscribedOnData', 'subscribedOnDuration',
+]
+
+# Ordered (column, kind) pairs - column names match extract_fields() output
+PROFILE_SCHEMA: List[Tuple[str, str]] = (
+    [('id', 'int')]
+    + [(c, 'str') for c in _STR_COLUMNS]
+    + [(c, 'int') for c in _COUNT_COLUMNS]
+    + [('subscribePrice', 'float'), ('currentSubscribePrice', 'float'),
+       ('tipsMax', 'int'), ('tipsMin', 'int'), ('tipsMinInternal', 'int'),
+       ('referalBonusSummForReferer', 'float')]
+    + [(c, 'float') for c in _NUMERIC_FLAG_COLUMNS]
+    + [(c, 'bool') for c in _BOOL_COLUMNS]
+    + [('joinDate', 'timestamp'), ('lastSeen', 'timestamp'), ('firstPublishedPostDate', 'timestamp')]
+    + [('avatar_c50', 'str'), ('avatar_c144', 'str'), ('avatar_thumbs_json', 'str'),
+       ('header_w480', 'str'), ('header_w760', 'str'), ('header_thumbs_json', 'str'),
+       ('header_size', 'str'), ('header_width', 'int'), ('header_height', 'int')]
+    + [col for i in range(1, 4) for col in (
+        (f'promotion{i}_id', 'int'), (f'promotion{i}_price', 'float'),
+        (f'promotion{i}_discount', 'int'), (f'promotion{i}_title', 'str'))]
+    + [col for i in range(1, 4) for col in (
+        (f'bundle{i}_id', 'int'), (f'bundle{i}_discount', 'int'),
+        (f'bundle{i}_duration', 'int'), (f'bundle{i}_price', 'float'),
+        (f'bundle{i}_canBuy', 'bool'))]
+    + [('raw_json', 'str')]
+)
+
+PROFILE_KINDS: Dict[str, str] = dict(PROFILE_SCHEMA)
+
+
+# ============================================================================
+# Scalar Coercion
+# ============================================================================
+
+def _is_null(v: Any) -> bool:
+    if v is None or v == "":
+        return True
+    return isinstance(v, float) and v != v
+
+
+def _as_int(v: Any) -> Optional[int]:
+    try:
+        return int(float(v)) if isinstance(v, str) else int(v)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _as_float(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def _as_bool(v: Any) -> bool:
+    if isinstance(v, str):
+        return v.strip().lower() in ('true', 't', '1', 'yes')
+    return bool(v)
+
+
+def _as_datetime64(v: Any) -> np.datetime64:
+    try:
+        dt = datetime.fromisoformat(str(v).replace('Z', '+00:00'))
+    except ValueError:
+        return np.datetime64('NaT', 'us')
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(dt, 'us')
+
+
+def _build_column(values: List[Any], kind: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert one raw column (list of Python values) into (array, null_mask)"""
+    n = len(values)
+    mask = np.fromiter((_is_null(v) for v in values), dtype=bool, count=n)
+    
+    if kind == 'int':
+        parsed = [None if m else _as_int(v) for v, m in zip(values, mask)]
+        mask = np.fromiter((p is None for p in parsed), dtype=bool, count=n)
+        arr = np.fromiter((p or 0 for p in parsed), dtype=np.int64, count=n)
+    elif kind == 'float':
+        arr = np.fromiter((np.nan if m else _as_float(v) for v, m in zip(values, mask)),
+                          dtype=np.float64, count=n)
+        # inf / nan have no JSON representation
+        mask |= ~np.isfinite(arr)
+    elif kind == 'bool':
+        arr = np.fromiter((False if m else _as_bool(v) for v, m in zip(values, mask)),
+                          dtype=bool, count=n)
+    elif kind == 'timestamp':
+        arr = np.array([np.datetime64('NaT', 'us') if m else _as_datetime64(v)
+                        for v, m in zip(values, mask)], dtype='datetime64[us]')
+        mask |= np.isnat(arr)
+    else:
+        arr = np.empty(n, dtype=object)
+        arr[:] = [None if m else (v if isinstance(v, str) else _json_or_str(v))
+                  for v, m in zip(values, mask)]
+    return arr, mask
+
+
+def _json_or_str(v: Any) -> str:
+    if isinstance(v, (dict, list)):
+        try:
+            return json.dumps(v, ensure_ascii=False)
+        except Exception:
+            return str(v)
+    return str(v)
+
+
+# ============================================================================
+# Column Batch
+# ============================================================================
+
+class ColumnBatch:
+    """Typed columnar view of a batch of profiles (one array + null mask per column)"""
+    
+    def __init__(self, columns: Dict[str, np.ndarray], masks: Dict[str, np.ndarray],
+                 kinds: Optional[Dict[str, str]] = None,
+                 sources: Optional[Dict[str, np.ndarray]] = None):
+        self.columns = columns
+        self.masks = masks
+        self.kinds = kinds or {name: PROFILE_KINDS.get(name, 'str') for name in columns}
+        # Original strings of timestamp columns, written back unchanged
+        self.sources = sources or {}
+        lengths = {len(arr) for arr in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Column length mismatch: {sorted(lengths)}")
+        self.length = lengths.pop() if lengths else 0
+    
+    def __len__(self) -> int:
+        return self.length
+    
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+    
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns)
+    
+    def select(self, names: Iterable[str]) -> 'ColumnBatch':
+        """Return a batch restricted to the given columns (arrays are shared, not copied)"""
+        names = [n for n in names if n in self.columns]
+        return ColumnBatch({n: self.columns[n] for n in names},
+                           {n: self.masks[n] for n in names},
+                           {n: self.kinds[n] for n in names},
+                           {n: self.sources[n] for n in names if n in self.sources})
+    
+    def take(self, indices: np.ndarray) -> 'ColumnBatch':
+        """Return a batch with only the given rows (boolean mask or index array)"""
+        return ColumnBatch({n: arr[indices] for n, arr in self.columns.items()},
+                           {n: m[indices] for n, m in self.masks.items()},
+                           dict(self.kinds),
+                           {n: src[indices] for n, src in self.sources.items()})
+    
+    def with_column(self, name: str, values: np.ndarray, kind: str,
+                    mask: Optional[np.ndarray] = None) -> 'ColumnBatch':
+        """Return a batch with an extra (or replaced) column"""
+        columns = dict(self.columns)
+        masks = dict(self.masks)
+        kinds = dict(self.kinds)
+        sources = {n: src for n, src in self.sources.items() if n != name}
+        columns[name] = values
+        masks[name] = mask if mask is not None else np.zeros(len(values), dtype=bool)
+        kinds[name] = kind
+        return ColumnBatch(columns, masks, kinds, sources)
+    
+    # ------------------------------------------------------------------
+    # Serialisation
+    # ------------------------------------------------------------------
+    
+    def _json_fragments(self, name: str) -> List[str]:
+        """JSON-encode one column into a list of value fragments ('null' where masked)"""
+        arr = self.columns[name]
+        mask = self.masks[name]
+        kind = self.kinds[name]
+        
+        if kind == 'int':
+            frags = arr.astype(str).tolist()
+        elif kind == 'float':
+            mask = mask | ~np.isfinite(arr)
+            # Integral floats are sent as ints (PostgREST INTEGER columns reject 1.0)
+            frags = [str(int(v)) if v.is_integer() else repr(v)
+                     for v in np.where(mask, 0.0, arr).tolist()]
+        elif kind == 'bool':
+            frags = np.where(arr, 'true', 'false').tolist()
+        elif kind == 'timestamp' and name in self.sources:
+            frags = [json.dumps(v, ensure_ascii=False) for v in self.sources[name].tolist()]
+        elif kind == 'timestamp':
+            frags = ['"' + s + '"' for s in
+                     np.datetime_as_string(arr, unit='us', timezone='UTC').tolist()]
+        else:
+            frags = [json.dumps(v, ensure_ascii=False) for v in arr.tolist()]
+        
+        if mask.any():
+            for i in np.flatnonzero(mask).tolist():
+                frags[i] = 'null'
+        return frags
+    
+    def iter_json_rows(self, lowercase: bool = True) -> Iterator[str]:
+        """Yield one JSON object string per row, built column-wise"""
+        names = self.names
+        prefixes = [json.dumps(n.lower() if lowercase else n) + ':' for n in names]
+        fragments = [self._json_fragments(n) for n in names]
+        for row in zip(*fragments):
+            yield '{' + ','.join(map(str.__add__, prefixes, row)) + '}'
+    
+    def to_json_payload(self, lowercase: bool = True) -> str:
+        """Serialise the whole batch as a PostgREST JSON array body"""
+        return '[' + ','.join(self.iter_json_rows(lowercase=lowercase)) + ']'
+    
+    def to_records(self, lowercase: bool = False) -> List[Dict[str, Any]]:
+        """Materialise row dicts (only for callers that really need them)"""
+        return [json.loads(row) for row in self.iter_json_rows(lowercase=lowercase)]
+    
+    def to_arrow(self):
+        """Return a pyarrow.Table (requires pyarrow)"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("pyarrow is required for to_arrow() (pip install pyarrow)")
+        
+        arrays = []
+        for name in self.names:
+            arr = self.columns[name]
+            mask = self.masks[name]
+            kind = self.kinds[name]
+            if kind == 'timestamp':
+                arrays.append(pa.array(arr, mask=mask, type=pa.timestamp('us', tz='UTC')))
+            elif kind == 'str':
+                arrays.append(pa.array(arr, mask=mask, type=pa.string()))
+            else:
+                arrays.append(pa.array(arr, mask=mask))
+        return pa.Table.from_arrays(arrays, names=self.names)
+    
+    def to_dataframe(self):
+        """Return a pandas DataFrame using nullable extension dtypes"""
+        import pandas as pd
+        
+        data = {}
+        for name in self.names:
+            arr = self.columns[name]
+            mask = self.masks[name]
+            kind = self.kinds[name]
+            if kind == 'int':
+                data[name] = pd.arrays.IntegerArray(arr, mask)
+            elif kind == 'bool':
+                data[name] = pd.arrays.BooleanArray(arr, mask)
+            elif kind == 'float':
+                data[name] = pd.arrays.FloatingArray(np.where(mask, 0.0, arr), mask)
+            elif kind == 'timestamp':
+                data[name] = pd.to_datetime(arr).tz_localize('UTC')
+            else:
+                data[name] = arr
+        return pd.DataFrame(data)
+
+
+# ============================================================================
+# Batch Extraction
+# ============================================================================
+
+def _thumb_columns(payloads: List[Dict[str, Any]], key: str,
+                   sizes: Tuple[str, ...]) -> Tuple[Dict[str, List[Any]], List[Any]]:
+    per_size: Dict[str, List[Any]] = {s: [] for s in sizes}
+    as_json: List[Any] = []
+    for p in payloads:
+        # A missing key serialises as '{}', like extract_fields
+        d = p.get(key, {})
+        if isinstance(d, dict):
+            for s in sizes:
+                per_size[s].append(d.get(s, ""))
+            try:
+                as_json.append(json.dumps(d, ensure_ascii=False))
+            except Exception:
+                as_json.append("")
+        else:
+            for s in sizes:
+                per_size[s].append("")
+            as_json.append("")
+    return per_size, as_json
+
+
+def _header_size_columns(payloads: List[Dict[str, Any]]) -> Tuple[List[str], List[int], List[int]]:
+    sizes, widths, heights = [], [], []
+    for p in payloads:
+        hs = p.get('headerSize')
+        w = h = 0
+        if isinstance(hs, dict):
+            w = _as_int(hs.get('width') or 0) or 0
+            h = _as_int(hs.get('height') or 0) or 0
+        sizes.append(f"{w}x{h}" if w and h else "")
+        widths.append(w)
+        heights.append(h)
+    return sizes, widths, heights
+
+
+def _nested_columns(payloads: List[Dict[str, Any]], key: str, prefix: str,
+                    fields: Tuple[str, ...], slots: int = 3) -> Dict[str, List[Any]]:
+    out: Dict[str, List[Any]] = {f"{prefix}{i}_{f}": [] for i in range(1, slots + 1) for f in fields}
+    for p in payloads:
+        items = p.get(key)
+        if not isinstance(items, list):
+            items = []
+        for i in range(slots):
+            item = items[i] if i < len(items) and isinstance(items[i], dict) else None
+            for f in fields:
+                out[f"{prefix}{i + 1}_{f}"].append(item.get(f, "") if item else "")
+    return out
+
+
+def extract_columns(payloads: List[Dict[str, Any]],
+                    columns: Optional[Iterable[str]] = None,
+                    lowercase_keys: bool = False) -> ColumnBatch:
+    """
+    Extract a batch of raw API payloads into typed columns.
+    
+    Produces the same columns (and the same 'abouut' fallback) as
+    v2_id_scanner.extract_fields, but walks each column once across the
+    batch instead of building a dict per profile.
+    
+    Args:
+        payloads: Raw /api2/v2/users/ JSON objects
+        columns: Optional subset of PROFILE_SCHEMA columns to extract
+        lowercase_keys: Payloads are onlyfans_profiles rows (lowercase column
+            names, e.g. from fetch_page or the local mirror) instead of API
+            payloads; only the plain schema columns are read then
+    """
+    payloads = [p for p in payloads if isinstance(p, dict)]
+    wanted = set(columns) if columns is not None else set(PROFILE_KINDS)
+    
+    raw: Dict[str, List[Any]] = {}
+    
+    for name, kind in PROFILE_SCHEMA:
+        if name not in wanted or '_' in name:
+            continue
+        key = name.lower() if lowercase_keys else name
+        raw[name] = [p.get(key, "") for p in payloads]
+    
+    if 'about' in raw:
+        raw['about'] = [v if v else p.get('abouut', v)
+                        for v, p in zip(raw['about'], payloads)]
+    
+    if wanted & {'avatar_c50', 'avatar_c144', 'avatar_thumbs_json'}:
+        per_size, as_json = _thumb_columns(payloads, 'avatarThumbs', ('c50', 'c144'))
+        raw['avatar_c50'] = per_size['c50']
+        raw['avatar_c144'] = per_size['c144']
+        raw['avatar_thumbs_json'] = as_json
+    
+    if wanted & {'header_w480', 'header_w760', 'header_thumbs_json'}:
+        per_size, as_json = _thumb_columns(payloads, 'headerThumbs', ('w480', 'w760'))
+        raw['header_w480'] = per_size['w480']
+        raw['header_w760'] = per_size['w760']
+        raw['header_thumbs_json'] = as_json
+    
+    if wanted & {'header_size', 'header_width', 'header_height'}:
+        raw['header_size'], raw['header_width'], raw['header_height'] = _header_size_columns(payloads)
+    
+    if any(n.startswith('promotion') for n in wanted):
+        raw.update(_nested_columns(payloads, 'promotions', 'promotion',
+                                   ('id', 'price', 'discount', 'title')))
+    
+    if any(n.startswith('bundle') for n in wanted):
+        raw.update(_nested_columns(payloads, 'subscriptionBundles', 'bundle',
+                                   ('id', 'discount', 'duration', 'price', 'canBuy')))
+    
+    if 'raw_json' in wanted:
+        raw_json = []
+        for p in payloads:
+            try:
+                raw_json.append(json.dumps(p, ensure_ascii=False))
+            except Exception:
+                raw_json.append("")
+        raw['raw_json'] = raw_json
+    
+    built_columns: Dict[str, np.ndarray] = {}
+    built_masks: Dict[str, np.ndarray] = {}
+    kinds: Dict[str, str] = {}
+    sources: Dict[str, np.ndarray] = {}
+    for name, kind in PROFILE_SCHEMA:
+        if name not in wanted or name not in raw:
+            continue
+        built_columns[name], built_masks[name] = _build_column(raw[name], kind)
+        kinds[name] = kind
+        if kind == 'timestamp':
+            src = np.empty(len(raw[name]), dtype=object)
+            src[:] = [None if m else str(v) for v, m in zip(raw[name], built_masks[name])]
+            sources[name] = src
+    
+    return ColumnBatch(built_columns, built_masks, kinds, sources)
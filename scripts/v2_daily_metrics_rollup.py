@@ -0,0 +1,135 @@
+"""
+Incremental daily_creator_metrics rollup for OnlyFans V2
+- Aggregates only snapshots after the snapshot_id watermark (no full recompute)
+- Upserts per-creator, per-day max metrics and snapshot counts (rollup_daily_creator_metrics RPC)
+- Watermark advances in the same transaction as the upsert - safe to re-run or interrupt
+- First run backfills the whole snapshot table in batches
+- Run before v2_snapshot_retention.py so thinned snapshots are already counted
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+
+
+JOB_NAME = 'daily_creator_metrics'
+
+
+# ============================================================================
+# Rollup
+# ============================================================================
+
+class DailyMetricsRollup:
+    """Call the rollup RPC batch by batch until it catches up with the snapshot table"""
+    
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 batch_limit: int = 50000,
+                 lag_seconds: int = 300,
+                 max_batches: int = 0):
+        
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.batch_limit = batch_limit
+        self.lag_seconds = lag_seconds
+        self.max_batches = max_batches
+        
+        self.stats = {'batches': 0, 'snapshots': 0, 'creator_days': 0, 'start_watermark': None, 'watermark': None}
+    
+    async def run(self):
+        """Main rollup loop"""
+        mark = await self.db.get_watermark(JOB_NAME)
+        if mark is None:
+            print("❌ No daily_creator_metrics watermark - apply migrations 006 and 007 first")
+            return
+        self.stats['start_watermark'] = self.stats['watermark'] = int(mark['watermark'] or 0)
+        print(f"📊 Rolling up snapshots after snapshot_id {self.stats['watermark']}")
+        
+        started = time.time()
+        pbar = tqdm(desc="Rolling up snapshots", unit="snapshot")
+        try:
+            while not self.max_batches or self.stats['batches'] < self.max_batches:
+                result = await self.db.call_rpc('rollup_daily_creator_metrics', {
+                    'p_limit': self.batch_limit,
+                    'p_lag_seconds': self.lag_seconds
+                })
+                if not result:
+                    print("⚠️ Rollup batch failed - re-run to continue from the saved watermark")
+                    break
+                
+                batch = result[0]
+                self.stats['batches'] += 1
+                self.stats['snapshots'] += batch['snapshots']
+                self.stats['creator_days'] += batch['creator_days']
+                self.stats['watermark'] = batch['watermark']
+                pbar.update(batch['snapshots'])
+                
+                if batch['snapshots'] < self.batch_limit:
+                    break
+        finally:
+            pbar.close()
+        
+        self.print_summary(time.time() - started)
+    
+    def print_summary(self, elapsed: float):
+        """Print final summary"""
+        print("\n" + "="*60)
+        print("DAILY METRICS ROLLUP COMPLETE")
+        print("="*60)
+        print(f"Batches: {self.stats['batches']}")
+        print(f"Snapshots rolled up: {self.stats['snapshots']}")
+        print(f"Creator-days upserted: {self.stats['creator_days']}")
+        print(f"Watermark: {self.stats['start_watermark']} → {self.stats['watermark']}")
+        print(f"Elapsed: {elapsed:.1f}s")
+        print("="*60)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Daily Metrics Rollup')
+    
+    parser.add_argument('--batch-limit', type=int, default=50000,
+                       help='Snapshots aggregated per RPC call (default: 50000)')
+    parser.add_argument('--lag-seconds', type=int, default=300,
+                       help='Stop each batch at the first snapshot younger than this (default: 300)')
+    parser.add_argument('--max-batches', type=int, default=0,
+                       help='Stop after this many batches (default: 0 = until caught up)')
+    
+    args = parser.parse_args()
+    
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    rollup = DailyMetricsRollup(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        batch_limit=args.batch_limit,
+        lag_seconds=args.lag_seconds,
+        max_batches=args.max_batches
+    )
+    
+    asyncio.run(rollup.run())
+
+
+if __name__ == '__main__':
+    main()
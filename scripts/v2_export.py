@@ -0,0 +1,414 @@
+"""
+Bulk exporter for OnlyFans V2 tables
+- Streams onlyfans_profiles / onlyfans_profile_snapshots with keyset pagination (no OFFSET)
+- Several concurrent range readers, each paging its own slice of the key space
+- Bounded page queue + streaming part files: memory stays at a few pages + one row group per range
+- One explicit Parquet schema (from the table's column types) shared by every part; JSON columns as strings
+- Partitioned output: <out>/<table>/range=NNN/part-NNNNN.parquet (or .ndjson[.gz])
+- Resumable: the last exported key per range is saved after every file (--resume)
+- The last range is open-ended, so a later --resume also picks up new rows
+"""
+
+import asyncio
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, Optional, List
+from pathlib import Path
+
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+
+
+# Export name -> (table, keyset column)
+TABLES = {
+    'profiles': ('onlyfans_profiles', 'id'),
+    'snapshots': ('onlyfans_profile_snapshots', 'snapshot_id'),
+}
+
+STATE_FILE = '_export_state.json'
+
+
+# ============================================================================
+# Output Files
+# ============================================================================
+
+# Postgres type -> export kind (anything not listed is exported as a string)
+_PG_KINDS = {
+    'smallint': 'int', 'integer': 'int', 'bigint': 'int',
+    'real': 'float', 'double precision': 'float', 'numeric': 'float',
+    'boolean': 'bool',
+    'json': 'json', 'jsonb': 'json',
+}
+
+
+def pg_kind(pg_type: str) -> str:
+    """Export kind for a Postgres column type (arrays are exported as JSON text)"""
+    if pg_type.endswith('[]'):
+        return 'json'
+    return _PG_KINDS.get(pg_type, 'string')
+
+
+def infer_kind(values) -> str:
+    """Fallback kind from one page of values when the table's column types are unavailable"""
+    seen = {type(v) for v in values if v is not None}
+    if not seen:
+        return 'string'
+    if seen == {bool}:
+        return 'bool'
+    if seen <= {int, float}:
+        return 'float'  # NUMERIC comes back as 10 or 9.99, so a page of ints proves nothing
+    if seen & {dict, list}:
+        return 'json'
+    return 'string'
+
+
+def arrow_schema(columns: List[List[str]]):
+    import pyarrow as pa
+    types = {'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(),
+             'string': pa.string(), 'json': pa.string()}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _cell(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind == 'int':
+        return int(value)
+    if kind == 'float':
+        return float(value)
+    if kind == 'bool':
+        return bool(value)
+    if kind == 'string' and isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class PartWriter:
+    """One partition file written page by page (temp file, renamed into place on close)"""
+    
+    def __init__(self, path: Path, fmt: str, columns: Optional[List[List[str]]], row_group_rows: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.tmp = path.with_name(path.name + '.tmp')
+        self.fmt = fmt
+        self.columns = columns
+        self.row_group_rows = row_group_rows
+        self.pending: List[Dict[str, Any]] = []
+        self.rows = 0
+        self.last_key: Any = None
+        
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self.schema = arrow_schema(columns)
+            self.out = pq.ParquetWriter(self.tmp, self.schema, compression='zstd')
+        else:
+            opener = gzip.open if fmt == 'ndjson.gz' else open
+            self.out = opener(self.tmp, 'wt', encoding='utf-8')
+    
+    def write(self, rows: List[Dict[str, Any]]):
+        self.rows += len(rows)
+        if self.fmt != 'parquet':
+            for row in rows:
+                self.out.write(json.dumps(row, ensure_ascii=False, default=str))
+                self.out.write('\n')
+            return
+        self.pending.extend(rows)
+        if len(self.pending) >= self.row_group_rows:
+            self._write_row_group()
+    
+    def _write_row_group(self):
+        import pyarrow as pa
+        if not self.pending:
+            return
+        arrays = [
+            pa.array([_cell(row.get(name), kind) for row in self.pending], type=field.type)
+            for (name, kind), field in zip(self.columns, self.schema)
+        ]
+        self.out.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.pending = []
+    
+    def close(self):
+        if self.fmt == 'parquet':
+            self._write_row_group()
+        self.out.close()
+        os.replace(self.tmp, self.path)
+
+
+# ============================================================================
+# Exporter
+# ============================================================================
+
+class TableExporter:
+    """Concurrent keyset range readers -> bounded queue -> partitioned file writer"""
+    
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 table: str,
+                 output_dir: str,
+                 fmt: str = 'parquet',
+                 readers: int = 4,
+                 page_size: int = 1000,
+                 rows_per_file: int = 100000,
+                 row_group_rows: int = 10000,
+                 select: str = '*',
+                 resume: bool = False):
+        
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.name = table
+        self.table, self.key = TABLES[table]
+        self.fmt = fmt
+        self.readers = readers
+        self.page_size = page_size
+        self.rows_per_file = rows_per_file
+        self.row_group_rows = row_group_rows
+        self.select = select if select == '*' or self.key in select.split(',') else f'{self.key},{select}'
+        self.resume = resume
+        
+        self.root = Path(output_dir) / table
+        self.state_path = self.root / STATE_FILE
+        self.state: Dict[str, Any] = {}
+        self.columns: Optional[List[List[str]]] = None
+        
+        self.stats = {'rows': 0, 'files': 0, 'pages': 0, 'errors': 0}
+    
+    async def key_bounds(self) -> Optional[tuple]:
+        """(min key, max key) from two single-row index reads, or None if the table is empty"""
+        first = await self.db.fetch_page(self.table, self.key, key=self.key, limit=1)
+        last = await self.db.fetch_page(self.table, self.key, key=self.key, limit=1,
+                                        filters={'order': f'{self.key}.desc'})
+        if not first or not last:
+            return None
+        return first[0][self.key], last[0][self.key]
+    
+    def save_state(self):
+        tmp = self.state_path.with_name(STATE_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+    
+    async def init_state(self) -> bool:
+        """Load the resume state, or split the key space into `readers` ranges"""
+        if self.state_path.exists():
+            if not self.resume:
+                print(f"❌ {self.state_path} exists - pass --resume to continue it or choose another --output")
+                return False
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+            if self.state['format'] != self.fmt:
+                print(f"❌ Existing export is {self.state['format']}, not {self.fmt}")
+                return False
+            self.select = self.state['select']
+            self.columns = self.state.get('columns')
+            return True
+        
+        bounds = await self.key_bounds()
+        if bounds is None:
+            print(f"✅ {self.table} is empty")
+            return False
+        lo, hi = bounds
+        
+        # Equal-width key ranges; the last one stays open so later rows land in it
+        step = max((hi - lo + 1) // self.readers, 1)
+        edges = [lo + i * step for i in range(self.readers)] + [None]
+        ranges = [
+            {'range': i, 'from': edges[i], 'to': edges[i + 1], 'last_key': None, 'next_part': 0, 'rows': 0}
+            for i in range(self.readers) if edges[i + 1] is None or edges[i + 1] > edges[i]
+        ]
+        
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.state = {
+            'table': self.table,
+            'key': self.key,
+            'format': self.fmt,
+            'select': self.select,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'ranges': ranges,
+        }
+        self.save_state()
+        return True
+    
+    async def read_range(self, rng: Dict[str, Any], queue: asyncio.Queue):
+        """Page through one key range from its last exported key; puts (range, rows) then (range, None)"""
+        bounds = f'{self.key}.gte.{rng["from"]}'
+        if rng['to'] is not None:
+            bounds += f',{self.key}.lt.{rng["to"]}'
+        filters = {'and': f'({bounds})'}
+        after = rng['last_key']
+        
+        try:
+            while True:
+                rows = await self.db.fetch_page(self.table, self.select, after=after, key=self.key,
+                                                limit=self.page_size, filters=filters)
+                if rows is None:
+                    self.stats['errors'] += 1
+                    print(f"⚠️ Range {rng['range']} stopped after key {after} (re-run with --resume)")
+                    break
+                if not rows:
+                    break
+                self.stats['pages'] += 1
+                after = rows[-1][self.key]
+                await queue.put((rng['range'], rows))
+                if len(rows) < self.page_size:
+                    break
+        finally:
+            await queue.put((rng['range'], None))
+    
+    async def resolve_columns(self, page: List[Dict[str, Any]]):
+        """
+        Fix the Parquet columns once per export (saved in the state, so resumed parts match):
+        names from the first page, kinds from the table's Postgres types, else from the page.
+        """
+        types = await self.db.table_columns(self.table) or {}
+        if not types:
+            print("⚠️ Column types unavailable - inferring the Parquet schema from the first page")
+        self.columns = []
+        for name in page[0]:
+            if name in types:
+                kind = pg_kind(types[name])
+            elif name == self.key:
+                kind = 'int'
+            else:
+                kind = infer_kind(row.get(name) for row in page)
+            self.columns.append([name, kind])
+        self.state['columns'] = self.columns
+        self.save_state()
+    
+    async def close_part(self, rng: Dict[str, Any], writer: PartWriter):
+        """Finish one part file, then advance the range's resume key"""
+        await asyncio.to_thread(writer.close)
+        
+        rng['last_key'] = writer.last_key
+        rng['next_part'] += 1
+        rng['rows'] += writer.rows
+        self.save_state()
+        self.stats['files'] += 1
+    
+    async def run(self):
+        """Main export loop"""
+        if self.fmt == 'parquet':
+            try:
+                import pyarrow.parquet  # noqa: F401
+            except ImportError:
+                print("❌ pyarrow is required for Parquet output (pip install pyarrow) - or use --format ndjson")
+                return
+        
+        if not await self.init_state():
+            return
+        
+        ranges = {rng['range']: rng for rng in self.state['ranges']}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.readers * 2)
+        writers: Dict[int, PartWriter] = {}
+        
+        print(f"📤 Exporting {self.table} → {self.root} ({self.fmt}, {len(ranges)} ranges)")
+        readers = [asyncio.create_task(self.read_range(rng, queue)) for rng in ranges.values()]
+        pbar = tqdm(desc=f"Exporting {self.name}", unit="row")
+        
+        # Single writer: pages are appended to each range's open part file in key order,
+        # so only the queue and one Parquet row group per range are held in memory
+        open_ranges = len(readers)
+        try:
+            while open_ranges:
+                idx, rows = await queue.get()
+                rng = ranges[idx]
+                if rows is None:
+                    open_ranges -= 1
+                    if idx in writers:
+                        await self.close_part(rng, writers.pop(idx))
+                    continue
+                
+                if self.fmt == 'parquet' and self.columns is None:
+                    await self.resolve_columns(rows)
+                writer = writers.get(idx)
+                if writer is None:
+                    path = self.root / f"range={idx:03d}" / f"part-{rng['next_part']:05d}.{self.fmt}"
+                    writer = writers[idx] = PartWriter(path, self.fmt, self.columns, self.row_group_rows)
+                await asyncio.to_thread(writer.write, rows)
+                writer.last_key = rows[-1][self.key]
+                
+                self.stats['rows'] += len(rows)
+                pbar.update(len(rows))
+                if writer.rows >= self.rows_per_file:
+                    await self.close_part(rng, writers.pop(idx))
+        finally:
+            pbar.close()
+            for task in readers:
+                task.cancel()
+        
+        self.print_summary()
+    
+    def print_summary(self):
+        """Print final summary"""
+        print("\n" + "="*60)
+        print("EXPORT COMPLETE" if not self.stats['errors'] else "EXPORT INCOMPLETE")
+        print("="*60)
+        print(f"Table: {self.table}")
+        print(f"Rows exported this run: {self.stats['rows']}")
+        print(f"Files written this run: {self.stats['files']}")
+        print(f"Pages read: {self.stats['pages']}")
+        print(f"Rows in export: {sum(rng['rows'] for rng in self.state['ranges'])}")
+        if self.stats['errors']:
+            print(f"⚠️ {self.stats['errors']} range(s) stopped early - re-run with --resume")
+        print("="*60)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Table Exporter')
+    
+    parser.add_argument('--table', choices=sorted(TABLES), required=True, help='Table to export')
+    parser.add_argument('--output', default='exports', help='Output directory (default: exports)')
+    parser.add_argument('--format', choices=['parquet', 'ndjson', 'ndjson.gz'], default='parquet',
+                       help='Output format (default: parquet)')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent key-range readers (default: 4)')
+    parser.add_argument('--page-size', type=int, default=1000, help='Rows per keyset page (default: 1000)')
+    parser.add_argument('--rows-per-file', type=int, default=100000,
+                       help='Rows per output file (default: 100000)')
+    parser.add_argument('--row-group-rows', type=int, default=10000,
+                       help='Rows buffered per Parquet row group (default: 10000)')
+    parser.add_argument('--select', default='*', help='PostgREST column list (default: *)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an existing export from its last exported keys')
+    
+    args = parser.parse_args()
+    
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    exporter = TableExporter(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        table=args.table,
+        output_dir=args.output,
+        fmt=args.format,
+        readers=args.readers,
+        page_size=args.page_size,
+        rows_per_file=args.rows_per_file,
+        row_group_rows=args.row_group_rows,
+        select=args.select,
+        resume=args.resume
+    )
+    
+    asyncio.run(exporter.run())
+
+
+if __name__ == '__main__':
+    main()
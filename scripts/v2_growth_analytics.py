@@ -0,0 +1,290 @@
+"""
+Growth analytics for OnlyFans V2 creators
+- Streams recent onlyfans_profile_snapshots (keyset by snapshot_id) straight into column arrays
+- Vectorised NumPy group-by: latest value and the baseline at-or-before 7 / 30 days ago per creator
+- Favorites and posts deltas scaled to exactly 7 / 30 days, relative growth, 30-day price change
+- Writes one compact row per creator to creator_growth_metrics (migration 009), serialised column-wise
+- Rows for creators without a recent snapshot are removed at the end of each run
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+from v2_activity_classifier import parse_iso_timestamps
+from v2_columnar import ColumnBatch
+
+
+WINDOWS = (7, 30)
+METRIC_COLUMNS = ('favoritedcount', 'postscount', 'subscribeprice')
+INTEGER_COLUMNS = ('favoritedcount', 'postscount')
+_DAY = 86400.0
+
+
+# ============================================================================
+# Column Buffers
+# ============================================================================
+
+def _float_column(rows: List[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array([np.nan if r.get(key) is None else float(r[key]) for r in rows], dtype=np.float64)
+
+
+class SnapshotColumns:
+    """Snapshot metrics held as one array per column (pages are converted on arrival)"""
+    
+    def __init__(self):
+        self._chunks: Dict[str, List[np.ndarray]] = {c: [] for c in ('creator_id', 'captured_at') + METRIC_COLUMNS}
+        self.rows = 0
+    
+    def append(self, page: List[Dict[str, Any]]):
+        self._chunks['creator_id'].append(np.fromiter((r['creator_id'] for r in page), dtype=np.int64, count=len(page)))
+        self._chunks['captured_at'].append(parse_iso_timestamps(r.get('captured_at') for r in page))
+        for column in METRIC_COLUMNS:
+            self._chunks[column].append(_float_column(page, column))
+        self.rows += len(page)
+    
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            column: np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64 if column == 'creator_id' else np.float64)
+            for column, chunks in self._chunks.items()
+        }
+
+
+# ============================================================================
+# Vectorised Growth
+# ============================================================================
+
+def compute_growth(columns: Dict[str, np.ndarray], now: float,
+                   windows: Tuple[int, ...] = WINDOWS, min_baseline: float = 50.0) -> Dict[str, np.ndarray]:
+    """
+    Per-creator growth from snapshot columns (any order).
+    For each window w the baseline is the creator's last snapshot at or before now - w days.
+    Deltas are scaled by w / elapsed days so an older baseline does not inflate them.
+    A window is NaN when there is no baseline that old or the latest snapshot predates it.
+    """
+    creators = columns['creator_id']
+    times = columns['captured_at']
+    keep = ~np.isnan(times)
+    creators, times = creators[keep], times[keep]
+    values = {c: columns[c][keep] for c in METRIC_COLUMNS}
+    
+    order = np.lexsort((times, creators))
+    creators, times = creators[order], times[order]
+    values = {c: v[order] for c, v in values.items()}
+    
+    ids, starts = np.unique(creators, return_index=True)
+    ends = np.append(starts[1:], len(creators))
+    latest = ends - 1
+    
+    # Creator-major composite key, so one searchsorted finds every baseline at once
+    t0 = times.min() if len(times) else 0.0
+    span = max(now, times.max() if len(times) else now) - t0 + _DAY
+    group = np.repeat(np.arange(len(ids)), ends - starts)
+    composite = group * span + (times - t0)
+    
+    out: Dict[str, np.ndarray] = {
+        'creator_id': ids,
+        'latest_snapshot_at': times[latest],
+        'favoritedcount': values['favoritedcount'][latest],
+        'postscount': values['postscount'][latest],
+        'subscribeprice': values['subscribeprice'][latest],
+    }
+    
+    for w in windows:
+        cutoff = now - w * _DAY
+        base = np.searchsorted(composite, np.arange(len(ids)) * span + (cutoff - t0), side='right') - 1
+        valid = (base >= starts) & (times[latest] > cutoff)
+        base = np.where(valid, base, latest)
+        
+        elapsed_days = (times[latest] - times[base]) / _DAY
+        scale = np.where(valid & (elapsed_days > 0), w / np.maximum(elapsed_days, 1e-9), np.nan)
+        
+        fav_base = values['favoritedcount'][base]
+        fav_delta = (values['favoritedcount'][latest] - fav_base) * scale
+        out[f'fav_delta_{w}d'] = fav_delta
+        out[f'posts_delta_{w}d'] = (values['postscount'][latest] - values['postscount'][base]) * scale
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[f'fav_growth_{w}d'] = np.where(fav_base >= min_baseline, fav_delta / fav_base, np.nan)
+        if w == max(windows):
+            price_change = values['subscribeprice'][latest] - values['subscribeprice'][base]
+            out[f'price_change_{w}d'] = np.where(valid, price_change, np.nan)
+    
+    return out
+
+
+def growth_batch(growth: Dict[str, np.ndarray], computed_at: str) -> ColumnBatch:
+    """Column arrays -> creator_growth_metrics columns (NaN becomes NULL when written)"""
+    n = len(growth['creator_id'])
+    stamps = (growth['latest_snapshot_at'] * 1e6).astype(np.int64).astype('datetime64[us]')
+    batch = ColumnBatch({'creator_id': growth['creator_id'],
+                         'computed_at': np.full(n, computed_at, dtype=object),
+                         'latest_snapshot_at': stamps},
+                        {name: np.zeros(n, dtype=bool) for name in ('creator_id', 'computed_at', 'latest_snapshot_at')},
+                        {'creator_id': 'int', 'computed_at': 'str', 'latest_snapshot_at': 'timestamp'})
+    for column, values in growth.items():
+        if column in ('creator_id', 'latest_snapshot_at'):
+            continue
+        missing = np.isnan(values)
+        if column in INTEGER_COLUMNS:
+            batch = batch.with_column(column, np.where(missing, 0, values).astype(np.int64), 'int', missing)
+        else:
+            batch = batch.with_column(column, np.round(values, 6), 'float', missing)
+    return batch
+
+
+# ============================================================================
+# Analytics Job
+# ============================================================================
+
+class GrowthAnalytics:
+    """Load recent snapshots column-wise, compute growth, write creator_growth_metrics"""
+    
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 lookback_days: int = 45,
+                 min_baseline: float = 50.0,
+                 page_size: int = 1000,
+                 dry_run: bool = False):
+        
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.lookback_days = lookback_days
+        self.min_baseline = min_baseline
+        self.page_size = page_size
+        self.dry_run = dry_run
+        
+        self.stats = {'snapshots': 0, 'creators': 0, 'with_7d': 0, 'with_30d': 0}
+    
+    async def load_snapshots(self, since: str) -> Optional[SnapshotColumns]:
+        """Keyset pages by snapshot_id, starting at the first snapshot of the window"""
+        select = ','.join(('snapshot_id', 'creator_id', 'captured_at') + METRIC_COLUMNS)
+        filters = {'captured_at': f'gte.{since}'}
+        
+        first = await self.db.fetch_page('onlyfans_profile_snapshots', 'snapshot_id', key='captured_at',
+                                         limit=1, filters=filters)
+        if first is None:
+            return None
+        columns = SnapshotColumns()
+        if not first:
+            return columns
+        after = first[0]['snapshot_id'] - 1
+        
+        pbar = tqdm(desc="Loading snapshots", unit="snapshot")
+        try:
+            while True:
+                page = await self.db.fetch_page('onlyfans_profile_snapshots', select, after=after,
+                                                key='snapshot_id', limit=self.page_size, filters=filters)
+                if page is None:
+                    return None
+                if not page:
+                    break
+                columns.append(page)
+                pbar.update(len(page))
+                after = page[-1]['snapshot_id']
+                if len(page) < self.page_size:
+                    break
+        finally:
+            pbar.close()
+        return columns
+    
+    async def run(self):
+        """Main analytics run"""
+        started = time.time()
+        now = datetime.now(timezone.utc)
+        since = (now - timedelta(days=self.lookback_days)).isoformat()
+        
+        print(f"📈 Loading snapshots since {since[:10]} ({self.lookback_days} days)")
+        columns = await self.load_snapshots(since)
+        if columns is None:
+            print("❌ Failed to load snapshots")
+            return
+        self.stats['snapshots'] = columns.rows
+        if not columns.rows:
+            print("✅ No snapshots in the window")
+            return
+        
+        growth = compute_growth(columns.arrays(), now.timestamp(), min_baseline=self.min_baseline)
+        self.stats['creators'] = len(growth['creator_id'])
+        self.stats['with_7d'] = int(np.count_nonzero(~np.isnan(growth['fav_delta_7d'])))
+        self.stats['with_30d'] = int(np.count_nonzero(~np.isnan(growth['fav_delta_30d'])))
+        
+        if self.dry_run:
+            top = np.argsort(np.nan_to_num(growth['fav_delta_7d'], nan=-np.inf))[::-1][:10]
+            print("\n🔍 [DRY RUN] Top 7-day favorites gained:")
+            for i in top:
+                print(f"  {growth['creator_id'][i]}: +{growth['fav_delta_7d'][i]:.0f}")
+        else:
+            computed_at = now.isoformat()
+            if not await self.db.upsert_column_batch('creator_growth_metrics', growth_batch(growth, computed_at)):
+                print("⚠️ Some growth rows failed to upsert (migration 009 applied?) - keeping previous rows")
+            else:
+                # Creators with no snapshot in the lookback window drop off the lists
+                await self.db.delete_rows('creator_growth_metrics', {'computed_at': f'lt.{computed_at}'})
+        
+        self.print_summary(time.time() - started)
+    
+    def print_summary(self, elapsed: float):
+        """Print final summary"""
+        print("\n" + "="*60)
+        print("GROWTH ANALYTICS COMPLETE")
+        print("="*60)
+        print(f"Snapshots loaded: {self.stats['snapshots']}")
+        print(f"Creators: {self.stats['creators']}")
+        print(f"With 7-day baseline: {self.stats['with_7d']}")
+        print(f"With 30-day baseline: {self.stats['with_30d']}")
+        print(f"Elapsed: {elapsed:.1f}s")
+        print("="*60)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Growth Analytics')
+    
+    parser.add_argument('--lookback-days', type=int, default=45,
+                       help='Snapshot history to load; must exceed 30 to find 30-day baselines (default: 45)')
+    parser.add_argument('--min-baseline', type=float, default=50.0,
+                       help='Minimum favorites at the baseline for relative growth (default: 50)')
+    parser.add_argument('--page-size', type=int, default=1000, help='Snapshots per keyset page (default: 1000)')
+    parser.add_argument('--dry-run', action='store_true', help='Compute and print the top creators, no writes')
+    
+    args = parser.parse_args()
+    
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    analytics = GrowthAnalytics(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        lookback_days=args.lookback_days,
+        min_baseline=args.min_baseline,
+        page_size=args.page_size,
+        dry_run=args.dry_run
+    )
+    
+    asyncio.run(analytics.run())
+
+
+if __name__ == '__main__':
+    main()
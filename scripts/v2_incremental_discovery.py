@@ -8,6 +8,7 @@ Features:
 - Find new registrations
 - Update next_refresh_at for discovered creators
 - Can run daily to catch new sign-ups
+- Optional local mirror for max(id) (--mirror)
 """
 
 import asyncio
@@ -15,6 +16,7 @@ import argparse
 import os
 import sys
 from datetime import datetime
+from typing import Optional
 from pathlib import Path
 
 # Load environment variables from .env file
@@ -25,6 +27,7 @@ load_dotenv()
 sys.path.insert(0, str(Path(__file__).parent))
 from v2_shared_utils import SupabaseClient
 from v2_id_scanner import IDScanner
+from v2_local_mirror import open_synced_mirror
 
 
 # ============================================================================
@@ -37,13 +40,22 @@ class IncrementalDiscovery:
     def __init__(self,
                  supabase_url: str,
                  supabase_key: str,
-                 buffer_size: int = 10000):
+                 buffer_size: int = 10000,
+                 mirror_path: Optional[str] = None):
         
         self.db = SupabaseClient(supabase_url, supabase_key)
         self.buffer_size = buffer_size
+        self.mirror_path = mirror_path
     
     async def get_max_known_id(self) -> int:
         """Get highest creator ID currently in database"""
+        if self.mirror_path:
+            mirror = await open_synced_mirror(self.mirror_path, self.db)
+            try:
+                return mirror.max_id()
+            finally:
+                mirror.close()
+        
         endpoint = f"{self.db.url}/rest/v1/onlyfans_profiles"
         
         params = {
@@ -72,7 +84,8 @@ class IncrementalDiscovery:
         return progress.get('max_id_seen', 0) if progress else 0
     
     async def run(self, cookies_file: str, concurrency: int = 3, 
-                  rate: float = 1.0, proxies=None, dry_run: bool = False):
+                  rate: float = 1.0, proxies=None, dry_run: bool = False,
+                  workers: int = 0, worker_mode: str = 'thread'):
         """Main discovery loop"""
         
         print("="*60)
@@ -113,7 +126,9 @@ class IncrementalDiscovery:
             rate=rate,
             proxies=proxies,
             dry_run=dry_run,
-            resume=False  # Don't resume for discovery
+            resume=False,  # Don't resume for discovery
+            workers=workers,
+            worker_mode=worker_mode
         )
         
         # Run scanner
@@ -147,7 +162,13 @@ def main():
                        help='Concurrent requests (default: 3)')
     parser.add_argument('--rate', type=float, default=1.0, 
                        help='Requests per second (default: 1.0)')
+    parser.add_argument('--workers', type=int, default=0,
+                       help='Parse/extract worker pool size (default: 0 = inline)')
+    parser.add_argument('--worker-mode', choices=['thread', 'process'], default='thread',
+                       help='Worker pool type (default: thread)')
     parser.add_argument('--proxies', nargs='+', help='Proxy URLs')
+    parser.add_argument('--mirror', metavar='PATH',
+                       help='Read max(id) from a local mirror (v2_local_mirror.py), synced incrementally first')
     parser.add_argument('--dry-run', action='store_true', 
                        help='Dry run (no database writes)')
     
@@ -165,7 +186,8 @@ def main():
     discovery = IncrementalDiscovery(
         supabase_url=supabase_url or '',
         supabase_key=supabase_key or '',
-        buffer_size=args.buffer_size
+        buffer_size=args.buffer_size,
+        mirror_path=args.mirror
     )
     
     # Run
@@ -174,7 +196,9 @@ def main():
         concurrency=args.concurrency,
         rate=args.rate,
         proxies=args.proxies,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        workers=args.workers,
+        worker_mode=args.worker_mode
     ))
 
 
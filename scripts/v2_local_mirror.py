@@ -0,0 +1,417 @@
+"""
+Local SQLite mirror of onlyfans_profiles for OnlyFans V2 tooling
+- Incremental sync by the updated_at watermark (migration 012), else first_seen_at / last_refreshed_at
+- Keyset pagination on (watermark column, id) - no OFFSET scans, no full re-reads
+- Small overlap window on each watermark so late commits are not missed
+- Periodic id reconciliation removes rows deleted upstream (keyset pages of ids)
+- Local queries in milliseconds: due profiles, max(id), counts by status
+- Used by the refresh orchestrator, incremental discovery and the count scripts (--mirror)
+"""
+
+import asyncio
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+from pathlib import Path
+
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+
+
+DEFAULT_MIRROR_PATH = 'profiles_mirror.db'
+
+# Columns read by local tooling (lowercase, as stored in Postgres)
+MIRROR_COLUMNS = [
+    'id', 'username', 'name', 'status', 'isverified', 'isperformer', 'location',
+    'subscribeprice', 'favoritedcount', 'subscriberscount',
+    'postscount', 'photoscount', 'videoscount',
+    'first_seen_at', 'last_seen_at', 'last_refreshed_at', 'next_refresh_at',
+    'lastseen', 'firstpublishedpostdate',
+]
+TEXT_COLUMNS = ('username', 'name', 'status', 'location', 'lastseen', 'firstpublishedpostdate')
+TIMESTAMP_COLUMNS = ('first_seen_at', 'last_seen_at', 'last_refreshed_at', 'next_refresh_at')
+
+# Watermark columns, in sync order
+WATERMARKS = ('first_seen_at', 'last_refreshed_at')
+
+# Bumped by a trigger on every write (migration 012); replaces WATERMARKS when present
+UPDATED_AT = 'updated_at'
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    {', '.join(f'{c} NUMERIC' if c not in TEXT_COLUMNS + TIMESTAMP_COLUMNS
+               else f'{c} TEXT' for c in MIRROR_COLUMNS[1:])}
+);
+CREATE INDEX IF NOT EXISTS idx_mirror_next_refresh ON profiles(next_refresh_at, id);
+CREATE INDEX IF NOT EXISTS idx_mirror_status ON profiles(status);
+CREATE INDEX IF NOT EXISTS idx_mirror_username ON profiles(username COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def normalize_ts(value: Any) -> Optional[str]:
+    """Fixed-width UTC ISO string, so timestamps compare correctly as text"""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f+00:00')
+
+
+# ============================================================================
+# Mirror
+# ============================================================================
+
+class ProfileMirror:
+    """SQLite copy of onlyfans_profiles kept current with incremental keyset syncs"""
+    
+    def __init__(self, path: str = DEFAULT_MIRROR_PATH, overlap_minutes: float = 10.0,
+                 reconcile_hours: float = 24.0):
+        self.path = path
+        self.overlap = timedelta(minutes=overlap_minutes)
+        self.reconcile_interval = timedelta(hours=reconcile_hours)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self._add_missing_columns()
+    
+    def _add_missing_columns(self):
+        """Mirrors created by older versions get new columns; the next sync then re-copies every row"""
+        existing = {row['name'] for row in self.conn.execute('PRAGMA table_info(profiles)')}
+        missing = [c for c in MIRROR_COLUMNS if c not in existing]
+        if not missing:
+            return
+        with self.conn:
+            for c in missing:
+                kind = 'TEXT' if c in TEXT_COLUMNS + TIMESTAMP_COLUMNS else 'NUMERIC'
+                self.conn.execute(f'ALTER TABLE profiles ADD COLUMN {c} {kind}')
+            self.conn.execute("DELETE FROM sync_state WHERE name LIKE 'watermark:%' OR name = 'synced_at'")
+    
+    def close(self):
+        self.conn.close()
+    
+    def get_state(self, name: str) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM sync_state WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+    
+    def set_state(self, name: str, value: str):
+        self.conn.execute(
+            'INSERT INTO sync_state VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value',
+            (name, value))
+    
+    def upsert_rows(self, rows: List[Dict[str, Any]]):
+        """Write one page of PostgREST rows in a single transaction"""
+        placeholders = ','.join('?' * len(MIRROR_COLUMNS))
+        updates = ', '.join(f'{c} = excluded.{c}' for c in MIRROR_COLUMNS[1:])
+        values = [
+            tuple(normalize_ts(r.get(c)) if c in TIMESTAMP_COLUMNS else r.get(c) for c in MIRROR_COLUMNS)
+            for r in rows
+        ]
+        with self.conn:
+            self.conn.executemany(
+                f'INSERT INTO profiles ({",".join(MIRROR_COLUMNS)}) VALUES ({placeholders}) '
+                f'ON CONFLICT(id) DO UPDATE SET {updates}',
+                values)
+    
+    async def _sync_column(self, db: SupabaseClient, column: str, page_size: int, pbar: tqdm) -> int:
+        """Pull rows whose `column` moved past the stored watermark, keyset by (column, id)"""
+        watermark = self.get_state(f'watermark:{column}')
+        after: Optional[Tuple[str, int]] = None
+        since = None
+        if watermark:
+            since = (datetime.fromisoformat(watermark) - self.overlap).isoformat()
+        
+        select = ','.join(MIRROR_COLUMNS if column in MIRROR_COLUMNS else MIRROR_COLUMNS + [column])
+        synced = 0
+        while True:
+            filters = {'order': f'{column}.asc,id.asc'}
+            if after is not None:
+                last_ts, last_id = after
+                filters['or'] = f'({column}.gt."{last_ts}",and({column}.eq."{last_ts}",id.gt.{last_id}))'
+            elif since:
+                filters[column] = f'gte.{since}'
+            else:
+                filters[column] = 'not.is.null'
+            
+            rows = await db.fetch_page('onlyfans_profiles', select, limit=page_size, filters=filters)
+            if rows is None:
+                raise RuntimeError(f"Failed to fetch profiles by {column} after {after or since}")
+            if not rows:
+                break
+            
+            self.upsert_rows(rows)
+            last = rows[-1]
+            after = (last[column], last['id'])
+            with self.conn:
+                self.set_state(f'watermark:{column}', normalize_ts(last[column]))
+            synced += len(rows)
+            pbar.update(len(rows))
+            if len(rows) < page_size:
+                break
+        return synced
+    
+    async def _has_updated_at(self, db: SupabaseClient) -> bool:
+        """True once migration 012 added onlyfans_profiles.updated_at"""
+        return await db.fetch_page('onlyfans_profiles', UPDATED_AT, limit=1) is not None
+    
+    async def _sync_unstamped(self, db: SupabaseClient, page_size: int, pbar: tqdm) -> int:
+        """First sync only: rows with no first_seen_at (legacy CSV imports), keyset by id"""
+        last_id = None
+        synced = 0
+        while True:
+            rows = await db.fetch_page('onlyfans_profiles', ','.join(MIRROR_COLUMNS), after=last_id,
+                                       limit=page_size, filters={'first_seen_at': 'is.null'})
+            if rows is None:
+                raise RuntimeError(f"Failed to fetch unstamped profiles after id {last_id}")
+            if not rows:
+                break
+            self.upsert_rows(rows)
+            last_id = rows[-1]['id']
+            synced += len(rows)
+            pbar.update(len(rows))
+        return synced
+    
+    def _reconcile_due(self) -> bool:
+        reconciled_at = self.get_state('reconciled_at')
+        if reconciled_at is None:
+            return True
+        return datetime.now(timezone.utc) - datetime.fromisoformat(reconciled_at) >= self.reconcile_interval
+    
+    def _delete_missing(self, above: Optional[int], upto: Optional[int], upstream_ids: set) -> int:
+        """Delete local ids in (above, upto] that are not in upstream_ids; upto=None means no upper bound"""
+        sql = 'SELECT id FROM profiles WHERE id > ?'
+        params: Tuple[int, ...] = (above if above is not None else -1,)
+        if upto is not None:
+            sql += ' AND id <= ?'
+            params += (upto,)
+        missing = [(row[0],) for row in self.conn.execute(sql, params) if row[0] not in upstream_ids]
+        if missing:
+            with self.conn:
+                self.conn.executemany('DELETE FROM profiles WHERE id = ?', missing)
+        return len(missing)
+    
+    async def reconcile(self, db: SupabaseClient, page_size: int = 10000) -> int:
+        """
+        Remove mirror rows whose id no longer exists upstream. Watermark syncs never
+        see deletes, so upstream ids are paged by keyset and each page is compared
+        with the local ids in the same id range. Returns the number of rows removed.
+        """
+        started = datetime.now(timezone.utc).isoformat()
+        last_id = None
+        removed = 0
+        while True:
+            rows = await db.fetch_page('onlyfans_profiles', 'id', after=last_id, limit=page_size)
+            if rows is None:
+                raise RuntimeError(f"Failed to fetch profile ids after {last_id}")
+            if not rows:
+                break
+            page_last = rows[-1]['id']
+            removed += self._delete_missing(last_id, page_last, {r['id'] for r in rows})
+            last_id = page_last
+            if len(rows) < page_size:
+                break
+        # Everything past the last upstream id is gone
+        removed += self._delete_missing(last_id, None, set())
+        with self.conn:
+            self.set_state('reconciled_at', started)
+        return removed
+    
+    async def sync(self, db: SupabaseClient, page_size: int = 1000, full: bool = False,
+                   progress: bool = True, reconcile: bool = False) -> int:
+        """
+        Bring the mirror up to date. The first sync (or full=True) copies every row;
+        later syncs only read rows written since the last updated_at watermark (rows
+        first seen or refreshed since the last watermarks without migration 012).
+        Rows deleted upstream are removed by an id reconciliation on full syncs, when
+        reconcile=True, and otherwise once every reconcile_hours.
+        Returns the number of rows written.
+        """
+        if full:
+            with self.conn:
+                self.conn.execute("DELETE FROM sync_state WHERE name LIKE 'watermark:%'")
+        first_sync = full or self.get_state('synced_at') is None
+        # A mirror being filled from empty has nothing stale to remove
+        reconcile = reconcile or full or (self.max_id() > 0 and self._reconcile_due())
+        
+        started = datetime.now(timezone.utc).isoformat()
+        has_updated_at = await self._has_updated_at(db)
+        if not has_updated_at:
+            print("⚠️ onlyfans_profiles.updated_at missing (migration 012?) - "
+                  "writes that only change status or next_refresh_at are not synced")
+        pbar = tqdm(desc="Syncing mirror", unit="profile", disable=not progress)
+        try:
+            if first_sync:
+                # Every row is either unstamped or has first_seen_at, so one pass of each copies
+                # the table; writes from here on are picked up by the updated_at (or last_refreshed_at) watermark
+                synced = await self._sync_unstamped(db, page_size, pbar)
+                synced += await self._sync_column(db, 'first_seen_at', page_size, pbar)
+                with self.conn:
+                    self.set_state('watermark:last_refreshed_at', normalize_ts(started))
+                    if has_updated_at:
+                        self.set_state(f'watermark:{UPDATED_AT}', normalize_ts(started))
+            else:
+                synced = 0
+                for column in ((UPDATED_AT,) if has_updated_at else WATERMARKS):
+                    synced += await self._sync_column(db, column, page_size, pbar)
+        finally:
+            pbar.close()
+        
+        if reconcile:
+            removed = await self.reconcile(db)
+            if removed:
+                print(f"🧹 Removed {removed} profiles deleted upstream")
+        elif self.get_state('reconciled_at') is None:
+            with self.conn:
+                self.set_state('reconciled_at', started)
+        with self.conn:
+            self.set_state('synced_at', started)
+        return synced
+    
+    def synced_at(self) -> Optional[str]:
+        return self.get_state('synced_at')
+    
+    def max_id(self) -> int:
+        return self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM profiles').fetchone()[0]
+    
+    def count(self, status: Optional[str] = None) -> int:
+        if status:
+            return self.conn.execute('SELECT COUNT(*) FROM profiles WHERE status = ?', (status,)).fetchone()[0]
+        return self.conn.execute('SELECT COUNT(*) FROM profiles').fetchone()[0]
+    
+    def status_counts(self) -> Dict[str, int]:
+        return {
+            status or 'unknown': count
+            for status, count in self.conn.execute(
+                'SELECT status, COUNT(*) FROM profiles GROUP BY status ORDER BY 2 DESC')
+        }
+    
+    def lookup(self, ids: List[int] = (), usernames: List[str] = (),
+               chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """Known profiles by id or username (case-insensitive), in chunked IN (...) queries"""
+        rows: Dict[int, Dict[str, Any]] = {}
+        for column, values in (('id', list(ids)), ('username COLLATE NOCASE', list(usernames))):
+            for i in range(0, len(values), chunk_size):
+                chunk = values[i:i + chunk_size]
+                for row in self.conn.execute(
+                        f'SELECT id, username, status, last_refreshed_at FROM profiles '
+                        f'WHERE {column} IN ({",".join("?" * len(chunk))})', chunk):
+                    rows[row['id']] = dict(row)
+        return list(rows.values())
+    
+    def iter_pages(self, columns: List[str], statuses: Optional[Tuple[str, ...]] = None,
+                   page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Yield pages of profiles in id order, optionally only the given statuses"""
+        sql = f'SELECT {",".join(columns)} FROM profiles'
+        params: Tuple[str, ...] = ()
+        if statuses:
+            sql += f' WHERE status IN ({",".join("?" * len(statuses))})'
+            params = tuple(statuses)
+        cursor = self.conn.execute(sql + ' ORDER BY id', params)
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            yield [dict(row) for row in rows]
+    
+    def due_profiles(self, cutoff: str, limit: Optional[int] = None,
+                     priority_only: bool = False) -> List[Dict[str, Any]]:
+        """Same rows/order as the orchestrator's due query: never-scheduled first, then oldest due"""
+        return list(self.iter_due_profiles(cutoff, priority_only, limit=limit))
+    
+    def iter_due_profiles(self, cutoff: str, priority_only: bool = False,
+                          page_size: int = 1000, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield due profiles ({id, username, status, isverified, next_refresh_at})"""
+        cutoff = normalize_ts(cutoff)
+        where = '(next_refresh_at IS NULL OR next_refresh_at < ?)'
+        if priority_only:
+            where += ' AND isverified = 1'
+        sql = (f'SELECT id, username, status, isverified, next_refresh_at FROM profiles WHERE {where} '
+               f'ORDER BY next_refresh_at IS NOT NULL, next_refresh_at, id')
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        
+        cursor = self.conn.execute(sql, (cutoff,))
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            for row in rows:
+                profile = dict(row)
+                profile['isverified'] = bool(profile['isverified'])
+                yield profile
+
+
+async def open_synced_mirror(path: str, db: SupabaseClient) -> ProfileMirror:
+    """Open the mirror at `path` and run an incremental sync before reading from it"""
+    mirror = ProfileMirror(path)
+    synced = await mirror.sync(db)
+    print(f"🪞 Mirror {path}: {synced} rows synced, {mirror.count()} profiles")
+    return mirror
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Local Profile Mirror')
+    
+    parser.add_argument('--mirror', default=DEFAULT_MIRROR_PATH, help=f'SQLite file (default: {DEFAULT_MIRROR_PATH})')
+    parser.add_argument('--sync', action='store_true', help='Incremental sync from Supabase')
+    parser.add_argument('--full', action='store_true', help='With --sync: ignore watermarks and re-copy every row')
+    parser.add_argument('--reconcile', action='store_true',
+                        help='With --sync: remove rows deleted upstream now (otherwise at most once per --reconcile-hours)')
+    parser.add_argument('--reconcile-hours', type=float, default=24.0,
+                        help='Hours between automatic id reconciliations (default: 24)')
+    parser.add_argument('--page-size', type=int, default=1000, help='Rows per keyset page (default: 1000)')
+    parser.add_argument('--counts', action='store_true', help='Print profile counts by status')
+    
+    args = parser.parse_args()
+    mirror = ProfileMirror(args.mirror, reconcile_hours=args.reconcile_hours)
+    
+    try:
+        if args.sync:
+            supabase_url = os.getenv('SUPABASE_URL')
+            supabase_key = os.getenv('SUPABASE_KEY')
+            
+            if not supabase_url or not supabase_key:
+                print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+                sys.exit(1)
+            
+            db = SupabaseClient(supabase_url, supabase_key)
+            synced = asyncio.run(mirror.sync(db, page_size=args.page_size, full=args.full,
+                                                reconcile=args.reconcile))
+            print(f"✅ Synced {synced} rows")
+        
+        if args.counts:
+            for status, count in mirror.status_counts().items():
+                print(f"  {status}: {count}")
+        
+        print(f"🪞 {args.mirror}: {mirror.count()} profiles, max id {mirror.max_id()}, "
+              f"synced at {mirror.synced_at() or 'never'}")
+    finally:
+        mirror.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Snapshot partition manager for OnlyFans V2
+- onlyfans_profile_snapshots is range-partitioned by month on captured_at (migration 008)
+- Creates monthly partitions ahead of time so inserts never fall into the default partition
+- Lists partitions with bounds, estimated rows and size
+- Retires old months with a detach (kept as a standalone table) or detach + drop
+- Re-attaches a detached month
+- Safe to run from cron: every operation is idempotent
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+
+
+def months_before(ts: datetime, months: int) -> datetime:
+    """First day of the month `months` before ts (UTC)"""
+    index = ts.year * 12 + (ts.month - 1) - months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+# ============================================================================
+# Partition Manager
+# ============================================================================
+
+class PartitionManager:
+    """Thin wrapper over the partition RPCs in migration 008"""
+    
+    def __init__(self, supabase_url: str, supabase_key: str, dry_run: bool = False):
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.dry_run = dry_run
+    
+    async def list_partitions(self) -> Optional[List[Dict[str, Any]]]:
+        return await self.db.call_rpc('snapshot_partitions')
+    
+    async def ensure(self, months_ahead: int) -> Optional[List[str]]:
+        """Create partitions through months_ahead months past the current one"""
+        if self.dry_run:
+            print(f"🔍 [DRY RUN] Would ensure partitions {months_ahead} months ahead")
+            return []
+        return await self.db.call_rpc('ensure_snapshot_partitions', {'p_months_ahead': months_ahead})
+    
+    async def retire(self, keep_months: int, drop: bool) -> Optional[List[str]]:
+        """Detach (or drop) partitions that end before the oldest month to keep"""
+        before = months_before(datetime.now(timezone.utc), keep_months)
+        if self.dry_run:
+            partitions = await self.list_partitions() or []
+            names = [p['partition_name'] for p in partitions
+                     if not p['is_default'] and p['range_to']
+                     and datetime.fromisoformat(p['range_to']) <= before]
+            print(f"🔍 [DRY RUN] Would {'drop' if drop else 'detach'} {len(names)} partition(s) ending before {before.date()}")
+            return names
+        return await self.db.call_rpc('retire_snapshot_partitions', {
+            'p_before': before.isoformat(),
+            'p_drop': drop
+        })
+    
+    async def attach(self, name: str, range_from: str, range_to: str) -> Optional[str]:
+        if self.dry_run:
+            print(f"🔍 [DRY RUN] Would attach {name} for [{range_from}, {range_to})")
+            return name
+        return await self.db.call_rpc('attach_snapshot_partition', {
+            'p_name': name,
+            'p_from': range_from,
+            'p_to': range_to
+        })
+    
+    @staticmethod
+    def print_partitions(partitions: List[Dict[str, Any]]):
+        print(f"\n{'Partition':<45} {'From':<12} {'To':<12} {'Rows (est)':>12} {'Size':>10}")
+        for p in partitions:
+            start = '' if p['is_default'] else (p['range_from'] or 'MINVALUE')[:10]
+            end = 'DEFAULT' if p['is_default'] else (p['range_to'] or '')[:10]
+            size_mb = (p['total_bytes'] or 0) / 1024 / 1024
+            print(f"{p['partition_name']:<45} {start:<12} {end:<12} {p['est_rows']:>12} {size_mb:>8.1f}MB")
+        
+        default = next((p for p in partitions if p['is_default']), None)
+        if default and default['est_rows']:
+            print(f"\n⚠️ Default partition holds ~{default['est_rows']} rows - "
+                  f"move them out before creating partitions over their range")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Snapshot Partition Manager')
+    
+    parser.add_argument('--ensure-ahead', type=int, default=3,
+                       help='Create monthly partitions this many months ahead (default: 3, 0 = skip)')
+    parser.add_argument('--retire-older-than', type=int, metavar='MONTHS',
+                       help='Detach partitions ending before this many months ago')
+    parser.add_argument('--drop', action='store_true', help='With --retire-older-than: drop instead of keeping detached tables')
+    parser.add_argument('--attach', nargs=3, metavar=('NAME', 'FROM', 'TO'),
+                       help='Re-attach a detached partition for [FROM, TO)')
+    parser.add_argument('--list', action='store_true', help='List partitions')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would change')
+    
+    args = parser.parse_args()
+    
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    manager = PartitionManager(supabase_url, supabase_key, dry_run=args.dry_run)
+    
+    async def run():
+        if args.attach:
+            name = await manager.attach(*args.attach)
+            print(f"🔗 Attached {name}" if name else "⚠️ Attach failed")
+        
+        if args.ensure_ahead:
+            created = await manager.ensure(args.ensure_ahead)
+            if created is None:
+                print("⚠️ ensure_snapshot_partitions failed (migration 008 applied?)")
+                sys.exit(1)
+            print(f"📅 Partitions in place through {args.ensure_ahead} months ahead ({len(created)} created)")
+        
+        if args.retire_older_than is not None:
+            retired = await manager.retire(args.retire_older_than, args.drop)
+            if retired is None:
+                print("⚠️ retire_snapshot_partitions failed")
+                sys.exit(1)
+            verb = 'Would retire' if args.dry_run else ('Dropped' if args.drop else 'Detached')
+            for name in retired:
+                print(f"🗄️ {verb}: {name}")
+        
+        if args.list:
+            partitions = await manager.list_partitions()
+            if partitions is None:
+                print("⚠️ snapshot_partitions failed (migration 008 applied?)")
+                sys.exit(1)
+            manager.print_partitions(partitions)
+    
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+OnlyFans V2 Offline Re-classification - Re-tier existing profiles without re-scraping
+
+Features:
+- Streams onlyfans_profiles in keyset-paginated chunks (id > last_id, no OFFSET)
+- Optional local mirror as the input (--mirror), synced incrementally first
+- Extracts each chunk into typed columns (v2_columnar) and classifies them vectorised
+- Same status rule as the refresh orchestrator (v2_activity_classifier.activity_status),
+  so the two jobs never flip a creator back and forth
+- Tunable thresholds (same rules as the scanner filter)
+- Writes status changes back as set-based PATCH ...?id=in.(...) batches
+- Dry-run mode prints the transitions without writing
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Any, List, Tuple, Optional
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+from v2_local_mirror import open_synced_mirror
+from v2_activity_classifier import ActivityRules, ActivityCutoffs, classify_column_batch, activity_statuses
+from v2_columnar import extract_columns
+
+
+# Columns needed by the classifier (lowercase, as stored in onlyfans_profiles)
+SELECT_COLUMNS = 'id,status,postscount,photoscount,videoscount,favoritedcount,isverified,lastseen,firstpublishedpostdate'
+
+# The same columns as PROFILE_SCHEMA names
+CLASSIFIER_COLUMNS = ('postsCount', 'photosCount', 'videosCount', 'favoritedCount',
+                      'isVerified', 'lastSeen', 'firstPublishedPostDate')
+
+
+# ============================================================================
+# Chunk Classification
+# ============================================================================
+
+def reclassify_chunk(rows: List[Dict[str, Any]], cutoffs: ActivityCutoffs,
+                     inactive_status: str = 'inactive') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Classify one chunk of DB rows.
+    Returns (ids, old_status, new_status) arrays for rows whose status changes.
+    """
+    ids = np.fromiter((r['id'] for r in rows), dtype=np.int64, count=len(rows))
+    old_status = np.array([r.get('status') or 'active' for r in rows], dtype=object)
+    
+    codes = classify_column_batch(extract_columns(rows, CLASSIFIER_COLUMNS, lowercase_keys=True), cutoffs)
+    new_status = activity_statuses(codes, inactive_status)
+    
+    changed = new_status != old_status
+    return ids[changed], old_status[changed], new_status[changed]
+
+
+# ============================================================================
+# Re-classifier
+# ============================================================================
+
+class ProfileReclassifier:
+    """Stream profiles, re-run the activity rules and write back status changes"""
+    
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 rules: ActivityRules,
+                 chunk_size: int = 1000,
+                 statuses: Tuple[str, ...] = ('active', 'inactive'),
+                 inactive_status: str = 'inactive',
+                 dry_run: bool = False,
+                 mirror_path: Optional[str] = None):
+        
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.mirror_path = mirror_path
+        self.cutoffs = ActivityCutoffs(rules)
+        self.chunk_size = chunk_size
+        self.statuses = statuses
+        self.inactive_status = inactive_status
+        self.dry_run = dry_run
+        
+        # Stats
+        self.stats = {
+            'total_scanned': 0,
+            'total_changed': 0,
+            'total_written': 0,
+            'transitions': {}
+        }
+    
+    async def iter_chunks(self):
+        """Yield keyset-paginated chunks of profiles (prefetching the next chunk)"""
+        if self.mirror_path:
+            mirror = await open_synced_mirror(self.mirror_path, self.db)
+            try:
+                for rows in mirror.iter_pages(SELECT_COLUMNS.split(','), self.statuses, self.chunk_size):
+                    yield rows
+            finally:
+                mirror.close()
+            return
+        
+        filters = {'status': f"in.({','.join(self.statuses)})"}
+        last_id = None
+        
+        next_page = asyncio.ensure_future(
+            self.db.fetch_page('onlyfans_profiles', SELECT_COLUMNS, after=last_id,
+                               limit=self.chunk_size, filters=filters))
+        while True:
+            rows = await next_page
+            if rows is None:
+                raise RuntimeError(f"Failed to fetch profiles after id {last_id}")
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            if len(rows) == self.chunk_size:
+                next_page = asyncio.ensure_future(
+                    self.db.fetch_page('onlyfans_profiles', SELECT_COLUMNS, after=last_id,
+                                       limit=self.chunk_size, filters=filters))
+            else:
+                next_page = asyncio.ensure_future(asyncio.sleep(0, result=[]))
+            yield rows
+    
+    async def apply_changes(self, ids: np.ndarray, new_status: np.ndarray) -> int:
+        """Group changed ids by target status and PATCH each group"""
+        written = 0
+        for status in np.unique(new_status):
+            group = ids[new_status == status].tolist()
+            if self.dry_run:
+                written += len(group)
+                continue
+            written += await self.db.patch_rows('onlyfans_profiles', group, {'status': status})
+        return written
+    
+    async def run(self):
+        """Main re-classification loop"""
+        print("="*60)
+        print("OFFLINE RE-CLASSIFICATION")
+        print("="*60)
+        print(f"Rules: {self.cutoffs.rules.to_dict()}")
+        if self.dry_run:
+            print("🔍 DRY RUN MODE - No database writes")
+        print()
+        
+        start = time.time()
+        pbar = tqdm(desc="Re-classifying", unit="profile")
+        
+        async for rows in self.iter_chunks():
+            ids, old_status, new_status = reclassify_chunk(rows, self.cutoffs, self.inactive_status)
+            
+            self.stats['total_scanned'] += len(rows)
+            self.stats['total_changed'] += len(ids)
+            for old, new in zip(old_status.tolist(), new_status.tolist()):
+                key = f'{old}_to_{new}'
+                self.stats['transitions'][key] = self.stats['transitions'].get(key, 0) + 1
+            
+            if len(ids):
+                self.stats['total_written'] += await self.apply_changes(ids, new_status)
+            
+            pbar.update(len(rows))
+            pbar.set_postfix({'changed': self.stats['total_changed']})
+        
+        pbar.close()
+        self.print_summary(time.time() - start)
+    
+    def print_summary(self, elapsed: float):
+        """Print final summary"""
+        print("\n" + "="*60)
+        print("RE-CLASSIFICATION COMPLETE")
+        print("="*60)
+        print(f"Profiles scanned: {self.stats['total_scanned']}")
+        print(f"Status changes: {self.stats['total_changed']}")
+        print(f"{'Would write' if self.dry_run else 'Written'}: {self.stats['total_written']}")
+        print(f"Elapsed: {elapsed:.1f}s")
+        
+        if self.stats['transitions']:
+            print("\nTransitions:")
+            for change, count in sorted(self.stats['transitions'].items()):
+                print(f"  {change}: {count}")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    defaults = ActivityRules()
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Offline Re-classification')
+    
+    # Options
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Profiles per page (default: 1000)')
+    parser.add_argument('--statuses', default='active,inactive',
+                       help='Comma-separated statuses to re-evaluate (default: active,inactive)')
+    parser.add_argument('--inactive-status', default='inactive',
+                       help='Status written for inactive/abandoned creators (default: inactive)')
+    parser.add_argument('--dry-run', action='store_true', help='Dry run (no database writes)')
+    parser.add_argument('--mirror', metavar='PATH',
+                       help='Read profiles from a local mirror (v2_local_mirror.py), synced incrementally first')
+    
+    # Thresholds
+    for name, value in defaults.to_dict().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value,
+                           help=f'Activity rule threshold (default: {value})')
+    
+    args = parser.parse_args()
+    
+    # Environment variables
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    rules = ActivityRules(**{name: getattr(args, name) for name in defaults.to_dict()})
+    
+    reclassifier = ProfileReclassifier(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        rules=rules,
+        chunk_size=args.chunk_size,
+        statuses=tuple(s.strip() for s in args.statuses.split(',') if s.strip()),
+        inactive_status=args.inactive_status,
+        dry_run=args.dry_run,
+        mirror_path=args.mirror
+    )
+    
+    # Run
+    asyncio.run(reclassifier.run())
+
+
+if __name__ == '__main__':
+    main()
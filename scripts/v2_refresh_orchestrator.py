@@ -4,10 +4,18 @@ Re-scrapes existing creators to update metrics and create new snapshots
 
 Features:
 - Query profiles due for refresh (next_refresh_at < NOW)
-- Adaptive refresh schedule based on status
+- Refresh schedule based on status, or adaptive from snapshot change rates (--adaptive)
+- Load-levelled due dates across hourly slots (--slot-capacity)
+- Executes budgeted plans from v2_refresh_planner.py (--plan)
+- Navigates by numeric id; renames are recorded in the local username index
 - Priority tiers (verified creators refresh more often)
 - Snapshot creation for growth tracking
-- Status detection (active → inactive → deleted)
+- Status detection (active → inactive → deleted) from API outcomes, with the
+  shared activity rules (same as v2_reclassify_profiles.py)
+- Daemon mode: keyset-paginated sweeps by (next_refresh_at, id) with page prefetch
+- Pipelined refresh: bounded queue -> concurrent fetch workers -> batched writer
+- Restricted / expired-auth responses never mark a creator deleted
+- Optional local mirror for the due query (--mirror)
 """
 
 import asyncio
@@ -29,13 +37,39 @@ load_dotenv()
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from v2_shared_utils import SupabaseClient, RateLimiter, ProxyPool, UserAgentRotator
-from v2_id_scanner import extract_fields, is_deleted_page
+from v2_id_scanner import extract_fields
+from v2_refresh_planner import load_plan
+from v2_username_index import UsernameIndex, DEFAULT_INDEX_PATH
+from v2_local_mirror import open_synced_mirror
+from v2_activity_classifier import ActivityCutoffs, activity_status
+from v2_refresh_scheduler import AdaptiveScheduler, ChangeRateEstimator, SlotScheduler, fixed_interval_days
+from v2_response_outcomes import (
+    classify_api_response, classify_page_dom, OutcomeRecorder, OutcomeTally,
+    PROFILE, NOT_FOUND, NON_PERFORMER, RESTRICTED, AUTH_EXPIRED, TRANSIENT_ERROR
+)
 
 
 # ============================================================================
 # Refresh Orchestrator
 # ============================================================================
 
+def refresh_snapshot(creator_id: int, profile_data: Dict[str, Any]) -> Dict[str, Any]:
+    """onlyfans_profile_snapshots row for a refreshed profile (extract_fields output)"""
+    return {
+        'creator_id': creator_id,
+        'subscribePrice': profile_data.get('subscribePrice'),
+        'favoritedCount': profile_data.get('favoritedCount'),
+        'subscribersCount': profile_data.get('subscribersCount'),
+        'postsCount': profile_data.get('postsCount'),
+        'photosCount': profile_data.get('photosCount'),
+        'videosCount': profile_data.get('videosCount'),
+        'audiosCount': profile_data.get('audiosCount'),
+        'isVerified': profile_data.get('isVerified'),
+        'bundle1_price': profile_data.get('bundle1_price'),
+        'promotion1_price': profile_data.get('promotion1_price'),
+    }
+
+
 class RefreshOrchestrator:
     """Re-scrape existing creators to update metrics and snapshots"""
     
@@ -48,12 +82,28 @@ class RefreshOrchestrator:
                  rate: float = 1.0,
                  proxies: Optional[List[str]] = None,
                  dry_run: bool = False,
-                 priority_only: bool = False):
+                 priority_only: bool = False,
+                 daemon: bool = False,
+                 idle_sleep: float = 300.0,
+                 write_batch: int = 50,
+                 flush_interval: float = 5.0,
+                 adaptive: bool = False,
+                 target_probability: float = 0.5,
+                 slot_capacity: int = 0,
+                 plan_file: Optional[str] = None,
+                 username_index: Optional[str] = DEFAULT_INDEX_PATH,
+                 mirror_path: Optional[str] = None):
         
         self.batch_size = batch_size
         self.concurrency = concurrency
         self.dry_run = dry_run
         self.priority_only = priority_only
+        self.daemon = daemon
+        self.idle_sleep = idle_sleep
+        self.plan_file = plan_file
+        self.mirror_path = mirror_path if not dry_run else None
+        self.write_batch_size = write_batch
+        self.flush_interval = flush_interval
         
         # Load cookies
         with open(cookies_file, 'r') as f:
@@ -65,11 +115,26 @@ class RefreshOrchestrator:
         self.proxy_pool = ProxyPool(proxies or [])
         self.ua_rotator = UserAgentRotator()
         
+        # Adaptive refresh intervals from snapshot history (fixed tiers otherwise)
+        self.scheduler = None
+        if adaptive and not dry_run:
+            self.scheduler = AdaptiveScheduler(self.db, ChangeRateEstimator(target_probability=target_probability))
+        
+        # Local username <-> id history
+        self.username_index = UsernameIndex(username_index) if username_index and not dry_run else None
+        
+        # Load levelling: spread due dates over hourly slots of slot_capacity refreshes
+        self.slots = SlotScheduler(slot_capacity) if slot_capacity and not dry_run else None
+        
+        # Activity cutoffs (recomputed hourly, not per profile)
+        self.cutoffs = ActivityCutoffs()
+        
         # Stats
         self.stats = {
             'total_attempted': 0,
             'total_success': 0,
             'total_errors': 0,
+            'renamed': 0,
             'status_changes': {
                 'active_to_inactive': 0,
                 'active_to_deleted': 0,
@@ -78,6 +143,9 @@ class RefreshOrchestrator:
             }
         }
         
+        # Outcome and decisive signal per profile, tallied for the run
+        self.outcomes = OutcomeTally()
+        
         # Semaphore for concurrency control
         self.semaphore = asyncio.Semaphore(concurrency)
         
@@ -93,6 +161,15 @@ class RefreshOrchestrator:
                 {'id': 789012, 'username': 'test_user2', 'status': 'active'}
             ]
         
+        # Local mirror: synced incrementally, then queried without touching Supabase
+        if self.mirror_path:
+            mirror = await open_synced_mirror(self.mirror_path, self.db)
+            try:
+                return mirror.due_profiles(datetime.utcnow().isoformat(), limit=self.batch_size,
+                                           priority_only=self.priority_only)
+            finally:
+                mirror.close()
+        
         # Query Supabase for profiles due for refresh
         endpoint = f"{self.db.url}/rest/v1/onlyfans_profiles"
         
@@ -125,8 +202,101 @@ class RefreshOrchestrator:
             print(f"⚠️ Error fetching profiles: {e}")
             return []
     
-    async def refresh_profile(self, browser: Browser, profile: Dict[str, Any]) -> bool:
-        """Refresh single profile and update metrics"""
+    async def fetch_due_page(self, cutoff: str, phase: str, after: Optional[Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch one keyset page of due profiles (no OFFSET scans).
+        phase 'null': never-scheduled profiles ordered by id, `after` is the last id.
+        phase 'due': next_refresh_at < cutoff ordered by (next_refresh_at, id),
+        `after` is the last (next_refresh_at, id) pair.
+        Returns None on failure.
+        """
+        params = {
+            'select': 'id,username,status,isverified,next_refresh_at',
+            'limit': str(self.batch_size)
+        }
+        if self.priority_only:
+            params['isverified'] = 'eq.true'
+        
+        if phase == 'null':
+            params['next_refresh_at'] = 'is.null'
+            params['order'] = 'id.asc'
+            if after is not None:
+                params['id'] = f'gt.{after}'
+        else:
+            params['next_refresh_at'] = f'lt.{cutoff}'
+            params['order'] = 'next_refresh_at.asc,id.asc'
+            if after is not None:
+                last_ts, last_id = after
+                params['or'] = f'(next_refresh_at.gt."{last_ts}",and(next_refresh_at.eq."{last_ts}",id.gt.{last_id}))'
+        
+        endpoint = f"{self.db.url}/rest/v1/onlyfans_profiles"
+        try:
+            import aiohttp
+            async with aiohttp.ClientSession() as session:
+                async with session.get(endpoint, params=params, headers=self.db.headers) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+                    print(f"⚠️ Failed to fetch due profiles: {resp.status}")
+                    return None
+        except Exception as e:
+            print(f"⚠️ Error fetching due profiles: {e}")
+            return None
+    
+    async def iter_due_profiles(self):
+        """
+        Yield every profile due at the start of the sweep, one keyset page at a time.
+        The next page is requested while the current one is being refreshed.
+        Refreshed rows move past the cutoff, failed ones are picked up by the next sweep.
+        """
+        if self.dry_run:
+            for profile in await self.get_profiles_due_for_refresh():
+                yield profile
+            return
+        
+        cutoff = datetime.utcnow().isoformat()
+        
+        if self.mirror_path:
+            # One incremental sync per sweep, then the due set is read locally
+            mirror = await open_synced_mirror(self.mirror_path, self.db)
+            try:
+                for profile in mirror.iter_due_profiles(cutoff, self.priority_only, page_size=self.batch_size):
+                    yield profile
+            finally:
+                mirror.close()
+            return
+        
+        phase, after = 'null', None
+        pending = asyncio.ensure_future(self.fetch_due_page(cutoff, phase, after))
+        
+        while True:
+            rows = await pending
+            if rows is None:
+                return  # Retried on the next sweep
+            
+            if rows:
+                last = rows[-1]
+                after = last['id'] if phase == 'null' else (last['next_refresh_at'], last['id'])
+            
+            # Prefetch the next page (or move from the null window to the due window)
+            if len(rows) == self.batch_size:
+                pending = asyncio.ensure_future(self.fetch_due_page(cutoff, phase, after))
+            elif phase == 'null':
+                phase, after = 'due', None
+                pending = asyncio.ensure_future(self.fetch_due_page(cutoff, phase, after))
+            elif not rows:
+                return
+            else:
+                pending = asyncio.ensure_future(asyncio.sleep(0, result=[]))
+            
+            for profile in rows:
+                yield profile
+    
+    async def refresh_profile(self, browser: Browser, profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Fetch stage: re-scrape a single profile and work out its new state.
+        Returns {'row': ..., 'snapshot': ...} for the writer stage, or None when
+        there is nothing to write (error, auth problem, dry run).
+        """
         async with self.semaphore:
             # Rate limiting
             await self.rate_limiter.acquire()
@@ -153,111 +323,108 @@ class RefreshOrchestrator:
                 page = await context.new_page()
                 
                 # Setup response interception
+                recorder = OutcomeRecorder()
                 profile_data = None
                 
                 async def handle_response(response):
                     nonlocal profile_data
                     try:
-                        if "/api2/v2/users/" in response.url and response.status == 200:
+                        if "/api2/v2/users/" in response.url:
                             json_data = await response.json()
-                            profile_data = extract_fields(json_data)
+                            result = classify_api_response(response.status, json_data)
+                            if result and result[0] in (PROFILE, NON_PERFORMER):
+                                if json_data.get('id') != creator_id:
+                                    return  # Another user's profile (e.g. the logged-in account)
+                                profile_data = extract_fields(json_data)
+                            recorder.observe(result)
                     except Exception:
                         pass
                 
                 page.on("response", handle_response)
                 
-                # Visit page
-                url = f"https://onlyfans.com/{username}"
+                # Visit page by the stable numeric id - a rename cannot make the profile look deleted
+                url = f"https://onlyfans.com/{creator_id}"
                 await page.goto(url, wait_until="networkidle", timeout=30000)
                 await asyncio.sleep(1)
                 
+                # Only read the page text when the API did not settle the outcome
+                if recorder.decisive:
+                    outcome, signal = recorder.outcome, recorder.signal
+                else:
+                    outcome, signal = await classify_page_dom(page) or (TRANSIENT_ERROR, 'no_api_response')
+                self.outcomes.record(outcome, signal)
+                
+                if outcome in (TRANSIENT_ERROR, AUTH_EXPIRED):
+                    # Says nothing about the creator - leave the row alone and retry later
+                    self.stats['total_errors'] += 1
+                    self.failed_profiles[creator_id] = f'{outcome}: {signal}'
+                    if proxy:
+                        if outcome == TRANSIENT_ERROR:
+                            await self.proxy_pool.report_failure(proxy)
+                        else:
+                            await self.proxy_pool.report_success(proxy)
+                    return None
+                
                 # Determine new status
                 new_status = old_status
                 
-                if not profile_data:
-                    # Check if deleted
-                    is_deleted = await is_deleted_page(page)
-                    if is_deleted:
-                        new_status = 'deleted'
-                        self.stats['status_changes'][f'{old_status}_to_deleted'] = \
-                            self.stats['status_changes'].get(f'{old_status}_to_deleted', 0) + 1
-                else:
-                    # Check if still performer
-                    if not profile_data.get('isperformer', False):
-                        new_status = 'non_performer'
-                    else:
-                        # Check activity level
-                        posts_count = profile_data.get('postscount', 0)
-                        if posts_count == 0 or profile_data.get('isprivate', False):
-                            new_status = 'inactive'
-                            if old_status == 'active':
-                                self.stats['status_changes']['active_to_inactive'] += 1
-                        else:
-                            new_status = 'active'
-                            if old_status == 'inactive':
-                                self.stats['status_changes']['inactive_to_active'] += 1
+                if outcome == NOT_FOUND:
+                    new_status = 'deleted'
+                elif outcome == NON_PERFORMER:
+                    new_status = 'non_performer'
+                elif outcome == PROFILE:
+                    # Same activity rules as the offline re-classifier
+                    new_status = activity_status(profile_data, self._activity_cutoffs())
+                # RESTRICTED: profile exists but is hidden from us - keep the current status
                 
                 # Calculate next refresh time
                 next_refresh = self._calculate_next_refresh(new_status, profile.get('isverified', False))
+                now_iso = datetime.utcnow().isoformat()
                 
                 if profile_data:
+                    new_username = profile_data.get('username')
+                    if new_username and profile.get('username') and new_username.lower() != profile['username'].lower():
+                        print(f"🔀 Renamed: {profile['username']} → {new_username} (ID: {creator_id})")
+                    
                     # Update profile
-                    profile_data['last_seen_at'] = datetime.utcnow().isoformat()
-                    profile_data['last_refreshed_at'] = datetime.utcnow().isoformat()
+                    profile_data['last_seen_at'] = now_iso
+                    profile_data['last_refreshed_at'] = now_iso
                     profile_data['next_refresh_at'] = next_refresh.isoformat()
                     profile_data['status'] = new_status
-                    
-                    if self.dry_run:
-                        print(f"✅ [DRY RUN] Would refresh: {username} (ID: {creator_id}, status: {old_status} → {new_status})")
-                    else:
-                        # Upsert profile
-                        success = await self.db.upsert_profile(profile_data)
-                        
-                        if success:
-                            # Create snapshot
-                            snapshot = {
-                                'creator_id': creator_id,
-                                'subscribeprice': profile_data.get('subscribeprice'),
-                                'favoritedcount': profile_data.get('favoritedcount'),
-                                'subscriberscount': profile_data.get('subscriberscount'),
-                                'postscount': profile_data.get('postscount'),
-                                'photoscount': profile_data.get('photoscount'),
-                                'videoscount': profile_data.get('videoscount'),
-                                'audioscount': profile_data.get('audioscount'),
-                                'isverified': profile_data.get('isverified'),
-                                'bundle1_price': profile_data.get('bundle1_price'),
-                                'promotion1_price': profile_data.get('promotion1_price'),
-                            }
-                            await self.db.insert_snapshot(snapshot)
-                            
-                            self.stats['total_success'] += 1
-                        else:
-                            self.failed_profiles[creator_id] = "Upsert failed"
-                            self.stats['total_errors'] += 1
+                    row = profile_data
+                    snapshot = refresh_snapshot(creator_id, profile_data)
                 else:
-                    # Profile not accessible, update status only
-                    if not self.dry_run:
-                        update_data = {
-                            'id': creator_id,
-                            'status': new_status,
-                            'last_refreshed_at': datetime.utcnow().isoformat(),
-                            'next_refresh_at': next_refresh.isoformat()
-                        }
-                        await self.db.upsert_profile(update_data)
-                    
-                    self.stats['total_success'] += 1
+                    # Profile not accessible, status transition only (applied set-based by the writer)
+                    row = {
+                        'id': creator_id,
+                        'status': new_status,
+                        'next_refresh_at': next_refresh.isoformat()
+                    }
+                    snapshot = None
                 
                 if proxy:
                     await self.proxy_pool.report_success(proxy)
                 
-                return True
+                if self.dry_run:
+                    print(f"✅ [DRY RUN] Would refresh: {username} (ID: {creator_id}, status: {old_status} → {new_status})")
+                    self.stats['total_success'] += 1
+                    self._count_transitions({f'{old_status}_to_{new_status}': 1})
+                    return None
+                
+                return {
+                    'row': row,
+                    'snapshot': snapshot,
+                    'old_status': old_status,
+                    'is_verified': bool(profile.get('isverified', False)),
+                    'previous_username': profile.get('username')
+                }
                 
             except Exception as e:
                 self.stats['total_errors'] += 1
                 self.failed_profiles[creator_id] = str(e)
                 if proxy:
                     await self.proxy_pool.report_failure(proxy)
-                return False
+                return None
             
             finally:
                 if page:
@@ -265,47 +432,196 @@ class RefreshOrchestrator:
                 if context:
                     await context.close()
     
+    async def flush_writes(self, items: List[Dict[str, Any]]):
+        """Writer stage: one bulk upsert + snapshot insert and one status-transition RPC per batch"""
+        full = [item for item in items if item['snapshot'] is not None]
+        status_only = [item for item in items if item['snapshot'] is None]
+        
+        # Adaptive schedule: one snapshot-history query per batch overrides the fixed tier
+        if self.scheduler and full:
+            await self.scheduler.schedule([(item['row'], item['snapshot'], item['is_verified']) for item in full])
+        
+        # Username history (renames are detected against the name we navigated from)
+        if self.username_index and full:
+            self.stats['renamed'] += self.username_index.observe_many(
+                (item['row']['id'], item['row'].get('username'), item['previous_username']) for item in full)
+        
+        # Move each due date to the least occupied slot near it
+        if self.slots:
+            for item in items:
+                desired = datetime.fromisoformat(item['row']['next_refresh_at'])
+                item['row']['next_refresh_at'] = self.slots.assign(desired).isoformat()
+        
+        if full:
+            if await self.db.upsert_profiles([item['row'] for item in full]):
+                await self.db.insert_snapshots([item['snapshot'] for item in full])
+                self.stats['total_success'] += len(full)
+                self._count_transitions(self._local_transitions(full))
+            else:
+                self._record_write_failure(full, "Upsert failed")
+        
+        if status_only:
+            # One set-based UPDATE per batch; counts come back from the database
+            transitions = await self.db.apply_status_transitions([item['row'] for item in status_only])
+            if transitions is None:
+                # RPC unavailable (migration 004 not applied) - fall back to one bulk upsert
+                now_iso = datetime.utcnow().isoformat()
+                rows = [{**item['row'], 'last_refreshed_at': now_iso} for item in status_only]
+                if await self.db.upsert_profiles(rows):
+                    transitions = self._local_transitions(status_only)
+            if transitions is not None:
+                self.stats['total_success'] += len(status_only)
+                self._count_transitions(transitions)
+            else:
+                self._record_write_failure(status_only, "Status transition failed")
+    
+    @staticmethod
+    def _local_transitions(items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """'old_to_new' counts from the statuses seen at fetch time"""
+        transitions: Dict[str, int] = {}
+        for item in items:
+            key = f"{item['old_status']}_to_{item['row']['status']}"
+            transitions[key] = transitions.get(key, 0) + 1
+        return transitions
+    
+    def _count_transitions(self, transitions: Dict[str, int]):
+        """Add 'old_to_new' counts to status_changes (unchanged statuses are skipped)"""
+        for key, count in transitions.items():
+            old, new = key.split('_to_', 1)
+            if old != new and count:
+                self.stats['status_changes'][key] = self.stats['status_changes'].get(key, 0) + count
+    
+    def _record_write_failure(self, items: List[Dict[str, Any]], reason: str):
+        for item in items:
+            self.failed_profiles[item['row']['id']] = reason
+        self.stats['total_errors'] += len(items)
+    
+    async def refresh_pipeline(self, browser: Browser, profiles, pbar: tqdm, sweep: Optional[int] = None):
+        """
+        Profiles (list or async iterator) -> bounded queue -> fetch workers -> writer.
+        Fetch workers share the rate limiter; the writer batches upserts and snapshots.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        writes: asyncio.Queue = asyncio.Queue(maxsize=self.write_batch_size * 2)
+        
+        async def producer():
+            if hasattr(profiles, '__aiter__'):
+                async for profile in profiles:
+                    await queue.put(profile)
+            else:
+                for profile in profiles:
+                    await queue.put(profile)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+        
+        async def worker():
+            while True:
+                profile = await queue.get()
+                if profile is None:
+                    break
+                self.stats['total_attempted'] += 1
+                
+                item = await self.refresh_profile(browser, profile)
+                if item:
+                    await writes.put(item)
+                
+                # Update progress bar
+                pbar.update(1)
+                postfix = {'success': self.stats['total_success'], 'errors': self.stats['total_errors']}
+                if sweep is not None:
+                    postfix = {'sweep': sweep, **postfix}
+                pbar.set_postfix(postfix)
+        
+        async def writer():
+            batch = []
+            while True:
+                try:
+                    item = await asyncio.wait_for(writes.get(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    item = False  # Flush whatever is buffered
+                
+                if item:
+                    batch.append(item)
+                    if len(batch) < self.write_batch_size:
+                        continue
+                if batch:
+                    await self.flush_writes(batch)
+                    batch = []
+                if item is None:
+                    return
+        
+        writer_task = asyncio.ensure_future(writer())
+        feed_task = asyncio.ensure_future(
+            asyncio.gather(producer(), *(worker() for _ in range(self.concurrency))))
+        try:
+            await asyncio.wait({feed_task, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            if writer_task.done():
+                # The writer only returns after the final None, so it failed - nothing drains
+                # `writes` any more and the workers would block on put() forever
+                feed_task.cancel()
+                await asyncio.gather(feed_task, return_exceptions=True)
+                writer_task.result()
+            feed_task.result()
+        finally:
+            if not feed_task.done():
+                feed_task.cancel()
+                await asyncio.gather(feed_task, return_exceptions=True)
+            if not writer_task.done():
+                await writes.put(None)
+            await writer_task
+    
+    def _activity_cutoffs(self) -> ActivityCutoffs:
+        """Return the current batch cutoffs, refreshing them once an hour"""
+        if self.cutoffs.age() > 3600:
+            self.cutoffs = ActivityCutoffs(self.cutoffs.rules)
+        return self.cutoffs
+    
     def _calculate_next_refresh(self, status: str, is_verified: bool) -> datetime:
-        """Calculate next refresh time based on status and verification"""
-        now = datetime.utcnow()
-        
-        # Priority creators (verified) refresh more frequently
-        if is_verified:
-            if status == 'active':
-                return now + timedelta(days=3)  # Every 3 days
-            elif status == 'inactive':
-                return now + timedelta(days=7)  # Weekly
-            elif status == 'deleted':
-                return now + timedelta(days=30)  # Monthly check if resurrected
-        else:
-            # Regular creators
-            if status == 'active':
-                return now + timedelta(days=7)  # Weekly
-            elif status == 'inactive':
-                return now + timedelta(days=14)  # Bi-weekly
-            elif status == 'deleted':
-                return now + timedelta(days=30)  # Monthly
-        
-        # Default: weekly
-        return now + timedelta(days=7)
+        """Calculate next refresh time from the fixed tiers (status + verification)"""
+        return datetime.utcnow() + timedelta(days=fixed_interval_days(status, is_verified))
+    
+    async def load_slot_occupancy(self):
+        """(Re)load the slot scheduler's occupancy for the next 90 days"""
+        if self.slots and not await self.slots.load_occupancy(self.db, horizon_days=90):
+            print("⚠️ Slot occupancy unavailable (migration 003?) - levelling from the in-memory curve")
+            self.slots.prune()
     
     async def run(self):
         """Main refresh loop"""
         if not self.dry_run:
             # Create crawl run
-            config = {
+            self.run_config = {
                 'batch_size': self.batch_size,
                 'concurrency': self.concurrency,
-                'priority_only': self.priority_only
+                'priority_only': self.priority_only,
+                'adaptive': self.scheduler is not None,
+                'slot_capacity': self.slots.capacity if self.slots else None,
+                'plan_file': self.plan_file,
+                'mirror': self.mirror_path
             }
-            self.run_id = await self.db.create_crawl_run('refresh', config=config)
+            self.run_id = await self.db.create_crawl_run('refresh', config=self.run_config)
             print(f"🆔 Crawl run ID: {self.run_id}")
+            
+            await self.load_slot_occupancy()
         else:
             print("🔍 DRY RUN MODE - No database writes")
         
-        # Fetch profiles due for refresh
-        print(f"\n📥 Fetching profiles due for refresh...")
-        profiles = await self.get_profiles_due_for_refresh()
+        if self.daemon:
+            await self.run_daemon()
+            return
+        
+        if self.plan_file:
+            # Budgeted plan from v2_refresh_planner.py, highest value first
+            profiles, plan_rate = load_plan(self.plan_file)
+            print(f"\n📄 Loaded refresh plan {self.plan_file}")
+            if plan_rate and plan_rate < self.rate_limiter.rate:
+                # Spread the budget over its period instead of spending it in the first minutes
+                self.rate_limiter = RateLimiter(rate=plan_rate, burst=1)
+                print(f"⏱️  Pacing plan to its budget: one request every {1 / plan_rate:.1f}s")
+        else:
+            # Fetch profiles due for refresh
+            print(f"\n📥 Fetching profiles due for refresh...")
+            profiles = await self.get_profiles_due_for_refresh()
         
         if not profiles:
             print("✅ No profiles due for refresh!")
@@ -318,18 +634,8 @@ class RefreshOrchestrator:
             browser = await p.chromium.launch(headless=True)
             
             try:
-                pbar = tqdm(profiles, desc="Refreshing profiles", unit="profile")
-                
-                for profile in pbar:
-                    self.stats['total_attempted'] += 1
-                    await self.refresh_profile(browser, profile)
-                    
-                    # Update progress bar
-                    pbar.set_postfix({
-                        'success': self.stats['total_success'],
-                        'errors': self.stats['total_errors']
-                    })
-                
+                pbar = tqdm(total=len(profiles), desc="Refreshing profiles", unit="profile")
+                await self.refresh_pipeline(browser, profiles, pbar)
                 pbar.close()
                 
             finally:
@@ -338,6 +644,44 @@ class RefreshOrchestrator:
         # Print summary
         await self.print_summary()
     
+    async def run_daemon(self):
+        """Sweep the due backlog continuously with one browser, sleeping when it is drained"""
+        print(f"\n♻️ Daemon mode: page size {self.batch_size}, idle sleep {self.idle_sleep:.0f}s (Ctrl+C to stop)\n")
+        
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            pbar = tqdm(desc="Refreshing profiles", unit="profile")
+            sweep = 0
+            
+            try:
+                while True:
+                    sweep += 1
+                    # Re-read the load curve each sweep: past slots drop out, other writers' due dates come in
+                    if sweep > 1:
+                        await self.load_slot_occupancy()
+                    success_before = self.stats['total_success']
+                    attempted_before = self.stats['total_attempted']
+                    await self.refresh_pipeline(browser, self.iter_due_profiles(), pbar, sweep=sweep)
+                    refreshed = self.stats['total_attempted'] - attempted_before
+                    
+                    if self.dry_run:
+                        break
+                    
+                    # Profiles that came due during the sweep are picked up straight away;
+                    # sleep once a sweep finds nothing (or only profiles that keep failing)
+                    if self.stats['total_success'] == success_before:
+                        pbar.write(f"✅ Backlog drained after sweep {sweep} ({refreshed} attempted), "
+                                   f"sleeping {self.idle_sleep:.0f}s")
+                        await asyncio.sleep(self.idle_sleep)
+                    
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                pbar.write("⏹️ Stopping daemon")
+            finally:
+                pbar.close()
+                await browser.close()
+        
+        await self.print_summary()
+    
     async def print_summary(self):
         """Print final summary"""
         print("\n" + "="*60)
@@ -346,7 +690,11 @@ class RefreshOrchestrator:
         print(f"Total attempted: {self.stats['total_attempted']}")
         print(f"Successful refreshes: {self.stats['total_success']}")
         print(f"Errors: {self.stats['total_errors']}")
+        print(f"Renamed creators: {self.stats['renamed']}")
         print(f"Success rate: {self.stats['total_success'] / max(self.stats['total_attempted'], 1) * 100:.1f}%")
+        self.outcomes.print_summary()
+        if self.scheduler:
+            print(f"Adaptive schedule: {self.scheduler.summary()}")
         
         # Status changes
         if any(self.stats['status_changes'].values()):
@@ -369,7 +717,8 @@ class RefreshOrchestrator:
                 'finished_at': datetime.utcnow().isoformat(),
                 'total_attempted': self.stats['total_attempted'],
                 'total_success': self.stats['total_success'],
-                'total_errors': self.stats['total_errors']
+                'total_errors': self.stats['total_errors'],
+                'config_json': {**self.run_config, 'outcomes': self.outcomes.to_dict()}
             })
 
 
@@ -389,9 +738,28 @@ def main():
     parser.add_argument('--rate', type=float, default=1.0, help='Requests per second (default: 1.0)')
     parser.add_argument('--proxies', nargs='+', help='Proxy URLs')
     parser.add_argument('--priority-only', action='store_true', help='Only refresh verified creators')
+    parser.add_argument('--write-batch', type=int, default=50,
+                       help='Profiles per bulk upsert/snapshot write (default: 50)')
+    parser.add_argument('--adaptive', action='store_true',
+                       help='Set next_refresh_at from each creator\'s snapshot change rate')
+    parser.add_argument('--target-probability', type=float, default=0.5,
+                       help='Adaptive: chance a refresh finds changed data (default: 0.5)')
+    parser.add_argument('--slot-capacity', type=int, default=0,
+                       help='Spread next_refresh_at to keep ~N refreshes per hour (default: 0 = off)')
+    parser.add_argument('--plan', help='Execute a refresh plan from v2_refresh_planner.py instead of the due query (not with --daemon)')
+    parser.add_argument('--username-index', default=DEFAULT_INDEX_PATH,
+                       help=f'SQLite username history to update (default: {DEFAULT_INDEX_PATH}, "" = off)')
+    parser.add_argument('--mirror', metavar='PATH',
+                       help='Read due profiles from a local mirror (v2_local_mirror.py), synced incrementally first')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Keep sweeping due profiles until stopped (batch size = page size)')
+    parser.add_argument('--idle-sleep', type=float, default=300.0,
+                       help='Daemon: seconds to wait once the backlog is drained (default: 300)')
     parser.add_argument('--dry-run', action='store_true', help='Dry run (no database writes)')
     
     args = parser.parse_args()
+    if args.plan and args.daemon:
+        parser.error('--plan runs a fixed list once and cannot be combined with --daemon')
     
     # Environment variables
     supabase_url = os.getenv('SUPABASE_URL')
@@ -411,7 +779,16 @@ def main():
         rate=args.rate,
         proxies=args.proxies,
         dry_run=args.dry_run,
-        priority_only=args.priority_only
+        priority_only=args.priority_only,
+        daemon=args.daemon,
+        idle_sleep=args.idle_sleep,
+        write_batch=args.write_batch,
+        adaptive=args.adaptive,
+        target_probability=args.target_probability,
+        slot_capacity=args.slot_capacity,
+        plan_file=args.plan,
+        username_index=args.username_index or None,
+        mirror_path=args.mirror
     )
     
     # Run
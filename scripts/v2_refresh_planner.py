@@ -0,0 +1,350 @@
+"""
+OnlyFans V2 Refresh Planner - Spend a fixed request budget where freshness matters
+
+Features:
+- Request budget per hour or per day (--budget, --per)
+- Streams due profiles with keyset pagination (id > last_id, no OFFSET)
+- Value = P(profile changed since last refresh) x importance
+  - P(change) = 1 - exp(-rate x staleness), rate from the fixed tier or snapshot history (--use-history)
+  - importance from popularity (log favoritedcount), verification and optional site traffic (--traffic-csv)
+- Keeps only the running top-K (vectorised per chunk), so memory stays O(budget)
+- Writes a JSON plan that v2_refresh_orchestrator.py --plan executes
+"""
+
+import asyncio
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+from v2_activity_classifier import parse_iso_timestamps
+from v2_refresh_scheduler import ChangeRateEstimator, fetch_snapshot_history, fixed_interval_days
+
+
+SELECT_COLUMNS = 'id,username,status,isverified,favoritedcount,last_refreshed_at,next_refresh_at'
+PLAN_STATUSES = ('active', 'inactive', 'deleted')
+PERIOD_SECONDS = {'hour': 3600, 'day': 86400}
+
+
+# ============================================================================
+# Scoring
+# ============================================================================
+
+class PlannerWeights:
+    """Importance weights for the value score"""
+    
+    def __init__(self,
+                 popularity: float = 1.0,
+                 verified_boost: float = 1.0,
+                 traffic: float = 1.0,
+                 deleted_discount: float = 0.2):
+        """
+        Args:
+            popularity: weight of log1p(favoritedcount)
+            verified_boost: extra multiplier for verified creators (1.0 = twice as important)
+            traffic: weight of log1p(page views) from --traffic-csv
+            deleted_discount: importance multiplier for deleted profiles (resurrection checks)
+        """
+        self.popularity = popularity
+        self.verified_boost = verified_boost
+        self.traffic = traffic
+        self.deleted_discount = deleted_discount
+    
+    def to_dict(self) -> Dict[str, float]:
+        return dict(vars(self))
+
+
+def load_traffic(path: str) -> Dict[str, float]:
+    """
+    Load page views per creator from a CSV with a 'views' column and either
+    'username' or 'id' (e.g. an analytics export of /creator/<username> pages).
+    Keys are lowercased usernames or str(id).
+    """
+    traffic: Dict[str, float] = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            key = (row.get('username') or row.get('id') or '').strip().lower()
+            try:
+                views = float(row.get('views') or 0)
+            except ValueError:
+                continue
+            if key:
+                traffic[key] = traffic.get(key, 0.0) + views
+    return traffic
+
+
+def score_chunk(rows: List[Dict[str, Any]],
+                now: float,
+                weights: PlannerWeights,
+                rates: np.ndarray,
+                traffic: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Value of refreshing each profile now: P(changed since last refresh) x importance.
+    `rates` are changes/day per row; never-refreshed profiles have P = 1.
+    """
+    n = len(rows)
+    favorited = np.fromiter((float(r.get('favoritedcount') or 0) for r in rows), dtype=np.float64, count=n)
+    verified = np.fromiter((bool(r.get('isverified')) for r in rows), dtype=bool, count=n)
+    deleted = np.fromiter((r.get('status') == 'deleted' for r in rows), dtype=bool, count=n)
+    last_refreshed = parse_iso_timestamps(r.get('last_refreshed_at') for r in rows)
+    
+    staleness_days = np.where(np.isnan(last_refreshed), np.inf, (now - last_refreshed) / 86400.0)
+    p_change = -np.expm1(-rates * np.maximum(staleness_days, 0))
+    
+    importance = (1 + weights.popularity * np.log1p(np.maximum(favorited, 0)))
+    importance *= 1 + weights.verified_boost * verified
+    if traffic:
+        views = np.fromiter(
+            (traffic.get((r.get('username') or '').lower(), traffic.get(str(r['id']), 0.0)) for r in rows),
+            dtype=np.float64, count=n)
+        importance *= 1 + weights.traffic * np.log1p(views)
+    importance = np.where(deleted, importance * weights.deleted_discount, importance)
+    
+    return p_change * importance
+
+
+# ============================================================================
+# Planner
+# ============================================================================
+
+class RefreshPlanner:
+    """Rank due profiles by value and keep the top `budget`"""
+    
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 budget: int,
+                 per: str = 'hour',
+                 weights: Optional[PlannerWeights] = None,
+                 traffic_csv: Optional[str] = None,
+                 use_history: bool = False,
+                 lookahead_hours: float = 0.0,
+                 chunk_size: int = 1000):
+        
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.budget = budget
+        self.per = per
+        self.weights = weights or PlannerWeights()
+        self.traffic = load_traffic(traffic_csv) if traffic_csv else None
+        self.use_history = use_history
+        self.lookahead_hours = lookahead_hours
+        self.chunk_size = chunk_size
+        self.estimator = ChangeRateEstimator()
+        
+        # Stats
+        self.stats = {
+            'candidates': 0,
+            'planned': 0,
+            'value_planned': 0.0,
+            'value_total': 0.0
+        }
+    
+    async def iter_candidates(self, cutoff: str):
+        """Yield keyset-paginated chunks of profiles due before the cutoff (prefetching the next chunk)"""
+        filters = {
+            'status': f"in.({','.join(PLAN_STATUSES)})",
+            'or': f'(next_refresh_at.is.null,next_refresh_at.lt."{cutoff}")'
+        }
+        last_id = None
+        
+        next_page = asyncio.ensure_future(
+            self.db.fetch_page('onlyfans_profiles', SELECT_COLUMNS, after=last_id,
+                               limit=self.chunk_size, filters=filters))
+        while True:
+            rows = await next_page
+            if rows is None:
+                raise RuntimeError(f"Failed to fetch profiles after id {last_id}")
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            if len(rows) == self.chunk_size:
+                next_page = asyncio.ensure_future(
+                    self.db.fetch_page('onlyfans_profiles', SELECT_COLUMNS, after=last_id,
+                                       limit=self.chunk_size, filters=filters))
+            else:
+                next_page = asyncio.ensure_future(asyncio.sleep(0, result=[]))
+            yield rows
+    
+    async def change_rates(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        """Changes/day per row: fixed-tier prior, or learned from snapshot history"""
+        stats: Dict[int, Any] = {}
+        if self.use_history:
+            history = await fetch_snapshot_history(
+                self.db, [r['id'] for r in rows], self.estimator.history_days, self.estimator.fields)
+            stats = self.estimator.change_stats(history)
+        
+        return np.fromiter(
+            (self.estimator.rate(stats.get(r['id']),
+                                 fixed_interval_days(r.get('status') or 'active', bool(r.get('isverified'))))
+             for r in rows),
+            dtype=np.float64, count=len(rows))
+    
+    async def build_plan(self) -> List[Dict[str, Any]]:
+        """Stream candidates and keep the running top-K by value"""
+        now = time.time()
+        cutoff = (datetime.now(timezone.utc) + timedelta(hours=self.lookahead_hours)).isoformat()
+        
+        top_rows: List[Dict[str, Any]] = []
+        top_scores = np.empty(0, dtype=np.float64)
+        pbar = tqdm(desc="Scoring due profiles", unit="profile")
+        
+        async for rows in self.iter_candidates(cutoff):
+            scores = score_chunk(rows, now, self.weights, await self.change_rates(rows), self.traffic)
+            self.stats['candidates'] += len(rows)
+            self.stats['value_total'] += float(scores.sum())
+            
+            # Merge with the current top-K and keep the best `budget`
+            merged_rows = top_rows + rows
+            merged_scores = np.concatenate([top_scores, scores])
+            if len(merged_rows) > self.budget:
+                keep = np.argpartition(-merged_scores, self.budget - 1)[:self.budget]
+                top_rows = [merged_rows[i] for i in keep]
+                top_scores = merged_scores[keep]
+            else:
+                top_rows, top_scores = merged_rows, merged_scores
+            
+            pbar.update(len(rows))
+        pbar.close()
+        
+        order = np.argsort(-top_scores)
+        plan = []
+        for i in order:
+            row = top_rows[i]
+            plan.append({
+                'id': row['id'],
+                'username': row.get('username'),
+                'status': row.get('status'),
+                'isverified': bool(row.get('isverified')),
+                'score': round(float(top_scores[i]), 6)
+            })
+        self.stats['planned'] = len(plan)
+        self.stats['value_planned'] = float(top_scores.sum())
+        return plan
+    
+    async def run(self, output: str):
+        """Build the plan and write it to `output`"""
+        print("="*60)
+        print("REFRESH PLANNER")
+        print("="*60)
+        print(f"Budget: {self.budget} refreshes per {self.per}")
+        print(f"Weights: {self.weights.to_dict()}")
+        print(f"Change rates: {'snapshot history' if self.use_history else 'fixed tiers'}")
+        if self.traffic:
+            print(f"Traffic: {len(self.traffic)} creators")
+        print()
+        
+        start = time.time()
+        plan = await self.build_plan()
+        
+        document = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'budget': self.budget,
+            'per': self.per,
+            'weights': self.weights.to_dict(),
+            'use_history': self.use_history,
+            'profiles': plan
+        }
+        with open(output, 'w') as f:
+            json.dump(document, f, indent=2)
+        
+        self.print_summary(output, time.time() - start)
+    
+    def print_summary(self, output: str, elapsed: float):
+        """Print final summary"""
+        print("\n" + "="*60)
+        print("PLAN COMPLETE")
+        print("="*60)
+        print(f"Due candidates: {self.stats['candidates']}")
+        print(f"Planned refreshes: {self.stats['planned']}")
+        share = self.stats['value_planned'] / self.stats['value_total'] if self.stats['value_total'] else 0
+        print(f"Value captured: {share * 100:.1f}% of all due value "
+              f"with {self.stats['planned'] / max(self.stats['candidates'], 1) * 100:.1f}% of the requests")
+        print(f"Elapsed: {elapsed:.1f}s")
+        print(f"\n📄 Plan saved to {output}")
+
+
+def load_plan(path: str) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+    """
+    Profiles from a plan file (highest value first) and the request rate that
+    spends its budget over the budget period, in requests per second.
+    """
+    with open(path, 'r') as f:
+        document = json.load(f)
+    seconds = PERIOD_SECONDS.get(document.get('per'))
+    rate = document['budget'] / seconds if document.get('budget') and seconds else None
+    return document['profiles'], rate
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    defaults = PlannerWeights()
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Refresh Planner')
+    
+    # Budget
+    parser.add_argument('--budget', type=int, required=True, help='Refresh requests available')
+    parser.add_argument('--per', choices=['hour', 'day'], default='hour', help='Budget period (default: hour)')
+    
+    # Inputs
+    parser.add_argument('--traffic-csv', help='CSV of page views per creator (username|id, views)')
+    parser.add_argument('--use-history', action='store_true',
+                       help='Learn change rates from snapshot history (one query per chunk)')
+    parser.add_argument('--lookahead-hours', type=float, default=None,
+                       help='Also consider profiles due within this many hours (default: the budget period)')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Profiles per page (default: 1000)')
+    parser.add_argument('--output', default='refresh_plan.json', help='Plan file (default: refresh_plan.json)')
+    
+    # Weights
+    for name, value in defaults.to_dict().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=value,
+                           help=f'Value weight (default: {value})')
+    
+    args = parser.parse_args()
+    
+    # Environment variables
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    lookahead = args.lookahead_hours
+    if lookahead is None:
+        lookahead = PERIOD_SECONDS[args.per] / 3600
+    
+    planner = RefreshPlanner(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        budget=args.budget,
+        per=args.per,
+        weights=PlannerWeights(**{name: getattr(args, name) for name in defaults.to_dict()}),
+        traffic_csv=args.traffic_csv,
+        use_history=args.use_history,
+        lookahead_hours=lookahead,
+        chunk_size=args.chunk_size
+    )
+    
+    # Run
+    asyncio.run(planner.run(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,502 @@
+"""
+Refresh scheduler for OnlyFans V2 creators
+- Estimates each creator's change rate from onlyfans_profile_snapshots history
+- Change = any tracked metric (posts, media, favorites, prices) differs between consecutive snapshots
+- Poisson change model: interval = -ln(1 - p) / rate, so every refresh has the same chance p of finding new data
+- Few snapshots: estimate is shrunk towards the fixed tier interval
+- Intervals clamped per tier (verified / active / inactive)
+- Slot scheduler: spreads next_refresh_at over hourly slots with a per-slot capacity
+- Rebalance mode (--rebalance) moves overflow from overloaded slots to flatten the load curve
+"""
+
+import asyncio
+import argparse
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Tuple
+from pathlib import Path
+
+import numpy as np
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+from v2_activity_classifier import parse_iso_timestamp, parse_iso_timestamps
+
+
+# Snapshot columns compared between consecutive snapshots (lowercase, as stored)
+TRACKED_FIELDS = (
+    'postscount', 'photoscount', 'videoscount', 'favoritedcount',
+    'subscribeprice', 'bundle1_price', 'promotion1_price'
+)
+
+# Fixed tiers (days) - used as the prior and as the fallback without history
+FIXED_INTERVALS = {
+    (True, 'active'): 3,
+    (True, 'inactive'): 7,
+    (True, 'deleted'): 30,
+    (False, 'active'): 7,
+    (False, 'inactive'): 14,
+    (False, 'deleted'): 30,
+}
+DEFAULT_INTERVAL = 7
+
+# (min_days, max_days) the adaptive interval is clamped to
+INTERVAL_BOUNDS = {
+    (True, 'active'): (1, 14),
+    (True, 'inactive'): (3, 30),
+    (False, 'active'): (2, 30),
+    (False, 'inactive'): (7, 60),
+}
+
+
+def fixed_interval_days(status: str, is_verified: bool) -> int:
+    """The original fixed-tier schedule"""
+    return FIXED_INTERVALS.get((bool(is_verified), status), DEFAULT_INTERVAL)
+
+
+# ============================================================================
+# Change-rate Estimation
+# ============================================================================
+
+def _as_float(v: Any) -> float:
+    # Refresh snapshots carry "" for fields the API left out (e.g. bundle1_price)
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _field_values(rows: List[Dict[str, Any]], field: str) -> np.ndarray:
+    return np.fromiter((_as_float(r.get(field)) for r in rows), dtype=np.float64, count=len(rows))
+
+
+class ChangeRateEstimator:
+    """
+    Per-creator change rate (changes/day) from snapshot history.
+    
+    Consecutive snapshots give n observation intervals of which X show a change.
+    Several changes inside one interval look like one, so the naive X / days
+    under-counts busy creators; the bias-reduced Poisson estimator
+    -ln((n - X + 0.5) / (n + 0.5)) / mean_gap is used instead. With few intervals
+    the estimate is blended with the fixed-tier rate (weight n / (n + prior_weight)).
+    """
+    
+    def __init__(self,
+                 target_probability: float = 0.5,
+                 history_days: int = 180,
+                 prior_weight: float = 3.0,
+                 fields: Tuple[str, ...] = TRACKED_FIELDS):
+        """
+        Args:
+            target_probability: chance that a refresh finds changed data (higher = more requests)
+            history_days: snapshot window used for the estimate
+            prior_weight: pseudo-intervals given to the fixed-tier rate
+            fields: snapshot columns compared between consecutive snapshots
+        """
+        self.target_probability = target_probability
+        self.history_days = history_days
+        self.prior_weight = prior_weight
+        self.fields = fields
+    
+    def change_stats(self, snapshots: List[Dict[str, Any]]) -> Dict[int, Tuple[int, int, float]]:
+        """
+        Vectorised pass over snapshot rows of many creators.
+        Returns {creator_id: (intervals, changed_intervals, observed_days)}.
+        """
+        if not snapshots:
+            return {}
+        
+        creators = np.fromiter((r['creator_id'] for r in snapshots), dtype=np.int64, count=len(snapshots))
+        times = parse_iso_timestamps(r.get('captured_at') for r in snapshots)
+        order = np.lexsort((times, creators))
+        creators, times = creators[order], times[order]
+        
+        same_creator = creators[1:] == creators[:-1]
+        changed = np.zeros(len(creators) - 1, dtype=bool)
+        for field in self.fields:
+            values = _field_values(snapshots, field)[order]
+            prev, cur = values[:-1], values[1:]
+            # NaN -> NaN is not a change, NaN <-> value is
+            changed |= ~((prev == cur) | (np.isnan(prev) & np.isnan(cur)))
+        changed &= same_creator
+        gaps = np.where(same_creator, (times[1:] - times[:-1]) / 86400.0, 0.0)
+        
+        unique_ids, inverse = np.unique(creators, return_inverse=True)
+        pair_owner = inverse[1:]
+        intervals = np.bincount(pair_owner, weights=same_creator, minlength=len(unique_ids))
+        changes = np.bincount(pair_owner, weights=changed, minlength=len(unique_ids))
+        days = np.bincount(pair_owner, weights=gaps, minlength=len(unique_ids))
+        
+        return {int(cid): (int(n), int(x), float(d))
+                for cid, n, x, d in zip(unique_ids, intervals, changes, days)}
+    
+    def rate(self, stats: Optional[Tuple[int, int, float]], prior_days: float) -> float:
+        """
+        Changes per day for one creator, shrunk towards the prior rate - the rate at
+        which the fixed tier interval would hit target_probability.
+        """
+        prior_rate = -math.log(1.0 - self.target_probability) / prior_days
+        if not stats:
+            return prior_rate
+        n, x, days = stats
+        if n == 0 or days <= 0:
+            return prior_rate
+        
+        estimate = -math.log((n - x + 0.5) / (n + 0.5)) / (days / n)
+        weight = n / (n + self.prior_weight)
+        return weight * estimate + (1 - weight) * prior_rate
+    
+    def interval_days(self, stats: Optional[Tuple[int, int, float]], status: str, is_verified: bool) -> float:
+        """Days until the chance of a change reaches target_probability (fixed tier without history)"""
+        prior_days = fixed_interval_days(status, is_verified)
+        bounds = INTERVAL_BOUNDS.get((bool(is_verified), status))
+        if bounds is None or not stats or stats[0] == 0:
+            return float(prior_days)  # deleted / non_performer / no history keep the fixed tier
+        
+        days = -math.log(1.0 - self.target_probability) / self.rate(stats, prior_days)
+        return min(max(days, bounds[0]), bounds[1])
+
+
+# ============================================================================
+# History Loading
+# ============================================================================
+
+async def fetch_snapshot_history(db, creator_ids: List[int], history_days: int,
+                                 fields: Tuple[str, ...] = TRACKED_FIELDS,
+                                 page_size: int = 1000) -> List[Dict[str, Any]]:
+    """Load recent snapshots for a set of creators (keyset pages by snapshot_id)"""
+    if not creator_ids:
+        return []
+    since = (datetime.utcnow() - timedelta(days=history_days)).isoformat()
+    select = ','.join(('snapshot_id', 'creator_id', 'captured_at') + tuple(fields))
+    filters = {
+        'creator_id': f"in.({','.join(str(i) for i in creator_ids)})",
+        'captured_at': f'gte.{since}'
+    }
+    
+    rows: List[Dict[str, Any]] = []
+    after = None
+    while True:
+        page = await db.fetch_page('onlyfans_profile_snapshots', select, after=after,
+                                   key='snapshot_id', limit=page_size, filters=filters)
+        if not page:
+            return rows
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        after = page[-1]['snapshot_id']
+
+
+class AdaptiveScheduler:
+    """Sets next_refresh_at for a batch of refreshed profiles from their snapshot history"""
+    
+    def __init__(self, db, estimator: Optional[ChangeRateEstimator] = None):
+        self.db = db
+        self.estimator = estimator or ChangeRateEstimator()
+        self.stats = {'scheduled': 0, 'fallback': 0, 'interval_days_sum': 0.0}
+    
+    async def schedule(self, items: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]], bool]]):
+        """
+        items: (row, snapshot, is_verified) per refreshed profile. The snapshot
+        about to be written counts as the newest observation. Sets
+        row['next_refresh_at'] in place; returns nothing.
+        """
+        ids = [row['id'] for row, snapshot, _ in items if snapshot is not None]
+        history = await fetch_snapshot_history(self.db, ids, self.estimator.history_days,
+                                               self.estimator.fields)
+        
+        # Append the new snapshots (lowercase keys, as stored)
+        now_iso = datetime.utcnow().isoformat()
+        for row, snapshot, _ in items:
+            if snapshot is not None:
+                current = {k.lower(): v for k, v in snapshot.items()}
+                current['captured_at'] = now_iso
+                history.append(current)
+        
+        stats = self.estimator.change_stats(history)
+        now = datetime.utcnow()
+        for row, snapshot, is_verified in items:
+            creator_stats = stats.get(row['id'])
+            if not creator_stats or creator_stats[0] == 0:
+                self.stats['fallback'] += 1
+            days = self.estimator.interval_days(creator_stats, row.get('status', 'active'), is_verified)
+            row['next_refresh_at'] = (now + timedelta(days=days)).isoformat()
+            self.stats['scheduled'] += 1
+            self.stats['interval_days_sum'] += days
+    
+    def summary(self) -> str:
+        n = max(self.stats['scheduled'], 1)
+        return (f"{self.stats['scheduled']} scheduled adaptively, "
+                f"mean interval {self.stats['interval_days_sum'] / n:.1f}d, "
+                f"{self.stats['fallback']} without history")
+
+
+# ============================================================================
+# Slot Scheduler (load levelling)
+# ============================================================================
+
+class SlotScheduler:
+    """
+    Spread next_refresh_at over fixed-size time slots with capacity accounting.
+    
+    `occupancy` maps slot index (epoch seconds // slot_seconds) to the number of
+    profiles due in that slot. A due date may move by up to `spread` of its
+    interval (at least min_tolerance_hours, at most max_tolerance_hours) to the
+    least occupied slot in that window; inside a slot, profiles are spaced evenly.
+    """
+    
+    def __init__(self,
+                 capacity: int,
+                 slot_seconds: int = 3600,
+                 spread: float = 0.15,
+                 min_tolerance_hours: float = 1.0,
+                 max_tolerance_hours: float = 48.0):
+        """
+        Args:
+            capacity: target refreshes per slot (per hour by default)
+            slot_seconds: slot width
+            spread: fraction of the refresh interval a due date may move
+            min_tolerance_hours / max_tolerance_hours: bounds on that move
+        """
+        self.capacity = max(1, capacity)
+        self.slot_seconds = slot_seconds
+        self.spread = spread
+        self.min_tolerance = int(min_tolerance_hours * 3600 // slot_seconds)
+        self.max_tolerance = int(max_tolerance_hours * 3600 // slot_seconds)
+        self.occupancy: Dict[int, int] = {}
+    
+    def slot_of(self, epoch: float) -> int:
+        return int(epoch // self.slot_seconds)
+    
+    def slot_start(self, slot: int) -> datetime:
+        return datetime.utcfromtimestamp(slot * self.slot_seconds)
+    
+    async def load_occupancy(self, db: SupabaseClient, horizon_days: float) -> bool:
+        """Load the per-slot load curve for [now, now + horizon) via refresh_slot_occupancy()"""
+        now = datetime.now(timezone.utc)
+        rows = await db.call_rpc('refresh_slot_occupancy', {
+            'p_from': now.isoformat(),
+            'p_to': (now + timedelta(days=horizon_days)).isoformat(),
+            'p_slot_seconds': self.slot_seconds
+        })
+        if rows is None:
+            return False
+        self.occupancy = {self.slot_of(parse_iso_timestamp(r['slot_start'])): int(r['profiles']) for r in rows}
+        return True
+    
+    def tolerance(self, interval_seconds: float) -> int:
+        """How many slots either side of the desired slot a due date may move"""
+        slots = int(interval_seconds * self.spread // self.slot_seconds)
+        return max(self.min_tolerance, min(slots, self.max_tolerance))
+    
+    def best_slot(self, center: int, tolerance: int, earliest: int) -> int:
+        occupancy = self.occupancy
+        candidates = range(max(center - tolerance, earliest), max(center + tolerance, earliest) + 1)
+        # Least occupied slot wins; ties go to the slot closest to the desired time
+        return min(candidates, key=lambda s: (occupancy.get(s, 0), abs(s - center)))
+    
+    def place(self, slot: int) -> datetime:
+        """Take the next position in a slot; positions are spaced evenly across it"""
+        position = self.occupancy.get(slot, 0)
+        self.occupancy[slot] = position + 1
+        offset = (position % self.capacity) * self.slot_seconds / self.capacity
+        return datetime.utcfromtimestamp(slot * self.slot_seconds + offset)
+    
+    def assign(self, desired: datetime, now: Optional[datetime] = None) -> datetime:
+        """Pick the refresh time for a profile whose ideal next refresh is `desired` (naive UTC)"""
+        now_epoch = (now or datetime.utcnow()).replace(tzinfo=timezone.utc).timestamp()
+        desired_epoch = desired.replace(tzinfo=timezone.utc).timestamp()
+        tolerance = self.tolerance(max(desired_epoch - now_epoch, 0))
+        slot = self.best_slot(self.slot_of(desired_epoch), tolerance, self.slot_of(now_epoch) + 1)
+        return self.place(slot)
+    
+    def release(self, slot: int, count: int = 1):
+        """Remove profiles from a slot (they were moved elsewhere)"""
+        remaining = self.occupancy.get(slot, 0) - count
+        if remaining > 0:
+            self.occupancy[slot] = remaining
+        else:
+            self.occupancy.pop(slot, None)
+    
+    def prune(self, now: Optional[float] = None):
+        """Drop slots that have already started (nothing more can be placed in them)"""
+        current = self.slot_of(time.time() if now is None else now)
+        self.occupancy = {slot: count for slot, count in self.occupancy.items() if slot > current}
+    
+    def overloaded(self) -> List[Tuple[int, int]]:
+        """(slot, excess) for every slot above capacity, in time order"""
+        return [(slot, count - self.capacity) for slot, count in sorted(self.occupancy.items())
+                if count > self.capacity]
+    
+    def load_stats(self) -> Dict[str, float]:
+        counts = list(self.occupancy.values()) or [0]
+        return {
+            'slots': len(self.occupancy),
+            'peak': max(counts),
+            'mean': sum(counts) / len(counts),
+            'overloaded': sum(1 for c in counts if c > self.capacity)
+        }
+
+
+# ============================================================================
+# Rebalancer
+# ============================================================================
+
+class SlotRebalancer:
+    """Flatten the existing load curve by moving overflow out of overloaded slots"""
+    
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 capacity: int,
+                 horizon_days: float = 30.0,
+                 tolerance_hours: float = 24.0,
+                 dry_run: bool = False):
+        
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.slots = SlotScheduler(capacity, min_tolerance_hours=tolerance_hours,
+                                   max_tolerance_hours=tolerance_hours)
+        self.horizon_days = horizon_days
+        self.tolerance = self.slots.min_tolerance
+        self.dry_run = dry_run
+        
+        # Stats
+        self.stats = {
+            'slots_overloaded': 0,
+            'profiles_moved': 0,
+            'profiles_written': 0
+        }
+    
+    async def overflow_ids(self, slot: int, excess: int) -> List[int]:
+        """The `excess` highest ids due in a slot (the ones to move)"""
+        start = self.slots.slot_start(slot).isoformat()
+        end = self.slots.slot_start(slot + 1).isoformat()
+        rows = await self.db.fetch_page('onlyfans_profiles', 'id', limit=excess, filters={
+            'and': f'(next_refresh_at.gte.{start},next_refresh_at.lt.{end})',
+            'order': 'id.desc'
+        })
+        return [r['id'] for r in rows or []]
+    
+    async def write_moves(self, moves: List[Dict[str, Any]]) -> int:
+        """One reschedule_refreshes() call per chunk; without migration 011, one PATCH per distinct time"""
+        written = await self.db.reschedule_refreshes(moves)
+        if written is not None:
+            return written
+        
+        by_time: Dict[str, List[int]] = {}
+        for move in moves:
+            by_time.setdefault(move['next_refresh_at'], []).append(move['id'])
+        written = 0
+        for when, group in by_time.items():
+            written += await self.db.patch_rows('onlyfans_profiles', group, {'next_refresh_at': when})
+        return written
+    
+    async def run(self):
+        """Main rebalance loop"""
+        print("="*60)
+        print("REFRESH LOAD REBALANCE")
+        print("="*60)
+        print(f"Capacity: {self.slots.capacity}/slot, horizon {self.horizon_days:.0f}d, "
+              f"tolerance ±{self.tolerance} slots")
+        if self.dry_run:
+            print("🔍 DRY RUN MODE - No database writes")
+        
+        if not await self.slots.load_occupancy(self.db, self.horizon_days):
+            print("❌ Could not load slot occupancy (is migration 003 applied?)")
+            return
+        before = self.slots.load_stats()
+        print(f"Before: {before['slots']} slots, peak {before['peak']}, "
+              f"mean {before['mean']:.1f}, {before['overloaded']} overloaded\n")
+        
+        start = time.time()
+        earliest = self.slots.slot_of(time.time()) + 1
+        overloaded = self.slots.overloaded()
+        self.stats['slots_overloaded'] = len(overloaded)
+        
+        for slot, excess in tqdm(overloaded, desc="Rebalancing", unit="slot"):
+            ids = await self.overflow_ids(slot, excess)
+            self.slots.release(slot, len(ids))
+            
+            # Each moved id gets its own spaced time inside the target slot
+            moves = []
+            for creator_id in ids:
+                target = self.slots.best_slot(slot, self.tolerance, earliest)
+                when = self.slots.place(target).replace(tzinfo=timezone.utc).isoformat()
+                moves.append({'id': creator_id, 'next_refresh_at': when})
+            
+            self.stats['profiles_moved'] += len(ids)
+            if self.dry_run:
+                self.stats['profiles_written'] += len(moves)
+            else:
+                self.stats['profiles_written'] += await self.write_moves(moves)
+        
+        self.print_summary(before, time.time() - start)
+    
+    def print_summary(self, before: Dict[str, float], elapsed: float):
+        """Print final summary"""
+        after = self.slots.load_stats()
+        print("\n" + "="*60)
+        print("REBALANCE COMPLETE")
+        print("="*60)
+        print(f"Overloaded slots: {self.stats['slots_overloaded']}")
+        print(f"Profiles moved: {self.stats['profiles_moved']}")
+        print(f"{'Would write' if self.dry_run else 'Written'}: {self.stats['profiles_written']}")
+        print(f"Peak slot: {before['peak']} → {after['peak']}")
+        print(f"Elapsed: {elapsed:.1f}s")
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Refresh Scheduler')
+    
+    # Mode
+    parser.add_argument('--rebalance', action='store_true',
+                       help='Move overflow out of overloaded refresh slots')
+    
+    # Options
+    parser.add_argument('--slot-capacity', type=int, required=True,
+                       help='Target refreshes per hour')
+    parser.add_argument('--horizon-days', type=float, default=30.0,
+                       help='How far ahead to rebalance (default: 30)')
+    parser.add_argument('--tolerance-hours', type=float, default=24.0,
+                       help='Max move for a due date (default: 24)')
+    parser.add_argument('--dry-run', action='store_true', help='Dry run (no database writes)')
+    
+    args = parser.parse_args()
+    if not args.rebalance:
+        parser.error('nothing to do (pass --rebalance)')
+    
+    # Environment variables
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    rebalancer = SlotRebalancer(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        capacity=args.slot_capacity,
+        horizon_days=args.horizon_days,
+        tolerance_hours=args.tolerance_hours,
+        dry_run=args.dry_run
+    )
+    
+    # Run
+    asyncio.run(rebalancer.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Response outcome classifier for OnlyFans V2 scanners
+- Labels each ID from API status codes and error bodies (no DOM read)
+- Outcomes: profile | not_found | non_performer | restricted | auth_expired | transient_error
+- Records the decisive signal for each ID (e.g. 'api_404', 'dom:page is not available')
+- Single-pass DOM check (body text, one regex) only when the API was ambiguous
+- Per-run tally of outcomes and signals
+"""
+
+import json
+import re
+from collections import Counter
+from typing import Dict, Any, Optional, Tuple
+
+
+# ============================================================================
+# Outcomes
+# ============================================================================
+
+PROFILE = 'profile'
+NOT_FOUND = 'not_found'
+NON_PERFORMER = 'non_performer'
+RESTRICTED = 'restricted'
+AUTH_EXPIRED = 'auth_expired'
+TRANSIENT_ERROR = 'transient_error'
+
+OUTCOMES = (PROFILE, NOT_FOUND, NON_PERFORMER, RESTRICTED, AUTH_EXPIRED, TRANSIENT_ERROR)
+
+# When several /api2/v2/users/ responses arrive for one ID, the strongest wins
+_PRECEDENCE = {
+    PROFILE: 6,
+    NON_PERFORMER: 6,
+    NOT_FOUND: 5,
+    AUTH_EXPIRED: 4,
+    RESTRICTED: 3,
+    TRANSIENT_ERROR: 2,
+}
+
+_AUTH_WORDS = ('login', 'log in', 'sign in', 'refresh the page', 'unauthorized', 'session')
+_RESTRICTED_WORDS = ('restricted', 'blocked', 'denied', 'not available in your', 'forbidden')
+
+
+# ============================================================================
+# API Classification
+# ============================================================================
+
+def _error_message(payload: Any) -> str:
+    if not isinstance(payload, dict):
+        return ''
+    error = payload.get('error')
+    if isinstance(error, dict):
+        return str(error.get('message') or '')
+    if isinstance(error, str):
+        return error
+    return ''
+
+
+def classify_api_response(status: int, payload: Any) -> Optional[Tuple[str, str]]:
+    """
+    Classify one /api2/v2/users/ response.
+    Returns (outcome, signal), or None when the response says nothing about the ID
+    (e.g. 200 responses for auth/stats endpoints without an 'id').
+    """
+    message = _error_message(payload)
+    lowered = message.lower()
+    
+    if status == 200 and isinstance(payload, dict) and 'id' in payload and not message:
+        if not payload.get('isPerformer', False):
+            return (NON_PERFORMER, 'api_200_isPerformer_false')
+        return (PROFILE, 'api_200_profile')
+    
+    if message == 'User not found' or 'not found' in lowered:
+        return (NOT_FOUND, 'api_error_user_not_found')
+    if status == 404:
+        return (NOT_FOUND, 'api_404')
+    if status == 401:
+        return (AUTH_EXPIRED, 'api_401')
+    if status == 403:
+        if any(w in lowered for w in _AUTH_WORDS):
+            return (AUTH_EXPIRED, 'api_403_auth')
+        return (RESTRICTED, 'api_403')
+    if status == 429:
+        return (TRANSIENT_ERROR, 'api_429')
+    if status >= 500:
+        return (TRANSIENT_ERROR, f'api_{status}')
+    if message:
+        if any(w in lowered for w in _AUTH_WORDS):
+            return (AUTH_EXPIRED, f'api_{status}_auth')
+        if any(w in lowered for w in _RESTRICTED_WORDS):
+            return (RESTRICTED, f'api_{status}_restricted')
+    return None
+
+
+def parse_api_body(body: bytes) -> Any:
+    """Decode a response body, returning None if it is not JSON"""
+    try:
+        return json.loads(body)
+    except Exception:
+        return None
+
+
+class OutcomeRecorder:
+    """Collect API signals for one ID and pick the decisive one"""
+    
+    def __init__(self):
+        self.outcome: Optional[str] = None
+        self.signal: Optional[str] = None
+    
+    def observe(self, result: Optional[Tuple[str, str]]):
+        """Feed one classify_api_response() result"""
+        if result is None:
+            return
+        outcome, signal = result
+        if self.outcome is None or _PRECEDENCE[outcome] > _PRECEDENCE[self.outcome]:
+            self.outcome, self.signal = outcome, signal
+    
+    @property
+    def decisive(self) -> bool:
+        """True when the API alone settled the outcome"""
+        return self.outcome is not None
+
+
+# ============================================================================
+# DOM Fallback (single pass)
+# ============================================================================
+
+_DOM_PATTERNS = [
+    (NOT_FOUND, ("sorry this page is not available", "page is not available",
+                 "profile not found", "user not found", "this profile no longer exists")),
+    (RESTRICTED, ("this account is restricted", "not available in your country")),
+    (AUTH_EXPIRED, ("log in to onlyfans", "sign up to support your favorite creators")),
+]
+_DOM_REGEX = re.compile('|'.join(
+    f'(?P<{outcome}_{i}>{re.escape(phrase)})'
+    for outcome, phrases in _DOM_PATTERNS for i, phrase in enumerate(phrases)
+))
+
+# Only the rendered text is needed, not the serialised HTML
+_BODY_TEXT_JS = "() => document.body ? document.body.innerText.toLowerCase() : ''"
+
+
+def classify_dom_text(text: str) -> Optional[Tuple[str, str]]:
+    """Classify already-lowercased page text with one regex pass"""
+    match = _DOM_REGEX.search(text)
+    if not match:
+        return None
+    outcome = match.lastgroup.rsplit('_', 1)[0]
+    return (outcome, f'dom:{match.group(0)}')
+
+
+async def classify_page_dom(page) -> Optional[Tuple[str, str]]:
+    """Read the page body text once and classify it (only called when the API was ambiguous)"""
+    try:
+        text = await page.evaluate(_BODY_TEXT_JS)
+    except Exception as e:
+        print(f"⚠️ Error reading page text: {e}")
+        return None
+    return classify_dom_text(text or '')
+
+
+# ============================================================================
+# Per-run Tally
+# ============================================================================
+
+class OutcomeTally:
+    """Count outcomes and decisive signals across a run"""
+    
+    def __init__(self):
+        self.outcomes: Counter = Counter()
+        self.signals: Counter = Counter()
+    
+    def record(self, outcome: str, signal: str):
+        self.outcomes[outcome] += 1
+        self.signals[f'{outcome}:{signal}'] += 1
+    
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        return {'outcomes': dict(self.outcomes), 'signals': dict(self.signals)}
+    
+    def print_summary(self):
+        if not self.outcomes:
+            return
+        print("\nOutcomes:")
+        for outcome, count in self.outcomes.most_common():
+            print(f"  {outcome}: {count}")
+        print("Decisive signals:")
+        for signal, count in self.signals.most_common():
+            print(f"  {signal}: {count}")
@@ -2,15 +2,20 @@
 Shared utilities for OnlyFans V2 scraper
 - Supabase client for direct REST API upserts
 - Rate limiter with token bucket algorithm
+- Adaptive byte budget (AIMD) for sizing bulk write requests
 - Proxy pool with health scoring
 - User-agent rotation
+- CPU worker pool for parse/extract/classify work
 """
 
 import asyncio
+import functools
 import json
 import time
 import random
-from typing import Optional, Dict, Any, List
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Iterator, Tuple
 from datetime import datetime, timedelta, timezone
 import aiohttp
 
@@ -30,6 +35,7 @@ class SupabaseClient:
             'Content-Type': 'application/json',
             'Prefer': 'resolution=merge-duplicates'
         }
+        self.budget = AdaptiveByteBudget()
     
     async def upsert_profile(self, profile: Dict[str, Any]) -> bool:
         """
@@ -79,6 +85,116 @@ class SupabaseClient:
             print(f"⚠️ Snapshot exception: {e}")
             return False
     
+    async def _post_rows(self, table: str, rows: List[Any], label: str,
+                         dumps: Optional[Callable[[Any], str]] = None) -> bool:
+        """
+        POST rows in as many requests as the adaptive byte budget calls for.
+        A 413 splits that request in half. Dict rows get lowercased keys and
+        cleaned values; rows that are already JSON text are passed with dumps=str.
+        """
+        if not rows:
+            return True
+        
+        endpoint = f"{self.url}/rest/v1/{table}"
+        if dumps is None:
+            rows = [{k.lower(): v for k, v in self._clean_data(row).items()} for row in rows]
+            dumps = json.dumps
+        
+        ok = True
+        try:
+            async with aiohttp.ClientSession() as session:
+                for batch, payload in self.budget.pack(rows, dumps=dumps):
+                    ok = await self._post_payload(session, endpoint, batch, payload, label, dumps) and ok
+        except Exception as e:
+            print(f"⚠️ {label} exception: {e}")
+            return False
+        return ok
+    
+    async def _post_payload(self, session: aiohttp.ClientSession, endpoint: str,
+                            batch: List[Any], payload: str, label: str,
+                            dumps: Callable[[Any], str] = json.dumps) -> bool:
+        started = time.monotonic()
+        try:
+            async with session.post(endpoint, data=payload, headers=self.headers) as resp:
+                self.budget.record(len(payload), time.monotonic() - started, resp.status)
+                if resp.status in (200, 201, 204):
+                    return True
+                if resp.status == 413 and len(batch) > 1:
+                    half = len(batch) // 2
+                    ok = True
+                    for part in (batch[:half], batch[half:]):
+                        part_payload = '[' + ','.join(map(dumps, part)) + ']'
+                        ok = await self._post_payload(session, endpoint, part, part_payload, label, dumps) and ok
+                    return ok
+                error_text = await resp.text()
+                print(f"⚠️ {label} failed ({resp.status}, {len(batch)} rows): {error_text[:200]}")
+                return False
+        except asyncio.TimeoutError:
+            self.budget.record(len(payload), time.monotonic() - started, 0)
+            print(f"⚠️ {label} timed out ({len(batch)} rows, {len(payload) // 1024} KB)")
+            return False
+    
+    async def upsert_profiles(self, profiles: List[Dict[str, Any]]) -> bool:
+        """
+        Upsert many profiles to onlyfans_profiles.
+        PostgREST bulk bodies must share one key set (missing keys would be written
+        as NULL), so rows are grouped by their columns and sent one request per group.
+        """
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for profile in profiles:
+            groups.setdefault(frozenset(profile), []).append(profile)
+        
+        ok = True
+        for rows in groups.values():
+            ok = await self._post_rows('onlyfans_profiles', rows, 'Bulk upsert') and ok
+        return ok
+    
+    async def upsert_rows(self, table: str, rows: List[Dict[str, Any]], chunk_size: int = 1000) -> bool:
+        """Upsert rows with a uniform key set into any table, one request per chunk"""
+        ok = True
+        for i in range(0, len(rows), chunk_size):
+            ok = await self._post_rows(table, rows[i:i + chunk_size], f'{table} upsert') and ok
+        return ok
+    
+    async def upsert_column_batch(self, table: str, batch) -> bool:
+        """Upsert a v2_columnar.ColumnBatch; rows are serialised column-wise, never built as dicts"""
+        return await self._post_rows(table, list(batch.iter_json_rows()), f'{table} upsert', dumps=str)
+    
+    async def delete_rows(self, table: str, filters: Dict[str, str]) -> bool:
+        """DELETE rows matching PostgREST filters (e.g. {'computed_at': 'lt.2026-01-01'})"""
+        if not filters:
+            raise ValueError("delete_rows requires at least one filter")
+        endpoint = f"{self.url}/rest/v1/{table}"
+        headers = {**self.headers, 'Prefer': 'return=minimal'}
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.delete(endpoint, params=filters, headers=headers) as resp:
+                    if resp.status in (200, 204):
+                        return True
+                    error_text = await resp.text()
+                    print(f"⚠️ Delete from {table} failed ({resp.status}): {error_text[:200]}")
+                    return False
+        except Exception as e:
+            print(f"⚠️ Delete from {table} exception: {e}")
+            return False
+    
+    async def insert_snapshots(self, snapshots: List[Dict[str, Any]]) -> bool:
+        """
+        Insert many snapshots to onlyfans_profile_snapshots (grouped by key set).
+        Rows that carry captured_at (backfills, imports) are also grouped by month,
+        so each request lands in a single monthly partition (migration 008).
+        """
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for snapshot in snapshots:
+            month = str(snapshot.get('captured_at') or '')[:7]
+            groups.setdefault((frozenset(snapshot), month), []).append(snapshot)
+        
+        ok = True
+        for rows in groups.values():
+            ok = await self._post_rows('onlyfans_profile_snapshots', rows, 'Bulk snapshot insert') and ok
+        return ok
+    
     async def update_scan_progress(self, last_id: int, max_id: int, 
                                    creators_delta: int = 0, scanned_delta: int = 1) -> bool:
         """Update scan_progress table via RPC function"""
@@ -99,6 +215,61 @@ class SupabaseClient:
             print(f"⚠️ Progress update exception: {e}")
             return False
     
+    async def call_rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Call a Postgres function via PostgREST; returns its JSON result or None on failure"""
+        endpoint = f"{self.url}/rest/v1/rpc/{function}"
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(endpoint, json=params or {}, headers=self.headers) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+                    if resp.status == 204:
+                        return {}
+                    error_text = await resp.text()
+                    print(f"⚠️ RPC {function} failed ({resp.status}): {error_text[:200]}")
+                    return None
+        except Exception as e:
+            print(f"⚠️ RPC {function} exception: {e}")
+            return None
+    
+    async def apply_status_transitions(self, transitions: List[Dict[str, Any]],
+                                       chunk_size: int = 1000) -> Optional[Dict[str, int]]:
+        """
+        Set-based status update via the apply_status_transitions RPC (migration 004).
+        `transitions` are {id, status, next_refresh_at} rows; one statement per chunk.
+        Returns {'old_to_new': profiles} counts from the database, or None on failure.
+        """
+        counts: Dict[str, int] = {}
+        for i in range(0, len(transitions), chunk_size):
+            chunk = [
+                {'id': t['id'], 'status': t['status'], 'next_refresh_at': t['next_refresh_at']}
+                for t in transitions[i:i + chunk_size]
+            ]
+            result = await self.call_rpc('apply_status_transitions', {'p_transitions': chunk})
+            if result is None:
+                return None
+            for row in result or []:
+                key = f"{row['old_status']}_to_{row['new_status']}"
+                counts[key] = counts.get(key, 0) + int(row['profiles'])
+        return counts
+    
+    async def reschedule_refreshes(self, moves: List[Dict[str, Any]],
+                                   chunk_size: int = 1000) -> Optional[int]:
+        """
+        Set-based next_refresh_at update via the reschedule_refreshes RPC (migration 011).
+        `moves` are {id, next_refresh_at} rows, each with its own time; one statement per chunk.
+        Returns the number of profiles updated, or None on failure.
+        """
+        updated = 0
+        for i in range(0, len(moves), chunk_size):
+            chunk = moves[i:i + chunk_size]
+            result = await self.call_rpc('reschedule_refreshes', {'p_moves': chunk})
+            if result is None:
+                return None
+            updated += int(result or 0)
+        return updated
+    
     async def get_scan_progress(self) -> Dict[str, Any]:
         """Get current scan progress"""
         endpoint = f"{self.url}/rest/v1/scan_progress?id=eq.1&select=*"
@@ -159,6 +330,100 @@ class SupabaseClient:
             print(f"⚠️ Update crawl run exception: {e}")
             return False
     
+    async def get_watermark(self, job: str) -> Optional[Dict[str, Any]]:
+        """Read a maintenance job's watermark row (migration 006); None if never run or on error"""
+        rows = await self.fetch_page('maintenance_watermarks', '*', key='job', limit=1,
+                                     filters={'job': f'eq.{job}'})
+        return rows[0] if rows else None
+    
+    async def set_watermark(self, job: str, watermark: Any, details: Optional[Dict] = None) -> bool:
+        """Upsert a maintenance job's watermark after a batch has been committed"""
+        return await self._post_rows('maintenance_watermarks', [{
+            'job': job,
+            'watermark': watermark,
+            'details': details or {},
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }], 'Watermark update')
+    
+    async def fetch_page(self, table: str, select: str, after: Optional[Any] = None,
+                         key: str = 'id', limit: int = 1000,
+                         filters: Optional[Dict[str, str]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch one keyset-paginated page ordered by `key` (no OFFSET scans).
+        Pass the last row's key as `after` to get the next page.
+        Returns None on failure (an empty list means the table is exhausted).
+        """
+        endpoint = f"{self.url}/rest/v1/{table}"
+        params = {
+            'select': select,
+            'order': f'{key}.asc',
+            'limit': str(limit),
+            **(filters or {})
+        }
+        if after is not None:
+            params[key] = f'gt.{after}'
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(endpoint, params=params, headers=self.headers) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+                    error_text = await resp.text()
+                    print(f"⚠️ Page fetch failed ({resp.status}): {error_text[:200]}")
+                    return None
+        except Exception as e:
+            print(f"⚠️ Page fetch exception: {e}")
+            return None
+    
+    async def table_columns(self, table: str) -> Optional[Dict[str, str]]:
+        """
+        Column name -> Postgres type (e.g. 'bigint', 'jsonb', 'text[]') in table order,
+        from PostgREST's OpenAPI description. Returns None if it is unavailable.
+        """
+        endpoint = f"{self.url}/rest/v1/"
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(endpoint, headers=self.headers) as resp:
+                    if resp.status != 200:
+                        print(f"⚠️ Schema fetch failed ({resp.status})")
+                        return None
+                    spec = await resp.json(content_type=None)
+        except Exception as e:
+            print(f"⚠️ Schema fetch exception: {e}")
+            return None
+        
+        properties = spec.get('definitions', {}).get(table, {}).get('properties')
+        if not properties:
+            return None
+        return {name: prop.get('format') or prop.get('type') or 'text' for name, prop in properties.items()}
+    
+    async def patch_rows(self, table: str, ids: List[Any], values: Dict[str, Any],
+                         key: str = 'id', chunk_size: int = 500) -> int:
+        """
+        Set-based update: apply the same `values` to every row whose key is in `ids`
+        (one PATCH ...?id=in.(...) per chunk). Returns the number of ids patched.
+        """
+        endpoint = f"{self.url}/rest/v1/{table}"
+        headers = {**self.headers, 'Prefer': 'return=minimal'}
+        payload = self._clean_data(values)
+        patched = 0
+        
+        try:
+            async with aiohttp.ClientSession() as session:
+                for i in range(0, len(ids), chunk_size):
+                    chunk = ids[i:i + chunk_size]
+                    params = {key: f"in.({','.join(str(v) for v in chunk)})"}
+                    async with session.patch(endpoint, params=params, json=payload, headers=headers) as resp:
+                        if resp.status in (200, 204):
+                            patched += len(chunk)
+                        else:
+                            error_text = await resp.text()
+                            print(f"⚠️ Bulk patch failed ({resp.status}): {error_text[:200]}")
+        except Exception as e:
+            print(f"⚠️ Bulk patch exception: {e}")
+        return patched
+    
     def _clean_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Clean data for JSON serialization"""
         cleaned = {}
@@ -223,6 +488,78 @@ class RateLimiter:
                 self.tokens -= 1.0
 
 
+# ============================================================================
+# Adaptive Byte Budget (AIMD)
+# ============================================================================
+
+class AdaptiveByteBudget:
+    """
+    Serialised-bytes budget for bulk write requests.
+    Rows vary from a few hundred bytes to tens of KB (raw_json, about, thumbs),
+    so batches are packed by payload size instead of row count. The budget
+    grows additively while full requests stay under the target latency and
+    shrinks multiplicatively on slow requests, 413s, 5xx and timeouts.
+    Thread-safe, so one budget can be shared by upload threads.
+    """
+    
+    def __init__(self,
+                 initial: int = 1_000_000,
+                 min_bytes: int = 64_000,
+                 max_bytes: int = 8_000_000,
+                 step: int = 250_000,
+                 target_latency: float = 2.0,
+                 decrease: float = 0.5):
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.step = step
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.budget = max(min_bytes, min(max_bytes, initial))
+        self.stats = {'requests': 0, 'increases': 0, 'decreases': 0}
+        self._lock = threading.Lock()
+    
+    def record(self, nbytes: int, latency: float, status: int):
+        """Feed back one request (status 0 = timeout / connection error)"""
+        with self._lock:
+            self.stats['requests'] += 1
+            if status == 0 or status == 413 or status == 408 or status >= 500:
+                factor = self.decrease
+            elif 200 <= status < 300 and latency > self.target_latency:
+                # Still succeeded, so back off more gently than on an error
+                factor = (1 + self.decrease) / 2
+            elif 200 <= status < 300 and nbytes >= self.budget * 0.8:
+                # Only requests that actually used the budget may grow it
+                self.budget = min(self.max_bytes, self.budget + self.step)
+                self.stats['increases'] += 1
+                return
+            else:
+                return
+            self.budget = max(self.min_bytes, int(min(self.budget, nbytes) * factor))
+            self.stats['decreases'] += 1
+    
+    def pack(self, rows: List[Dict[str, Any]], max_rows: int = 0,
+             dumps: Callable[[Any], str] = json.dumps) -> Iterator[Tuple[List[Dict[str, Any]], str]]:
+        """
+        Yield (rows, JSON array payload) batches of at most `budget` bytes.
+        Each row is serialised once; the budget is re-read for every batch,
+        so feedback recorded while earlier batches are in flight applies to the next.
+        A single row larger than the budget is sent alone.
+        """
+        batch: List[Dict[str, Any]] = []
+        parts: List[str] = []
+        size = 2
+        for row in rows:
+            part = dumps(row)
+            if batch and (size + len(part) + 1 > self.budget or (max_rows and len(batch) >= max_rows)):
+                yield batch, '[' + ','.join(parts) + ']'
+                batch, parts, size = [], [], 2
+            batch.append(row)
+            parts.append(part)
+            size += len(part) + 1
+        if batch:
+            yield batch, '[' + ','.join(parts) + ']'
+
+
 # ============================================================================
 # Proxy Pool
 # ============================================================================
@@ -328,3 +665,54 @@ class UserAgentRotator:
             return random.choice(self.MOBILE_AGENTS)
         else:
             return random.choice(self.DESKTOP_AGENTS)
+
+
+# ============================================================================
+# CPU Worker Pool
+# ============================================================================
+
+class CPUWorkerPool:
+    """
+    Run CPU-bound work (JSON parsing, field extraction, classification)
+    off the event loop thread.
+    
+    workers=0 runs everything inline (previous behaviour). At most
+    max_pending jobs are queued at once; further callers wait, which
+    pushes backpressure into the fetch stage instead of growing a backlog.
+    """
+    
+    def __init__(self, workers: int = 0, mode: str = 'thread', max_pending: Optional[int] = None):
+        """
+        Args:
+            workers: Pool size (0 = inline, no pool)
+            mode: 'thread' or 'process' (process avoids the GIL, functions must be picklable)
+            max_pending: Max jobs submitted but not finished (default: 4 x workers)
+        """
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown worker mode: {mode}")
+        
+        self.workers = max(0, workers)
+        self.mode = mode
+        self.executor: Optional[Executor] = None
+        if self.workers:
+            if mode == 'process':
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                   thread_name_prefix='cpu-worker')
+        self.pending = asyncio.Semaphore(max_pending or max(1, self.workers * 4))
+    
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the pool and return its result"""
+        if self.executor is None:
+            return fn(*args, **kwargs)
+        
+        async with self.pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+    
+    def shutdown(self):
+        """Stop worker threads/processes"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,210 @@
+"""
+Snapshot retention for OnlyFans V2
+- Keeps onlyfans_profile_snapshots at full resolution for a recent window (default 30 days)
+- Older snapshots are thinned to the last one per creator per day, then per week (after 180 days)
+- Runs incrementally: each tier resumes from its watermark in maintenance_watermarks
+- Works through bucket-aligned time windows with limited DELETE batches (downsample_snapshots RPC)
+- Dry-run mode reports what would be deleted without touching anything
+"""
+
+import asyncio
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pathlib import Path
+
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+
+
+# ============================================================================
+# Time Buckets
+# ============================================================================
+
+def floor_bucket(ts: datetime, bucket: str) -> datetime:
+    """Start of the UTC day / ISO week (Monday) containing ts, like Postgres date_trunc"""
+    day = ts.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+# ============================================================================
+# Retention Job
+# ============================================================================
+
+class SnapshotRetention:
+    """Downsample old snapshots tier by tier, window by window, from stored watermarks"""
+    
+    def __init__(self,
+                 supabase_url: str,
+                 supabase_key: str,
+                 raw_days: int = 30,
+                 daily_days: int = 180,
+                 window_days: int = 7,
+                 batch_limit: int = 5000,
+                 dry_run: bool = False):
+        
+        self.db = SupabaseClient(supabase_url, supabase_key)
+        self.raw_days = raw_days
+        self.daily_days = daily_days
+        self.window_days = window_days
+        self.batch_limit = batch_limit
+        self.dry_run = dry_run
+        
+        self.stats = {'windows': 0, 'batches': 0, 'deleted': {'day': 0, 'week': 0}}
+    
+    def tiers(self, now: datetime):
+        """(job name, bucket, cutoff): everything before cutoff is thinned to one snapshot per bucket"""
+        return [
+            ('snapshot_retention_daily', 'day', floor_bucket(now - timedelta(days=self.raw_days), 'day')),
+            ('snapshot_retention_weekly', 'week', floor_bucket(now - timedelta(days=self.daily_days), 'week')),
+        ]
+    
+    async def earliest_snapshot(self) -> Optional[datetime]:
+        rows = await self.db.fetch_page('onlyfans_profile_snapshots', 'captured_at', key='captured_at', limit=1)
+        if not rows:
+            return None
+        return datetime.fromisoformat(rows[0]['captured_at'].replace('Z', '+00:00'))
+    
+    async def downsample_window(self, start: datetime, end: datetime, bucket: str) -> Optional[int]:
+        """Delete all surplus snapshots in [start, end) in batches; None if an RPC call failed"""
+        total = 0
+        while True:
+            deleted = await self.db.call_rpc('downsample_snapshots', {
+                'p_from': start.isoformat(),
+                'p_to': end.isoformat(),
+                'p_bucket': bucket,
+                'p_limit': self.batch_limit,
+                'p_dry_run': self.dry_run
+            })
+            if deleted is None:
+                return None
+            self.stats['batches'] += 1
+            total += int(deleted)
+            if self.dry_run or int(deleted) < self.batch_limit:
+                return total
+    
+    async def run_tier(self, job: str, bucket: str, cutoff: datetime, earliest: datetime) -> bool:
+        """Walk windows from the tier's watermark up to its cutoff; the watermark advances per window"""
+        mark = await self.db.get_watermark(job)
+        start = datetime.fromisoformat(mark['watermark']) if mark and mark.get('watermark') else earliest
+        start = floor_bucket(start, bucket)
+        if start >= cutoff:
+            print(f"✅ {bucket} tier up to date (watermark {start.date()})")
+            return True
+        
+        # Windows are whole buckets so a creator's day/week is never split across calls
+        step = timedelta(days=self.window_days) if bucket == 'day' else timedelta(weeks=4)
+        windows = []
+        while start < cutoff:
+            end = min(start + step, cutoff)
+            windows.append((start, end))
+            start = end
+        
+        pbar = tqdm(windows, desc=f"Thinning to 1/{bucket}", unit="window")
+        for window_start, window_end in pbar:
+            deleted = await self.downsample_window(window_start, window_end, bucket)
+            if deleted is None:
+                pbar.close()
+                print(f"⚠️ {bucket} tier stopped at {window_start.date()} (resumes there next run)")
+                return False
+            self.stats['windows'] += 1
+            self.stats['deleted'][bucket] += deleted
+            pbar.set_postfix(deleted=self.stats['deleted'][bucket])
+            
+            if not self.dry_run:
+                await self.db.set_watermark(job, window_end.isoformat(), {
+                    'bucket': bucket,
+                    'deleted': deleted,
+                    'window_start': window_start.isoformat()
+                })
+        pbar.close()
+        return True
+    
+    async def run(self):
+        """Main retention loop: daily tier first so the weekly tier reads already-thinned rows"""
+        if self.dry_run:
+            print("🔍 DRY RUN MODE - counting only, watermarks unchanged")
+        
+        earliest = await self.earliest_snapshot()
+        if earliest is None:
+            print("✅ No snapshots")
+            return
+        
+        now = datetime.now(timezone.utc)
+        print(f"🗂️ Full resolution after {(now - timedelta(days=self.raw_days)).date()}, "
+              f"daily after {(now - timedelta(days=self.daily_days)).date()}, weekly before")
+        
+        for job, bucket, cutoff in self.tiers(now):
+            if not await self.run_tier(job, bucket, cutoff, earliest):
+                break
+        
+        self.print_summary()
+    
+    def print_summary(self):
+        """Print final summary"""
+        verb = "Would delete" if self.dry_run else "Deleted"
+        print("\n" + "="*60)
+        print("SNAPSHOT RETENTION COMPLETE")
+        print("="*60)
+        print(f"Windows processed: {self.stats['windows']}")
+        print(f"RPC batches: {self.stats['batches']}")
+        print(f"{verb} (daily tier): {self.stats['deleted']['day']}")
+        print(f"{verb} (weekly tier): {self.stats['deleted']['week']}")
+        print("="*60)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Snapshot Retention')
+    
+    parser.add_argument('--raw-days', type=int, default=30,
+                       help='Keep every snapshot for this many days (default: 30)')
+    parser.add_argument('--daily-days', type=int, default=180,
+                       help='Keep one snapshot per day up to this age, one per week after (default: 180)')
+    parser.add_argument('--window-days', type=int, default=7,
+                       help='Days per RPC window in the daily tier (default: 7)')
+    parser.add_argument('--batch-limit', type=int, default=5000,
+                       help='Max snapshots deleted per RPC call (default: 5000)')
+    parser.add_argument('--dry-run', action='store_true', help='Count what would be deleted')
+    
+    args = parser.parse_args()
+    
+    if args.daily_days <= args.raw_days:
+        parser.error('--daily-days must be greater than --raw-days')
+    
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    
+    if not supabase_url or not supabase_key:
+        print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+        sys.exit(1)
+    
+    retention = SnapshotRetention(
+        supabase_url=supabase_url,
+        supabase_key=supabase_key,
+        raw_days=args.raw_days,
+        daily_days=args.daily_days,
+        window_days=args.window_days,
+        batch_limit=args.batch_limit,
+        dry_run=args.dry_run
+    )
+    
+    asyncio.run(retention.run())
+
+
+if __name__ == '__main__':
+    main()
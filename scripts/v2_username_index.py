@@ -0,0 +1,197 @@
+"""
+Username <-> ID index for OnlyFans V2 creators
+- Local SQLite history of every username seen for each numeric creator id
+- Point lookups by username (latest holder wins) and by id (current username)
+- Batch lookups for URL lists (one IN query per 500 names)
+- Rename detection when the refresh orchestrator sees a new username for an id
+- Seed/sync from onlyfans_profiles with keyset pagination (--sync)
+"""
+
+import asyncio
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+from pathlib import Path
+
+from tqdm import tqdm
+
+# Load environment variables from .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from v2_shared_utils import SupabaseClient
+
+
+DEFAULT_INDEX_PATH = 'username_index.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usernames (
+    username_lc TEXT NOT NULL,
+    creator_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (username_lc, creator_id)
+);
+CREATE INDEX IF NOT EXISTS idx_usernames_creator ON usernames(creator_id, last_seen DESC);
+"""
+
+
+# ============================================================================
+# Index
+# ============================================================================
+
+class UsernameIndex:
+    """SQLite-backed username history keyed on the stable numeric creator id"""
+    
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def current_username(self, creator_id: int) -> Optional[str]:
+        """Most recently seen username for an id"""
+        row = self.conn.execute(
+            'SELECT username FROM usernames WHERE creator_id = ? ORDER BY last_seen DESC LIMIT 1',
+            (creator_id,)).fetchone()
+        return row[0] if row else None
+    
+    def lookup_id(self, username: str) -> Optional[int]:
+        """Id that most recently used this username (case-insensitive)"""
+        row = self.conn.execute(
+            'SELECT creator_id FROM usernames WHERE username_lc = ? ORDER BY last_seen DESC LIMIT 1',
+            (username.strip().lower(),)).fetchone()
+        return row[0] if row else None
+    
+    def lookup_ids(self, usernames: Iterable[str], chunk_size: int = 500) -> Dict[str, int]:
+        """Batch lookup: {username_lc: creator_id} for every known name"""
+        names = sorted({u.strip().lower() for u in usernames if u and u.strip()})
+        found: Dict[str, Tuple[int, float]] = {}
+        for i in range(0, len(names), chunk_size):
+            chunk = names[i:i + chunk_size]
+            placeholders = ','.join('?' * len(chunk))
+            for name, creator_id, last_seen in self.conn.execute(
+                    f'SELECT username_lc, creator_id, last_seen FROM usernames WHERE username_lc IN ({placeholders})',
+                    chunk):
+                if name not in found or last_seen > found[name][1]:
+                    found[name] = (creator_id, last_seen)
+        return {name: creator_id for name, (creator_id, _) in found.items()}
+    
+    def history(self, creator_id: int) -> List[Dict[str, Any]]:
+        """All usernames an id has used, oldest first"""
+        return [
+            {'username': username, 'first_seen': first_seen, 'last_seen': last_seen}
+            for username, first_seen, last_seen in self.conn.execute(
+                'SELECT username, first_seen, last_seen FROM usernames WHERE creator_id = ? ORDER BY first_seen',
+                (creator_id,))
+        ]
+    
+    def observe_many(self, observations: Iterable[Tuple[int, str, Optional[str]]],
+                     seen_at: Optional[float] = None) -> int:
+        """
+        Record (creator_id, username, previous_username) observations in one transaction.
+        previous_username is what the caller believed the name was (e.g. the DB row);
+        it is kept as history if it differs. Returns the number of renames detected.
+        """
+        now = seen_at or time.time()
+        renames = 0
+        with self.conn:
+            for creator_id, username, previous in observations:
+                if not username:
+                    continue
+                previous = previous or self.current_username(creator_id)
+                if previous and previous.lower() != username.lower():
+                    renames += 1
+                    self.conn.execute(
+                        'INSERT OR IGNORE INTO usernames VALUES (?, ?, ?, ?, ?)',
+                        (previous.lower(), creator_id, previous, now - 1, now - 1))
+                self.conn.execute(
+                    'INSERT INTO usernames VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(username_lc, creator_id) DO UPDATE SET '
+                    'last_seen = excluded.last_seen, username = excluded.username',
+                    (username.lower(), creator_id, username, now, now))
+        return renames
+    
+    def observe(self, creator_id: int, username: str, previous: Optional[str] = None) -> bool:
+        """Record one observation; True if it was a rename"""
+        return self.observe_many([(creator_id, username, previous)]) > 0
+    
+    def count(self) -> Tuple[int, int]:
+        """(distinct ids, username rows)"""
+        return self.conn.execute('SELECT COUNT(DISTINCT creator_id), COUNT(*) FROM usernames').fetchone()
+    
+    async def sync_from_supabase(self, db: SupabaseClient, chunk_size: int = 1000) -> Tuple[int, int]:
+        """Walk onlyfans_profiles (keyset by id) and record every id/username pair"""
+        last_id = None
+        seen = renames = 0
+        pbar = tqdm(desc="Syncing usernames", unit="profile")
+        while True:
+            rows = await db.fetch_page('onlyfans_profiles', 'id,username', after=last_id, limit=chunk_size)
+            if rows is None:
+                raise RuntimeError(f"Failed to fetch profiles after id {last_id}")
+            if not rows:
+                break
+            renames += self.observe_many((r['id'], r.get('username'), None) for r in rows)
+            seen += len(rows)
+            last_id = rows[-1]['id']
+            pbar.update(len(rows))
+        pbar.close()
+        return seen, renames
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='OnlyFans V2 Username Index')
+    
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help=f'SQLite file (default: {DEFAULT_INDEX_PATH})')
+    parser.add_argument('--sync', action='store_true', help='Record every id/username in onlyfans_profiles')
+    parser.add_argument('--lookup', nargs='+', metavar='USERNAME', help='Resolve usernames to ids')
+    parser.add_argument('--history', type=int, metavar='ID', help='Show every username an id has used')
+    
+    args = parser.parse_args()
+    index = UsernameIndex(args.index)
+    
+    try:
+        if args.sync:
+            supabase_url = os.getenv('SUPABASE_URL')
+            supabase_key = os.getenv('SUPABASE_KEY')
+            
+            if not supabase_url or not supabase_key:
+                print("❌ Missing SUPABASE_URL or SUPABASE_KEY environment variables")
+                sys.exit(1)
+            
+            seen, renames = asyncio.run(index.sync_from_supabase(SupabaseClient(supabase_url, supabase_key)))
+            print(f"✅ Synced {seen} profiles ({renames} renames detected)")
+        
+        if args.lookup:
+            found = index.lookup_ids(args.lookup)
+            for name in args.lookup:
+                print(f"{name}: {found.get(name.strip().lower(), 'unknown')}")
+        
+        if args.history is not None:
+            for entry in index.history(args.history):
+                first = time.strftime('%Y-%m-%d', time.gmtime(entry['first_seen']))
+                last = time.strftime('%Y-%m-%d', time.gmtime(entry['last_seen']))
+                print(f"{entry['username']}: {first} → {last}")
+        
+        ids, rows = index.count()
+        print(f"📇 {args.index}: {ids} ids, {rows} usernames")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
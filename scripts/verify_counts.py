@@ -1,13 +1,29 @@
-﻿import os
-from supabase import create_client
+﻿import argparse
+import os
 
-url = os.environ["SUPABASE_URL"]
-key = os.environ["SUPABASE_ANON_KEY"]
+parser = argparse.ArgumentParser(description="Print the onlyfans_profiles row count")
+parser.add_argument("--mirror", metavar="PATH",
+                    help="Read counts from a local mirror (v2_local_mirror.py) instead of Supabase; no network")
+args = parser.parse_args()
 
-sb = create_client(url, key)
+if args.mirror:
+    from v2_local_mirror import ProfileMirror
 
-# Ask Supabase for an exact count, only fetch 1 row
-r = sb.table("onlyfans_profiles").select("id", count="exact").range(0, 0).execute()
+    mirror = ProfileMirror(args.mirror)
+    print("Mirror rows:", mirror.count())
+    print("By status:", mirror.status_counts())
+    print("Synced at:", mirror.synced_at() or "never")
+    mirror.close()
+else:
+    from supabase import create_client
 
-print("DB rows:", r.count)
-print("First row (if any):", r.data)
+    url = os.environ["SUPABASE_URL"]
+    key = os.environ["SUPABASE_ANON_KEY"]
+
+    sb = create_client(url, key)
+
+    # Ask Supabase for an exact count, only fetch 1 row
+    r = sb.table("onlyfans_profiles").select("id", count="exact").range(0, 0).execute()
+
+    print("DB rows:", r.count)
+    print("First row (if any):", r.data)
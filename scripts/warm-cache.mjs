@@ -6,19 +6,31 @@
  * Usage:
  *   node scripts/warm-cache.mjs                  # warms prod (fanspedia.net)
  *   node scripts/warm-cache.mjs http://localhost:3000  # warms local dev
+ *   node --env-file=.env scripts/warm-cache.mjs --changes  # only creators changed since the last run
  *
  * Fetches pages sequentially (1 at a time) so Supabase only sees 1 concurrent
  * query at a time. Each page triggers ISR generation on first hit.
+ *
+ * --changes reads profile_change_feed (scripts/migrations/010) from the
+ * change_feed:warm-cache cursor and warms /creator/<username>/ for each
+ * changed creator. The cursor only moves when every page warmed OK.
  */
 
 import { createRequire } from 'module';
 import { pathToFileURL } from 'url';
 import { resolve } from 'path';
 
-const BASE = process.argv[2] ?? 'https://fanspedia.net';
+const ARGS = process.argv.slice(2);
+const BASE = ARGS.find((a) => !a.startsWith('--')) ?? 'https://fanspedia.net';
+const CHANGES_ONLY = ARGS.includes('--changes');
 const DELAY_MS = 400; // pause between requests — be gentle on Supabase
 const TIMEOUT_MS = 30_000;
 
+const FEED_JOB = 'change_feed:warm-cache';
+const FEED_PAGE_SIZE = 1000;
+const FEED_LAG_MS = 60_000; // leave changes from in-flight transactions for the next run
+const FEED_MAX_CREATORS = 5000;
+
 // ---------------------------------------------------------------------------
 // Category slugs — generated from src/config/categories.ts RAW_LABELS
 // Run: node -e "const c=require('./src/config/categories.ts');console.log(c.ALL_CATEGORY_SLUGS)"
@@ -244,6 +256,85 @@ function sleep(ms) {
   return new Promise((r) => setTimeout(r, ms));
 }
 
+// ---------------------------------------------------------------------------
+// Change feed (--changes)
+// ---------------------------------------------------------------------------
+
+async function supabase(path, init = {}) {
+  const { SUPABASE_URL, SUPABASE_KEY } = process.env;
+  if (!SUPABASE_URL || !SUPABASE_KEY) {
+    throw new Error('Missing SUPABASE_URL or SUPABASE_KEY environment variables');
+  }
+  const res = await fetch(`${SUPABASE_URL}/rest/v1/${path}`, {
+    ...init,
+    headers: {
+      apikey: SUPABASE_KEY,
+      Authorization: `Bearer ${SUPABASE_KEY}`,
+      'Content-Type': 'application/json',
+      ...init.headers,
+    },
+  });
+  if (!res.ok) throw new Error(`Supabase ${res.status}: ${(await res.text()).slice(0, 200)}`);
+  return res.status === 204 ? null : res.json();
+}
+
+/** Usernames changed after the cursor, one per creator, plus the new cursor */
+async function readChangedCreators() {
+  const rows = await supabase(`maintenance_watermarks?select=watermark&job=eq.${encodeURIComponent(FEED_JOB)}`);
+  let cursor = Number(rows[0]?.watermark ?? 0);
+  const settled = new Date(Date.now() - FEED_LAG_MS).toISOString();
+  const usernames = new Map(); // creator_id -> latest username
+
+  while (usernames.size < FEED_MAX_CREATORS) {
+    const page = await supabase(
+      `profile_change_feed?select=change_id,creator_id,username&change_id=gt.${cursor}` +
+        `&changed_at=lt.${encodeURIComponent(settled)}&order=change_id.asc&limit=${FEED_PAGE_SIZE}`,
+    );
+    for (const row of page) {
+      if (row.username) usernames.set(row.creator_id, row.username);
+      cursor = row.change_id;
+    }
+    if (page.length < FEED_PAGE_SIZE) break;
+  }
+  return { cursor, usernames: [...new Set(usernames.values())] };
+}
+
+async function saveCursor(cursor, processed) {
+  await supabase('maintenance_watermarks', {
+    method: 'POST',
+    headers: { Prefer: 'resolution=merge-duplicates,return=minimal' },
+    body: JSON.stringify({
+      job: FEED_JOB,
+      watermark: String(cursor),
+      details: { processed },
+      updated_at: new Date().toISOString(),
+    }),
+  });
+}
+
+async function warmChanges() {
+  const { cursor, usernames } = await readChangedCreators();
+  console.log(`\nWarming ${usernames.length} changed creator pages on ${BASE}\n`);
+  const results = [];
+  for (const username of usernames) {
+    const r = await fetchPage(`/creator/${encodeURIComponent(username)}/`);
+    results.push(r);
+    if (DELAY_MS > 0) await sleep(DELAY_MS);
+  }
+
+  // A deleted creator's page answering 404 is still a refreshed page
+  const failed = results.filter((r) => !r.ok && r.status !== 404);
+  console.log(`\n--- Summary ---`);
+  console.log(`Total: ${results.length}  ✓ ${results.length - failed.length}  ✗ ${failed.length}`);
+  if (failed.length > 0) {
+    console.log(`\nFailed pages (cursor not moved, they will be retried):`);
+    failed.forEach((r) => console.log(`  [${r.status}] ${r.path}`));
+    process.exit(1);
+  }
+  await saveCursor(cursor, results.length);
+  console.log(`Cursor ${FEED_JOB} → ${cursor}`);
+}
+
 async function main() {
   console.log(`\nWarming ${pages.length} pages on ${BASE}\n`);
   const results = [];
@@ -285,4 +376,4 @@ async function main() {
   }
 }
 
-main().catch((e) => { console.error(e); process.exit(1); });
+(CHANGES_ONLY ? warmChanges() : main()).catch((e) => { console.error(e); process.exit(1); });
@@ -1,7 +1,8 @@
-﻿import os
+﻿import argparse
+import asyncio
+import os
 import sys
 import time
-from supabase import create_client
 
 # Read env vars (uses your ANON key so RLS policy must allow SELECT)
 URL = os.environ.get("SUPABASE_URL")
@@ -11,12 +12,31 @@ if not URL or not ANON:
     print("Missing SUPABASE_URL or SUPABASE_ANON_KEY in environment.")
     sys.exit(1)
 
-sb = create_client(URL, ANON)
+parser = argparse.ArgumentParser(description="Print the onlyfans_profiles row count every 10s")
+parser.add_argument("--mirror", metavar="PATH",
+                    help="Count rows in a local mirror (v2_local_mirror.py), synced incrementally each loop")
+args = parser.parse_args()
 
-def get_count():
-    # fetch 1 row but ask PostgREST to compute exact total
-    r = sb.table("onlyfans_profiles").select("id", count="exact").range(0, 0).execute()
-    return r.count
+if args.mirror:
+    from v2_local_mirror import ProfileMirror
+    from v2_shared_utils import SupabaseClient
+
+    db = SupabaseClient(URL, ANON)
+    mirror = ProfileMirror(args.mirror)
+
+    def get_count():
+        # only rows first seen / refreshed since the last loop are read from Supabase
+        asyncio.run(mirror.sync(db, progress=False))
+        return mirror.count()
+else:
+    from supabase import create_client
+
+    sb = create_client(URL, ANON)
+
+    def get_count():
+        # fetch 1 row but ask PostgREST to compute exact total
+        r = sb.table("onlyfans_profiles").select("id", count="exact").range(0, 0).execute()
+        return r.count
 
 if __name__ == "__main__":
     while True: